@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+
+
+@dataclass(slots=True)
+class ConversationContext:
+    session_id: str
+    user_id: Optional[str]
+    current_phase: str = "greeting"
+    appointment_type: Optional[str] = None
+    preferred_date: Optional[str] = None
+    preferred_time: Optional[str] = None
+    patient_info: Optional[Dict[str, Any]] = None
+    suggested_slots: List[Dict[str, Any]] = None
+    selected_slot: Optional[Dict[str, Any]] = None
+    booking_confirmed: bool = False
+    waitlist_id: Optional[str] = None
+    booking_id: Optional[str] = None
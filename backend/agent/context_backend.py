@@ -0,0 +1,158 @@
+import json
+import os
+import time
+from dataclasses import astuple, fields
+from typing import Optional
+
+from agent.context import ConversationContext
+from agent.session_store import DEFAULT_IDLE_TTL, DEFAULT_MAX_SESSIONS, SessionStore
+from utils.sqlite_pool import SQLitePool
+
+_FIELDS = [f.name for f in fields(ConversationContext)]
+
+
+class StaleContextError(Exception):
+    """Another worker saved the session after this turn loaded it; the turn's changes were not saved."""
+
+
+def encode_context(context: ConversationContext) -> bytes:
+    # Positional JSON array in field order: no repeated keys per session.
+    return json.dumps(astuple(context), separators=(",", ":")).encode()
+
+
+def decode_context(blob: bytes) -> ConversationContext:
+    return ConversationContext(**dict(zip(_FIELDS, json.loads(blob))))
+
+
+class MemoryContextBackend:
+    """Contexts held in this process only; save() is a no-op."""
+
+    def __init__(self, store: Optional[SessionStore] = None):
+        self.contexts = store or SessionStore()
+
+    async def load(self, session_id: str, user_id: Optional[str] = None) -> ConversationContext:
+        return self.contexts.get_or_create(
+            session_id, lambda: ConversationContext(session_id=session_id, user_id=user_id))
+
+    async def save(self, context: ConversationContext):
+        pass
+
+    def stats(self):
+        return self.contexts.stats()
+
+    def close(self):
+        pass
+
+
+class _CachedContexts(SessionStore):
+    """Read-through cache entries of [context, version, encoded blob]."""
+
+    def __getitem__(self, session_id):
+        return super().__getitem__(session_id)[0]
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at);
+"""
+
+
+class SQLiteContextBackend:
+    """Contexts shared by every worker on the host through one SQLite file.
+
+    Each worker keeps a read-through cache of decoded contexts. A load sends
+    the cached version along and the row blob is only returned, and decoded,
+    when another worker has written a newer version in between. Saves skip
+    the write entirely when the encoded context did not change, and only
+    succeed if the row still has the version this worker loaded; otherwise
+    they raise ``StaleContextError`` rather than overwrite the other turn.
+    """
+
+    def __init__(self, path: str, cache_size: int = DEFAULT_MAX_SESSIONS, idle_ttl: float = DEFAULT_IDLE_TTL,
+                 pool_size: int = 4):
+        self.idle_ttl = idle_ttl
+        self.pool = SQLitePool(path, pool_size, name="session-db")
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+        self.contexts = _CachedContexts(max_entries=cache_size, idle_ttl=idle_ttl)
+        self.reads = 0
+        self.decodes = 0
+        self.writes = 0
+
+    async def load(self, session_id: str, user_id: Optional[str] = None) -> ConversationContext:
+        self.contexts.expire()
+        cached = self.contexts.get(session_id)
+        row = await self.pool.run(self._fetch, session_id, cached[1] if cached else -1)
+        self.reads += 1
+        if row is None:
+            context = ConversationContext(session_id=session_id, user_id=user_id)
+            self.contexts.set(session_id, [context, 0, b""])
+            return context
+        version, blob = row
+        if blob is None:
+            return cached[0]
+        self.decodes += 1
+        context = decode_context(blob)
+        self.contexts.set(session_id, [context, version, bytes(blob)])
+        return context
+
+    async def save(self, context: ConversationContext):
+        blob = encode_context(context)
+        cached = self.contexts.get(context.session_id, count=False)
+        if cached is not None and cached[2] == blob:
+            return
+        loaded = cached[1] if cached is not None else 0
+        version = await self.pool.run(self._store, context.session_id, blob, loaded)
+        if version is None:
+            self.contexts.pop(context.session_id)
+            raise StaleContextError(f"Session {context.session_id!r} was updated by another worker")
+        self.writes += 1
+        self.contexts.set(context.session_id, [context, version, blob])
+
+    def stats(self):
+        return {**self.contexts.stats(), "reads": self.reads, "decodes": self.decodes, "writes": self.writes}
+
+    def close(self):
+        self.pool.close()
+
+    def _fetch(self, session_id, cached_version):
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "SELECT version, CASE WHEN version = ? THEN NULL ELSE data END FROM sessions WHERE id = ?",
+                (cached_version, session_id),
+            ).fetchone()
+
+    def _store(self, session_id, blob, loaded_version):
+        """Write ``blob`` as version ``loaded_version + 1``; None if the row moved past ``loaded_version``."""
+        now = time.time()
+        version = loaded_version + 1
+        with self.pool.transaction() as conn:
+            updated = conn.execute(
+                "UPDATE sessions SET version = ?, data = ?, updated_at = ? WHERE id = ? AND version = ?",
+                (version, blob, now, session_id, loaded_version),
+            ).rowcount
+            if not updated:
+                # New session, or one swept while idle; a row written meanwhile by another worker wins.
+                updated = conn.execute(
+                    "INSERT INTO sessions (id, version, data, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO NOTHING",
+                    (session_id, version, blob, now),
+                ).rowcount
+            if not updated:
+                return None
+            # Opportunistic sweep of idle sessions; the index keeps it cheap.
+            conn.execute("DELETE FROM sessions WHERE updated_at < ? AND id != ?", (now - self.idle_ttl, session_id))
+            return version
+
+
+def open_context_backend(url: Optional[str] = None):
+    """Backend for ``SESSION_BACKEND`` (``memory`` or ``sqlite:///path``)."""
+    url = url if url is not None else os.getenv("SESSION_BACKEND", "memory")
+    if url.startswith("sqlite:///"):
+        return SQLiteContextBackend(url[len("sqlite:///"):])
+    return MemoryContextBackend()
@@ -0,0 +1,105 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DATA_DIR = Path(os.getenv("DATA_DIR", Path(__file__).resolve().parents[2] / "data"))
+DEFAULT_INTENTS = DATA_DIR / "intents.json"
+
+# One scanner for the whole message: dates, clock times, bare numbers, words.
+_TOKEN_RE = re.compile(
+    r"(?P<date>\d{4}-\d{2}-\d{2})"
+    r"|(?P<time>\d{1,2}:\d{2}(?:\s*[ap]\.?m\b\.?)?|\d{1,2}\s*[ap]\.?m\b\.?)"
+    r"|(?P<num>\d+)(?![a-z])"
+    r"|(?P<word>[a-z0-9]+(?:'[a-z]+)?)"
+)
+
+
+def parse_clock(text: str) -> Optional[int]:
+    """'9:00', '09:30', '2pm', '2:30 p.m.' -> minutes after midnight."""
+    match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s*(?:([ap])\.?m\.?)?", text.strip().lower())
+    if not match:
+        return None
+    hour, minute, meridiem = int(match[1]), int(match[2] or 0), match[3]
+    if meridiem == "p" and hour < 12:
+        hour += 12
+    elif meridiem == "a" and hour == 12:
+        hour = 0
+    return hour * 60 + minute if hour < 24 and minute < 60 else None
+
+
+class Intent:
+    __slots__ = ("labels", "numbers", "times", "dates")
+
+    def __init__(self):
+        self.labels: Dict[str, List[Tuple[int, str]]] = {}
+        self.numbers: List[int] = []
+        self.times: List[int] = []
+        self.dates: List[str] = []
+
+    def get(self, category: str) -> Optional[str]:
+        """Highest-priority label matched for a category (data file order)."""
+        found = self.labels.get(category)
+        return min(found)[1] if found else None
+
+    def has(self, category: str) -> bool:
+        return category in self.labels
+
+    @property
+    def slot_number(self) -> Optional[int]:
+        if self.numbers:
+            return self.numbers[0]
+        ordinal = self.get("ordinal")
+        return int(ordinal) if ordinal else None
+
+
+class IntentRouter:
+    """Classifies a message against every intent category in one pass.
+
+    The message is lowercased and tokenized once; each token position is then
+    looked up in a phrase table (up to the longest phrase length), so the
+    cost depends on message length, not on how many intents are loaded.
+    """
+
+    def __init__(self, intents: Dict[str, Dict[str, List[str]]]):
+        self.phrases: Dict[str, List[Tuple[str, int, str]]] = {}
+        self.max_words = 1
+        for category, labels in intents.items():
+            for priority, (label, phrases) in enumerate(labels.items()):
+                for phrase in phrases:
+                    key = " ".join(m.group() for m in _TOKEN_RE.finditer(phrase.lower()))
+                    self.phrases.setdefault(key, []).append((category, priority, label))
+                    self.max_words = max(self.max_words, key.count(" ") + 1)
+
+    @classmethod
+    def from_file(cls, path: Path = DEFAULT_INTENTS) -> "IntentRouter":
+        return cls(json.loads(Path(path).read_text()))
+
+    def classify(self, message: str) -> Intent:
+        intent = Intent()
+        words = []
+        for match in _TOKEN_RE.finditer(message.lower()):
+            kind = match.lastgroup
+            if kind == "word":
+                words.append(match.group())
+                continue
+            if kind == "num":
+                intent.numbers.append(int(match.group()))
+            elif kind == "time":
+                minute = parse_clock(match.group())
+                if minute is not None:
+                    intent.times.append(minute)
+            elif kind == "date":
+                intent.dates.append(match.group())
+            words.append(match.group())
+
+        phrases, labels, n = self.phrases, intent.labels, len(words)
+        for i in range(n):
+            key = words[i]
+            for j in range(i + 1, min(n, i + self.max_words) + 1):
+                if j > i + 1:
+                    key = f"{key} {words[j - 1]}"
+                for category, priority, label in phrases.get(key, ()):
+                    labels.setdefault(category, []).append((priority, label))
+        return intent
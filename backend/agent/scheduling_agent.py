@@ -1,31 +1,81 @@
-from dataclasses import dataclass
-from typing import Optional, Dict, Any, List
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from datetime import date, timedelta
+from typing import AsyncIterator, Optional
 
+from agent.context import ConversationContext
+from agent.context_backend import open_context_backend
+from agent.intent_router import Intent, IntentRouter, parse_clock
+from rag.faq_index import load_corpus
 from rag.faq_rag import FAQRAG
-from tools.availability_tool import AvailabilityTool
-from tools.booking_tool import BookingTool
+from tools.availability_engine import WEEKDAYS, format_minute, load_schedule, parse_minute
+from tools.availability_tool import TIME_BANDS, AvailabilityTool
+from tools.booking_store import open_booking_store
+from tools.booking_tool import SLOT_STARTED, BookingTool
+from utils.metrics import REGISTRY, span
 
+logger = logging.getLogger(__name__)
 
-@dataclass
-class ConversationContext:
-    session_id: str
-    user_id: Optional[str]
-    current_phase: str = "greeting"
-    appointment_type: Optional[str] = None
-    preferred_date: Optional[str] = None
-    preferred_time: Optional[str] = None
-    patient_info: Optional[Dict[str, Any]] = None
-    suggested_slots: List[Dict[str, Any]] = None
-    selected_slot: Optional[Dict[str, Any]] = None
-    booking_confirmed: bool = False
+# How far ahead a waitlist entry looks when the patient gave no preferred date.
+WAITLIST_DAYS = 14
+
+TURN_SECONDS = REGISTRY.histogram("chat_turn_seconds", "Chat turn latency by the phase the turn started in",
+                                  ["phase"])
+
+
+def _is_iso_date(value: str) -> bool:
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+class _Subsystem:
+    """Agent attribute built by ``factory(agent)`` on first use; assigning it replaces it.
+
+    Creation is locked, so a warm-up thread and a request racing for the same
+    subsystem build it only once.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.lock = threading.Lock()
+
+    def __set_name__(self, owner, name):
+        self.attr = f"_{name}"
+
+    def __get__(self, agent, owner=None):
+        if agent is None:
+            return self
+        value = agent.__dict__.get(self.attr)
+        if value is None:
+            with self.lock:
+                value = agent.__dict__.get(self.attr)
+                if value is None:
+                    value = agent.__dict__[self.attr] = self.factory(agent)
+        return value
+
+    def __set__(self, agent, value):
+        agent.__dict__[self.attr] = value
 
 
 class SchedulingAgent:
-    def __init__(self):
-        self.faq_rag = FAQRAG()
-        self.availability_tool = AvailabilityTool()
-        self.booking_tool = BookingTool()
-        self.conversation_contexts: Dict[str, ConversationContext] = {}
+    SUBSYSTEMS = ("faq_rag", "availability_tool", "booking_tool")
+
+    faq_rag = _Subsystem(lambda agent: FAQRAG())
+    availability_tool = _Subsystem(lambda agent: AvailabilityTool())
+    booking_tool = _Subsystem(lambda agent: BookingTool(agent.availability_tool, store=open_booking_store()))
+
+    def __init__(self, context_backend=None):
+        self.intent_router = IntentRouter.from_file()
+        self.context_backend = context_backend or open_context_backend()
+        self.conversation_contexts = self.context_backend.contexts
+        # Turns of one session run one at a time, in arrival order (asyncio.Lock is FIFO).
+        self._session_locks = weakref.WeakValueDictionary()
 
         self.appointment_durations = {
             "general_consultation": 30,
@@ -34,76 +84,285 @@ class SchedulingAgent:
             "specialist_consultation": 60
         }
 
+    def loaded(self):
+        return {name: f"_{name}" in self.__dict__ for name in self.SUBSYSTEMS}
+
+    async def warm_up(self):
+        """Build every subsystem on worker threads: the FAQ index alongside the
+        availability engine and booking store (which replays bookings into it)."""
+        await asyncio.gather(asyncio.to_thread(getattr, self, "faq_rag"),
+                             asyncio.to_thread(getattr, self, "booking_tool"))
+
+    def reload_faq(self, path):
+        """Apply an edited clinic info file; False if the FAQ index is not built yet.
+
+        A build still running may have read the file before the edit, so the
+        file watcher keeps offering the change until it can be applied.
+        """
+        if not self.loaded()["faq_rag"]:
+            return False
+        logger.info("Reloaded %s: %s", path, self.faq_rag.apply_corpus(load_corpus(path)))
+        return True
+
+    def reload_schedule(self, path):
+        """Apply an edited doctor schedule; False if availability is not built yet (see ``reload_faq``)."""
+        if not self.loaded()["availability_tool"]:
+            return False
+        touched = self.availability_tool.apply_schedule(load_schedule(path))
+        logger.info("Reloaded %s: %s doctor-days changed", path, "all" if touched is None else len(touched))
+        return True
+
+    def close(self):
+        if self.loaded()["booking_tool"]:
+            self.booking_tool.store.close()
+        self.context_backend.close()
+
     async def process_message(self, message: str, session_id: str, user_id: Optional[str] = None):
+        chunks = [chunk async for chunk in self.stream_message(message, session_id, user_id)]
+        return {"response": "".join(chunks)}
 
-        if session_id not in self.conversation_contexts:
-            self.conversation_contexts[session_id] = ConversationContext(
-                session_id=session_id, user_id=user_id)
+    async def stream_message(self, message: str, session_id: str,
+                             user_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield the reply in pieces as it is produced; joined, they form the full response."""
+        start = time.perf_counter()
+        async with self._session_lock(session_id):
+            context = await self.context_backend.load(session_id, user_id)
+            phase = context.current_phase
+            with span("chat.turn", session_id=session_id, phase=phase) as attributes:
+                intent = self.intent_router.classify(message)
+                try:
+                    async for chunk in self._reply(context, message, intent):
+                        yield chunk
+                finally:
+                    await self.context_backend.save(context)
+                    attributes["next_phase"] = context.current_phase
+                    TURN_SECONDS.labels(phase).observe(time.perf_counter() - start)
 
-        context = self.conversation_contexts[session_id]
+    def _session_lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        return lock
 
-        if await self._is_faq_query(message):
-            answer = await self.answer_faq(message)
-            return {"response": answer}
+    async def _reply(self, context: ConversationContext, message: str, intent: Intent) -> AsyncIterator[str]:
+        # A "Reason: ..." line in the patient form may mention insurance etc.
+        if intent.has("faq") and not (context.current_phase == "patient" and ":" in message):
+            yield await self.answer_faq(message)
+            return
 
         if context.current_phase == "greeting":
             context.current_phase = "understanding"
-            return {"response": "Hello! What type of appointment do you need?"}
+            yield "Hello! What type of appointment do you need?"
+            return
+
+        if context.current_phase in ("booked", "waitlisted") and intent.has("withdraw"):
+            yield await self._withdraw(context)
+            return
+
+        if context.current_phase in ("booked", "waitlisted") and (
+                intent.has("appointment_type") or intent.has("restart")):
+            self._new_request(context)
 
         if context.current_phase == "understanding":
-            ap_type = await self._extract_appointment_type(message)
+            ap_type = intent.get("appointment_type")
             if not ap_type:
-                return {"response": "Choose: general, follow-up, exam, specialist."}
+                yield "Choose: general, follow-up, exam, specialist."
+                return
 
             context.appointment_type = ap_type
-            context.current_phase = "slots"
-
-            slots = await self.availability_tool.get_available_slots()
-            context.suggested_slots = slots[:5]
-
-            text = "\n".join([f"{i+1}. {s['date']} {s['time']}" for i, s in enumerate(context.suggested_slots)])
-            return {"response": f"Here are available slots:\n{text}"}
+            self._update_preferences(context, intent)
+            async for chunk in self._offer_slots(context, "Here are available slots"):
+                yield chunk
+            return
 
         if context.current_phase == "slots":
-            slot = await self._extract_slot_selection(message, context.suggested_slots)
+            if intent.has("waitlist"):
+                context.selected_slot = None
+                context.current_phase = "patient"
+                yield "To join the waitlist, provide name, phone, email, reason."
+                return
+            slot = self._match_slot(intent, context.suggested_slots)
+            if not slot and self._update_preferences(context, intent):
+                async for chunk in self._offer_slots(context, "Here are the closest slots"):
+                    yield chunk
+                return
             if not slot:
-                return {"response": "Please say which slot number you choose."}
+                yield "Please say which slot number you choose."
+                return
             context.selected_slot = slot
             context.current_phase = "patient"
-            return {"response": "Please provide name, phone, email, reason."}
+            yield "Please provide name, phone, email, reason."
+            return
 
         if context.current_phase == "patient":
             info = await self._extract_patient_info(message)
             if not info:
-                return {"response": "Provide: name, phone, email, reason."}
+                yield "Provide: name, phone, email, reason."
+                return
             context.patient_info = info
+            if context.selected_slot is None:
+                entry = self._join_waitlist(context)
+                context.waitlist_id = entry["waitlist_id"]
+                context.current_phase = "waitlisted"
+                yield f"You're on the waitlist (ID: {entry['waitlist_id']}). " \
+                      "We'll book the first matching slot that opens up."
+                return
+            context.current_phase = "confirm"
 
-            return {"response": f"Confirm booking? (yes/no)"}
+            yield "Confirm booking? (yes/no)"
+            return
 
         if context.current_phase == "confirm":
-            if "yes" in message.lower():
-                result = await self.booking_tool.book_appointment(context.patient_info, context.selected_slot)
-                return {"response": f"Booked! ID: {result['booking_id']}"}
-            return {"response": "Cancelled."}
+            if intent.has("affirm") and not intent.has("negate"):
+                slot = {**context.selected_slot, "appointment_type": context.appointment_type}
+                # Retries within this worker queue on the session lock and hit the "booked"
+                # phase. The key's cache is per process: a retry racing here on another
+                # worker is stopped only by the store's conflict check ("slot taken").
+                key = (context.session_id, slot.get("doctor_id"), slot.get("date"), slot.get("time"),
+                       context.patient_info.get("email"))
+                result = await self.booking_tool.book_appointment(context.patient_info, slot, idempotency_key=key)
+                if not result["success"]:
+                    reason = "has already started" if result["error"] == SLOT_STARTED["error"] else "was just taken"
+                    async for chunk in self._offer_slots(context, f"Sorry, that slot {reason}. Here are other slots"):
+                        yield chunk
+                    return
+                context.booking_confirmed = True
+                context.booking_id = result["booking_id"]
+                context.current_phase = "booked"
+                yield f"Booked! ID: {result['booking_id']}"
+                return
+            context.current_phase = "understanding"
+            yield "Cancelled."
+            return
+
+        if context.current_phase == "booked":
+            if intent.has("affirm") and not intent.has("negate"):
+                # A retried "yes" queued behind the booking turn gets the same confirmation.
+                yield f"Booked! ID: {context.booking_id}"
+                return
+            yield f"You're booked (ID: {context.booking_id}). " \
+                  "Say 'cancel' to cancel it, or name an appointment type to book another."
+            return
+
+        if context.current_phase == "waitlisted":
+            yield await self._waitlist_status(context)
+            return
+
+        yield "Try again."
+
+    def _new_request(self, context: ConversationContext):
+        """Start over at the appointment type; a booking or waitlist entry already made stands."""
+        context.current_phase = "understanding"
+        context.appointment_type = context.preferred_date = context.preferred_time = None
+        context.suggested_slots = context.selected_slot = None
+        context.booking_confirmed = False
+        context.booking_id = context.waitlist_id = None
 
-        return {"response": "Try again."}
+    async def _withdraw(self, context: ConversationContext) -> str:
+        """Cancel the session's booking, or take its entry off the waitlist."""
+        if context.current_phase == "booked":
+            booking_id = context.booking_id
+            result = await self.booking_tool.cancel_appointment(booking_id)
+            reply = f"Cancelled booking {booking_id}." if result["success"] else \
+                f"Booking {booking_id} was already cancelled."
+        else:
+            waitlist_id = context.waitlist_id
+            if self.booking_tool.waitlist.remove(waitlist_id) is None:
+                # Booked meanwhile, or no longer listed: say which.
+                return await self._waitlist_status(context)
+            reply = f"You've left the waitlist ({waitlist_id})."
+        self._new_request(context)
+        return f"{reply} What type of appointment do you need?"
 
-    async def _is_faq_query(self, m): return any(k in m.lower() for k in ["hours", "location", "insurance"])
+    async def _waitlist_status(self, context: ConversationContext) -> str:
+        waitlist_id = context.waitlist_id
+        entry = self.booking_tool.waitlist.get(waitlist_id)
+        if entry is None or entry["status"] == "removed":
+            self._new_request(context)
+            return f"Waitlist entry {waitlist_id} is no longer active. What type of appointment do you need?"
+        if entry["status"] == "booked":
+            booking = await self.booking_tool.store.get(entry["booking_id"])
+            context.booking_confirmed = True
+            context.booking_id = entry["booking_id"]
+            context.current_phase = "booked"
+            return f"A slot opened up: you're booked for {booking['date']} {format_minute(booking['start'])} " \
+                   f"(ID: {entry['booking_id']})."
+        return f"You're on the waitlist (ID: {waitlist_id}) for {entry['date_from']} to {entry['date_to']}. " \
+               "Say 'cancel' to leave it, or name an appointment type to make another request."
+
+    async def _offer_slots(self, context: ConversationContext, intro: str) -> AsyncIterator[str]:
+        yield f"{intro}:"
+        context.current_phase = "slots"
+        await self.booking_tool.sync()
+        duration = self.appointment_durations[context.appointment_type]
+        if context.preferred_date or context.preferred_time:
+            band = context.preferred_time if context.preferred_time in TIME_BANDS else None
+            context.suggested_slots = await self.availability_tool.find_best_slots(
+                k=5, duration=duration,
+                preferred_date=date.fromisoformat(context.preferred_date) if context.preferred_date else None,
+                preferred_time=parse_minute(context.preferred_time) if context.preferred_time and not band else None,
+                band=band)
+        else:
+            context.suggested_slots = await self.availability_tool.get_available_slots(duration=duration, limit=5)
+        for i, s in enumerate(context.suggested_slots):
+            yield f"\n{i+1}. {s['date']} {s['time']} with {s['doctor']}"
+        if not context.suggested_slots:
+            yield "\nNothing is open. Say 'waitlist' to be booked into the first matching cancellation."
+
+    def _join_waitlist(self, context: ConversationContext):
+        today = self.availability_tool.clock().date()
+        if context.preferred_date:
+            date_from = date_to = max(date.fromisoformat(context.preferred_date), today)
+        else:
+            date_from, date_to = today, today + timedelta(days=WAITLIST_DAYS - 1)
+        return self.booking_tool.join_waitlist(
+            context.patient_info, context.appointment_type, self.appointment_durations[context.appointment_type],
+            date_from, date_to, band=context.preferred_time if context.preferred_time in TIME_BANDS else None)
+
+    def _update_preferences(self, context: ConversationContext, intent: Intent) -> bool:
+        """Copy any date/time preference in the message onto the context; True if one was found."""
+        today = self.availability_tool.clock().date()
+        preferred_date = next((d for d in intent.dates if _is_iso_date(d)), None)
+        if preferred_date is None and intent.has("relative_day"):
+            preferred_date = (today + timedelta(days=int(intent.get("relative_day")))).isoformat()
+        elif preferred_date is None and intent.has("weekday"):
+            ahead = (WEEKDAYS.index(intent.get("weekday")) - today.weekday()) % 7
+            preferred_date = (today + timedelta(days=ahead)).isoformat()
+
+        preferred_time = None
+        if intent.times:
+            preferred_time = format_minute(intent.times[0])
+        elif intent.has("time_band"):
+            preferred_time = intent.get("time_band")
+
+        if preferred_date:
+            context.preferred_date = preferred_date
+        if preferred_time:
+            context.preferred_time = preferred_time
+        return bool(preferred_date or preferred_time)
+
+    async def _is_faq_query(self, m): return self.intent_router.classify(m).has("faq")
 
     async def answer_faq(self, q): return await self.faq_rag.get_answer(q)
 
-    async def _extract_appointment_type(self, m):
-        m = m.lower()
-        if "general" in m: return "general_consultation"
-        if "follow" in m: return "follow_up"
-        if "exam" in m: return "physical_exam"
-        if "specialist" in m: return "specialist_consultation"
-        return None
+    async def _extract_appointment_type(self, m): return self.intent_router.classify(m).get("appointment_type")
+
+    async def _extract_slot_selection(self, m, slots): return self._match_slot(self.intent_router.classify(m), slots)
 
-    async def _extract_slot_selection(self, m, slots):
+    def _match_slot(self, intent: Intent, slots):
+        if not slots:
+            return None
+        number = intent.slot_number
+        if number is not None and 1 <= number <= len(slots):
+            return slots[number - 1]
+        if not (intent.dates or intent.times):
+            return None
         for s in slots:
-            if s["date"] in m or s["time"].lower() in m.lower():
-                return s
+            if intent.dates and s["date"] not in intent.dates:
+                continue
+            if intent.times and parse_clock(s["time"]) not in intent.times:
+                continue
+            return s
         return None
 
     async def _extract_patient_info(self, m):
@@ -0,0 +1,37 @@
+import os
+from typing import Any, Callable, Hashable
+
+from utils.cache import LRUCache
+
+DEFAULT_MAX_SESSIONS = int(os.getenv("SESSION_MAX_ENTRIES", "50000"))
+DEFAULT_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))
+
+
+class SessionStore(LRUCache):
+    """Conversation contexts with an entry cap (LRU) and an idle timeout.
+
+    Expired sessions are swept from the cold end on every lookup, so
+    abandoned chats are released without a background task.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_SESSIONS, idle_ttl: float = DEFAULT_IDLE_TTL):
+        super().__init__(maxsize=max_entries, ttl=idle_ttl)
+        self.created = 0
+
+    def get_or_create(self, session_id: Hashable, factory: Callable[[], Any]) -> Any:
+        self.expire()
+        context = self.get(session_id)
+        if context is None:
+            context = factory()
+            self.set(session_id, context)
+            self.created += 1
+        return context
+
+    def __getitem__(self, session_id):
+        context = self.get(session_id, count=False)
+        if context is None:
+            raise KeyError(session_id)
+        return context
+
+    def stats(self):
+        return {**super().stats(), "created": self.created}
@@ -0,0 +1,92 @@
+from datetime import date
+from typing import Dict, Literal
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from api.chat import agent
+from utils.idempotency import IdempotencyConflict
+from tools.availability_engine import parse_minute
+from tools.availability_tool import series_slots, slot_id
+from tools.booking_export import FORMATS, iter_bookings
+from tools.booking_store import booking_number
+from tools.booking_tool import NOT_FOUND, SLOT_STARTED
+
+router = APIRouter(prefix="/bookings", tags=["Bookings"])
+
+MAX_OCCURRENCES = 52
+
+
+class SeriesRequest(BaseModel):
+    patient: Dict[str, str]
+    doctor_id: str
+    start_date: date
+    time: str = Field(pattern=r"^\d{1,2}:\d{2}$")
+    duration: int = Field(default=30, gt=0, le=480)
+    occurrences: int = Field(ge=1, le=MAX_OCCURRENCES)
+    every_days: int = Field(default=7, ge=1)
+    appointment_type: str | None = None
+
+
+class RescheduleRequest(BaseModel):
+    doctor_id: str
+    date: date
+    time: str = Field(pattern=r"^\d{1,2}:\d{2}$")
+    duration: int | None = Field(default=None, gt=0, le=480)
+
+
+@router.post("/series")
+async def book_series(req: SeriesRequest, idempotency_key: str | None = Header(default=None)):
+    """Book e.g. every Tuesday 9:00 for 8 weeks, all or nothing; 409 lists conflicts with alternatives.
+
+    The availability window grows to cover the series; one ending too far ahead, or with an
+    occurrence that has already started, is rejected with 422.
+    """
+    slots = series_slots(req.doctor_id, req.start_date, req.time, req.duration, req.occurrences,
+                         req.every_days, req.appointment_type)
+    try:
+        result = await agent.booking_tool.book_series(req.patient, slots, idempotency_key=idempotency_key)
+    except (IdempotencyConflict, ValueError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    if result["success"]:
+        return result
+    return JSONResponse(result, status_code=422 if result["error"] == SLOT_STARTED["error"] else 409)
+
+
+@router.get("/export")
+async def export_bookings(format: Literal["ndjson", "csv"] = "ndjson", date_from: str | None = None,
+                          date_to: str | None = None, doctor_id: str | None = None,
+                          appointment_type: str | None = None, status: str | None = None, cursor: str = "0"):
+    """Stream matching bookings; ``cursor`` (``BOOK123`` or ``123``) resumes after that booking."""
+    after = booking_number(cursor)
+    if after < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    records = iter_bookings(agent.booking_tool.store, after, date_from=date_from, date_to=date_to,
+                            doctor_id=doctor_id, appointment_type=appointment_type, status=status)
+    lines, media_type = FORMATS[format]
+    return StreamingResponse(lines(records), media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename=bookings.{format}"})
+
+
+@router.delete("/{booking_id}")
+async def cancel_booking(booking_id: str):
+    """Cancel a booking; the freed slot is offered to the waitlist at once (``backfill``)."""
+    result = await agent.booking_tool.cancel_appointment(booking_id)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+
+@router.post("/{booking_id}/reschedule")
+async def reschedule_booking(booking_id: str, req: RescheduleRequest):
+    """Move a booking, keeping its duration unless one is given; 409 when the new slot is taken, 422 if it started."""
+    slot = {"id": slot_id(req.doctor_id, req.date, parse_minute(req.time)), "doctor_id": req.doctor_id,
+            "date": req.date.isoformat(), "time": req.time}
+    if req.duration is not None:
+        slot["duration"] = req.duration
+    result = await agent.booking_tool.reschedule_appointment(booking_id, slot)
+    if not result["success"]:
+        status = {NOT_FOUND["error"]: 404, SLOT_STARTED["error"]: 422}.get(result["error"], 409)
+        raise HTTPException(status_code=status, detail=result["error"])
+    return result
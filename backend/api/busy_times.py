@@ -0,0 +1,112 @@
+import asyncio
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from utils.cache import LRUCache
+
+DEFAULT_TTL = float(os.getenv("CALENDLY_BUSY_TTL_SECONDS", "15"))
+
+
+class BusyTimes:
+    """Shared, coalescing front for the provider's busy-time lookups.
+
+    Dates requested within ``window`` seconds of each other are fetched in
+    as few range calls as possible (at most ``max_span`` days each, gaps
+    included, which prefetches the days in between). A date that is already
+    being fetched is not requested again. Results are cached for ``ttl``
+    seconds; ``invalidate`` drops a date after one of our own writes and
+    keeps a fetch that raced with the write from being cached.
+    """
+
+    def __init__(self, fetch_range, ttl: Optional[float] = DEFAULT_TTL, window: float = 0.002,
+                 max_span: int = 14, maxsize: int = 4096):
+        self.fetch_range = fetch_range
+        self.window = window
+        self.max_span = max_span
+        self.entries = LRUCache(maxsize, ttl=ttl, sliding=False)
+        self._inflight: Dict[date, asyncio.Future] = {}
+        self._pending: List[date] = []
+        self._flush_handle = None
+        self._tasks = set()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+
+    async def get(self, date_str: str) -> List[Dict[str, str]]:
+        cached = self.entries.get(date_str, count=False)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        day = date.fromisoformat(date_str)
+        future = self._inflight.get(day)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        future = self._inflight[day] = loop.create_future()
+        self._pending.append(day)
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+
+    def invalidate(self, date_str: Optional[str] = None):
+        """Forget one date, or everything when the date is unknown."""
+        # Fetches already on the wire may predate the write: none of them
+        # gets cached (their callers still get the answer).
+        self._generation += 1
+        if date_str is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(date_str)
+
+    def stats(self):
+        total = self.hits + self.misses + self.coalesced
+        return {
+            **self.entries.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / total if total else 0.0,
+            "upstream_calls": self.upstream_calls,
+        }
+
+    def _flush(self):
+        self._flush_handle = None
+        days, self._pending = sorted(self._pending), []
+        groups: List[List[date]] = []
+        for day in days:
+            if groups and (day - groups[-1][0]).days < self.max_span:
+                groups[-1].append(day)
+            else:
+                groups.append([day])
+        for group in groups:
+            task = asyncio.ensure_future(self._fetch(group[0], group[-1]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, first: date, last: date):
+        span = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        generation = self._generation
+        self.upstream_calls += 1
+        try:
+            busy = await self.fetch_range(first.isoformat(), last.isoformat())
+        except Exception as exc:
+            for day in span:
+                future = self._inflight.pop(day, None)
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+                    future.exception()
+            return
+        for day in span:
+            key = day.isoformat()
+            value = busy.get(key, [])
+            if self._generation == generation:
+                self.entries.set(key, value)
+            future = self._inflight.pop(day, None)
+            if future is not None and not future.done():
+                future.set_result(value)
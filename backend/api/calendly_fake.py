@@ -0,0 +1,128 @@
+"""Local stand-in for the scheduling provider, with injectable faults.
+
+Serves the contract ``api.calendly_integration.CalendlyAPI`` speaks, keeping
+bookings in memory. Run it for offline benchmarks (from ``backend/``)::
+
+    uvicorn api.calendly_fake:app --port 8100
+
+and point the client at it with ``CALENDLY_BASE_URL=http://127.0.0.1:8100``
+plus any non-empty ``CALENDLY_API_TOKEN``. Faults can be changed at runtime
+with ``PUT /_faults`` (``{"latency": 0.05, "jitter": 0.02, "error_rate": 0.1}``).
+"""
+import asyncio
+import itertools
+import random
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from tools.availability_tool import parse_slot_id
+
+DEFAULT_DURATION = 30
+
+
+class Faults(BaseModel):
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+
+
+class BookingIn(BaseModel):
+    slot_id: str
+    patient: Dict[str, Any] = {}
+    appointment_type: Optional[str] = None
+    duration: int = DEFAULT_DURATION
+
+
+class RescheduleIn(BaseModel):
+    slot_id: str
+
+
+def create_app(faults: Optional[Faults] = None, seed: Optional[int] = None) -> FastAPI:
+    app = FastAPI(title="Fake scheduling provider")
+    app.state.faults = faults or Faults()
+    app.state.requests = 0
+    rng = random.Random(seed)
+    bookings: Dict[str, Dict[str, Any]] = {}
+    ids = itertools.count(1)
+
+    @app.middleware("http")
+    async def inject_faults(request, call_next):
+        if request.url.path == "/_faults":
+            return await call_next(request)
+        app.state.requests += 1
+        f = app.state.faults
+        delay = f.latency + rng.uniform(0, f.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if f.error_rate and rng.random() < f.error_rate:
+            return JSONResponse({"detail": "injected failure"}, status_code=f.error_status)
+        return await call_next(request)
+
+    @app.put("/_faults")
+    async def set_faults(new: Faults):
+        app.state.faults = new
+        return new
+
+    def busy_interval(record):
+        _, day, minute = parse_slot_id(record["slot_id"])
+        start = datetime.combine(day, datetime.min.time()) + timedelta(minutes=minute)
+        return start, start + timedelta(minutes=record["duration"])
+
+    @app.get("/busy_times")
+    async def busy_times(start: date, end: date):
+        busy = {}
+        for record in bookings.values():
+            if record["status"] != "confirmed":
+                continue
+            begin, finish = busy_interval(record)
+            if start <= begin.date() <= end:
+                busy.setdefault(begin.date().isoformat(), []).append(
+                    {"start": begin.isoformat(), "end": finish.isoformat(), "booking_id": record["booking_id"]})
+        return {"busy": busy}
+
+    @app.get("/slots/{slot_id}")
+    async def slot(slot_id: str, appointment_type: Optional[str] = None):
+        taken = any(r["slot_id"] == slot_id and r["status"] == "confirmed" for r in bookings.values())
+        return {"available": not taken, "slot": {"slot_id": slot_id, "appointment_type": appointment_type}}
+
+    @app.post("/bookings", status_code=201)
+    async def book(body: BookingIn):
+        try:
+            parse_slot_id(body.slot_id)
+        except ValueError:
+            raise HTTPException(422, "malformed slot_id")
+        if any(r["slot_id"] == body.slot_id and r["status"] == "confirmed" for r in bookings.values()):
+            raise HTTPException(409, "slot taken")
+        booking_id = f"CL{next(ids)}"
+        bookings[booking_id] = {**body.model_dump(), "booking_id": booking_id, "status": "confirmed"}
+        return bookings[booking_id]
+
+    def confirmed(booking_id):
+        record = bookings.get(booking_id)
+        if record is None or record["status"] != "confirmed":
+            raise HTTPException(404, "booking not found")
+        return record
+
+    @app.get("/bookings/{booking_id}")
+    async def details(booking_id: str):
+        return confirmed(booking_id)
+
+    @app.delete("/bookings/{booking_id}")
+    async def cancel(booking_id: str):
+        confirmed(booking_id)["status"] = "cancelled"
+        return bookings[booking_id]
+
+    @app.patch("/bookings/{booking_id}")
+    async def reschedule(booking_id: str, body: RescheduleIn):
+        confirmed(booking_id)["slot_id"] = body.slot_id
+        return bookings[booking_id]
+
+    return app
+
+
+app = create_app()
@@ -1,24 +1,266 @@
+"""Client for the external scheduling provider.
+
+With no ``CALENDLY_API_TOKEN`` configured every call answers like the old
+demo stub (always free, always booked). Once configured, calls go over one
+pooled keep-alive ``httpx.AsyncClient`` (HTTP/2 when the ``h2`` package is
+installed) and each call gets:
+
+* a deadline covering all attempts (``CALENDLY_TIMEOUT_SECONDS``),
+* bounded retries with full-jitter exponential backoff on connection
+  errors, 429 and 5xx (writes only retry if the request never got sent),
+* a cap on requests in flight, so a slow upstream sheds load instead of
+  piling up coroutines, and
+* a circuit breaker that fails fast while the upstream keeps failing.
+
+Busy-time lookups go through a shared ``BusyTimes`` layer that coalesces
+and caches them; our own writes invalidate the dates they touch.
+
+The provider contract is the one served by ``api.calendly_fake``.
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from api.busy_times import BusyTimes
+from tools.availability_tool import parse_slot_id
+from utils.cache import LRUCache
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.metrics import REGISTRY
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+REQUEST_SECONDS = REGISTRY.histogram("provider_request_seconds", "Scheduling provider call latency, retries included",
+                                     ["method", "outcome"])
+
+
+class CalendlyError(Exception):
+
+    def __init__(self, message: str, status: Optional[int] = None, outcome: str = "error"):
+        super().__init__(message)
+        self.status = status
+        self.outcome = outcome
+
+
 class CalendlyAPI:
 
+    def __init__(self, base_url: Optional[str] = None, token: Optional[str] = None,
+                 timeout: Optional[float] = None, retries: int = 2, backoff: float = 0.05,
+                 max_in_flight: int = 64, breaker: Optional[CircuitBreaker] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url or os.getenv("CALENDLY_BASE_URL", "https://api.calendly.com")
+        self.token = token if token is not None else os.getenv("CALENDLY_API_TOKEN", "")
+        self.timeout = timeout if timeout is not None else float(os.getenv("CALENDLY_TIMEOUT_SECONDS", "2.0"))
+        self.retries = retries
+        self.backoff = backoff
+        self.max_in_flight = max_in_flight
+        self.breaker = breaker or CircuitBreaker()
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.calls = 0
+        self.attempts = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.busy = BusyTimes(self.get_busy_range)
+        self._booking_days = LRUCache(maxsize=10000)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.token)
+
     async def get_busy_times(self, date_str):
-        return []  # always free for demo
+        if not self.configured:
+            return []  # always free for demo
+        return await self.busy.get(date_str)
+
+    async def get_busy_range(self, start: str, end: str) -> Dict[str, List[Dict[str, str]]]:
+        """Busy intervals per ISO date for ``start``..``end`` inclusive."""
+        if not self.configured:
+            return {}  # always free for demo
+        data = await self._request("GET", "/busy_times", params={"start": start, "end": end})
+        return data["busy"]
 
     async def check_slot_availability(self, slot_id, appointment_type):
-        return {"available": True, "slot": None}
+        if not self.configured:
+            return {"available": True, "slot": None}
+        try:
+            return await self._request("GET", f"/slots/{slot_id}", params={"appointment_type": appointment_type})
+        except CalendlyError as exc:
+            return {"available": False, "slot": None, "error": str(exc)}
 
     async def book_appointment(self, slot_id, patient_info, appointment_type):
-        return {
-            "success": True,
-            "booking_details": {
-                "booking_id": f"CL-{slot_id}"
+        if not self.configured:
+            return {
+                "success": True,
+                "booking_details": {
+                    "booking_id": f"CL-{slot_id}"
+                }
             }
-        }
+        try:
+            return await self._call("POST", "/bookings", "booking_details", json={
+                "slot_id": slot_id, "patient": patient_info, "appointment_type": appointment_type})
+        finally:
+            self.busy.invalidate(self._slot_day(slot_id))
 
     async def cancel_appointment(self, booking_id):
-        return {"success": True}
+        if not self.configured:
+            return {"success": True}
+        try:
+            return await self._call("DELETE", f"/bookings/{booking_id}")
+        finally:
+            self.busy.invalidate(self._booking_days.pop(booking_id))
 
     async def reschedule_appointment(self, booking_id, new_slot_id):
-        return {"success": True}
+        if not self.configured:
+            return {"success": True}
+        old_day = self._booking_days.get(booking_id)
+        try:
+            return await self._call("PATCH", f"/bookings/{booking_id}", json={"slot_id": new_slot_id})
+        finally:
+            self.busy.invalidate(old_day)
+            self.busy.invalidate(self._slot_day(new_slot_id))
 
     async def get_appointment_details(self, booking_id):
-        return {"success": True, "details": {}}
+        if not self.configured:
+            return {"success": True, "details": {}}
+        return await self._call("GET", f"/bookings/{booking_id}", "details")
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "circuit": self.breaker.state,
+            "circuit_rejected": self.breaker.rejected,
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _slot_day(slot_id) -> Optional[str]:
+        try:
+            return parse_slot_id(slot_id)[1].isoformat()
+        except ValueError:
+            return None
+
+    async def _call(self, method, path, result_key=None, **kwargs):
+        try:
+            data = await self._request(method, path, **kwargs)
+        except CalendlyError as exc:
+            return {"success": False, "error": str(exc)}
+        if isinstance(data, dict) and data.get("booking_id") and data.get("slot_id"):
+            self._booking_days.set(data["booking_id"], self._slot_day(data["slot_id"]))
+        return {"success": True, result_key: data} if result_key else {"success": True}
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            data = await self._guarded(method, path, **kwargs)
+            outcome = "ok"
+            return data
+        except CalendlyError as exc:
+            outcome = exc.outcome
+            raise
+        finally:
+            REQUEST_SECONDS.labels(method, outcome).observe(time.perf_counter() - start)
+
+    async def _guarded(self, method: str, path: str, **kwargs) -> Any:
+        self.calls += 1
+        deadline = time.monotonic() + self.timeout
+        try:
+            self.breaker.check()
+        except CircuitOpenError as exc:
+            self.failures += 1
+            raise CalendlyError("scheduling provider unavailable", outcome="rejected") from exc
+        try:
+            data = await asyncio.wait_for(self._attempts(method, path, deadline, **kwargs), self.timeout)
+        except asyncio.TimeoutError:
+            self._failed()
+            raise CalendlyError(f"{method} {path} timed out after {self.timeout}s", outcome="timeout") from None
+        except CalendlyError as exc:
+            if exc.status is None or exc.status in RETRY_STATUSES:
+                self._failed()
+            else:
+                self.breaker.record_success()  # a 4xx means the provider is up
+            raise
+        except BaseException:
+            # Cancelled by the caller: says nothing about the upstream, but a
+            # half-open probe must not stay claimed.
+            if self.breaker.state == "half-open":
+                self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return data
+
+    def _failed(self):
+        self.failures += 1
+        self.breaker.record_failure()
+
+    async def _attempts(self, method, path, deadline, **kwargs):
+        client = self._get_client()
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                return await self._send(client, method, path, deadline, **kwargs)
+            finally:
+                self.in_flight -= 1
+
+    async def _send(self, client, method, path, deadline, **kwargs):
+        for attempt in range(self.retries + 1):
+            self.attempts += 1
+            retry_after = None
+            try:
+                response = await client.request(method, path, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as exc:
+                error = CalendlyError(f"{method} {path}: {exc!r}")
+            except httpx.TransportError as exc:
+                # The request may have reached the provider; only reads are safe to repeat.
+                error = CalendlyError(f"{method} {path}: {exc!r}")
+                if method != "GET":
+                    raise error from exc
+            else:
+                if response.status_code < 400:
+                    return response.json() if response.content else None
+                error = CalendlyError(f"{method} {path}: HTTP {response.status_code}", response.status_code)
+                if response.status_code not in RETRY_STATUSES or \
+                        (method != "GET" and response.status_code != 429):
+                    raise error
+                retry_after = response.headers.get("retry-after")
+
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            try:
+                delay = max(delay, float(retry_after or 0))
+            except ValueError:
+                pass
+            if attempt == self.retries or time.monotonic() + delay >= deadline:
+                raise error
+            await asyncio.sleep(delay)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.token}"},
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.max_in_flight,
+                                    max_keepalive_connections=self.max_in_flight),
+                http2=HTTP2 and self._transport is None,
+                transport=self._transport,
+            )
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._client
@@ -1,22 +1,187 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+import asyncio
+import json
+import math
+import os
+from typing import Dict, List
+
+from fastapi import APIRouter, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from agent.context_backend import StaleContextError
 from agent.scheduling_agent import SchedulingAgent
+from utils.admission import MAX_IN_FLIGHT, AdmissionController, Overloaded, RateLimiter
+from utils.idempotency import IdempotencyCache, IdempotencyConflict
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 agent = SchedulingAgent()
+idempotency = IdempotencyCache(scope="chat")
+# Shared by AdmissionMiddleware (HTTP requests), the WebSocket handler and /chat/batch (per turn).
+admission = AdmissionController()
+rate_limiter = RateLimiter.from_env()
+
+BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "32"))
+
 
 class ChatRequest(BaseModel):
     message: str
     session_id: str
     user_id: str | None = None
+    idempotency_key: str | None = None
+
+
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest]
+    concurrency: int | None = Field(default=None, ge=1, le=MAX_IN_FLIGHT)
+    stream: bool = False
+
+
+async def _process(req: ChatRequest):
+    """Run a turn; a retry carrying the same idempotency key replays the first answer."""
+    if not req.idempotency_key:
+        return await agent.process_message(req.message, req.session_id, req.user_id)
+    return await idempotency.run((req.session_id, req.idempotency_key), (req.message, req.user_id),
+                                 lambda: agent.process_message(req.message, req.session_id, req.user_id))
 
 
 @router.post("/")
-async def chat_endpoint(req: ChatRequest):
-    response = await agent.process_message(
-        message=req.message,
-        session_id=req.session_id,
-        user_id=req.user_id
-    )
-    return response
+async def chat_endpoint(req: ChatRequest, idempotency_key: str | None = Header(default=None)):
+    if idempotency_key:
+        req.idempotency_key = idempotency_key
+    try:
+        return await _process(req)
+    except IdempotencyConflict as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except StaleContextError as exc:
+        raise HTTPException(status_code=409, detail=_stale(exc)["detail"])
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stale(exc: StaleContextError) -> Dict:
+    return {"status": 409, "reason": "stale_context", "detail": f"{exc}; retry the message"}
+
+
+async def _event_stream(req: ChatRequest):
+    chunks = []
+    try:
+        async for chunk in agent.stream_message(req.message, req.session_id, req.user_id):
+            chunks.append(chunk)
+            yield _sse("delta", {"text": chunk})
+    except StaleContextError as exc:
+        yield _sse("error", _stale(exc))
+        return
+    yield _sse("done", {"response": "".join(chunks)})
+
+
+@router.post("/stream")
+async def chat_stream(req: ChatRequest):
+    """Server-sent events: one ``delta`` per reply chunk, then ``done`` with the full reply.
+
+    A turn whose session was saved meanwhile by another worker ends with an
+    ``error`` event (status 409) instead of ``done``; the deltas already sent are void.
+    """
+    return StreamingResponse(_event_stream(req), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/stream")
+async def chat_stream_get(message: str, session_id: str, user_id: str | None = None):
+    # EventSource can only issue GET requests.
+    return await chat_stream(ChatRequest(message=message, session_id=session_id, user_id=user_id))
+
+
+@router.websocket("/ws")
+async def chat_ws(websocket: WebSocket, session_id: str, user_id: str | None = None):
+    """One connection per session; each text frame is a turn (plain text or ``{"message": ...}``).
+
+    Every turn is answered with ``{"type": "delta", "text": ...}`` frames and
+    a closing ``{"type": "done", "response": ...}`` frame. A turn shed under
+    load gets a single ``{"type": "error", ...}`` frame instead, and one that
+    lost a session save to another worker ends with an error frame of status
+    409; either way the socket stays open for the next turn.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            try:
+                message = json.loads(frame)["message"]
+            except (ValueError, TypeError, KeyError):
+                message = frame
+            try:
+                if rate_limiter is not None:
+                    rate_limiter.check(websocket.client.host if websocket.client else "unknown")
+                async with admission.admit():
+                    chunks = []
+                    async for chunk in agent.stream_message(message, session_id, user_id):
+                        chunks.append(chunk)
+                        await websocket.send_json({"type": "delta", "text": chunk})
+            except Overloaded as exc:
+                await websocket.send_json({"type": "error", "status": exc.status, "reason": exc.reason,
+                                           "retry_after": exc.retry_after})
+                continue
+            except StaleContextError as exc:
+                await websocket.send_json({"type": "error", **_stale(exc)})
+                continue
+            await websocket.send_json({"type": "done", "response": "".join(chunks)})
+    except WebSocketDisconnect:
+        pass
+
+
+def run_batch(requests: List[ChatRequest], concurrency: int = BATCH_CONCURRENCY) -> List[asyncio.Future]:
+    """Schedule every turn and return one future per request, in input order.
+
+    Turns are grouped by session and each session's turns run one after
+    another; different sessions interleave, with at most ``concurrency``
+    turns in flight. Each turn is admitted like a request of its own, so a
+    batch never takes the worker past its in-flight limit. A failing or shed
+    turn resolves to ``{"error": ...}`` and the session carries on with its next turn.
+    """
+    loop = asyncio.get_running_loop()
+    results = [loop.create_future() for _ in requests]
+    sessions: Dict[str, List[int]] = {}
+    for i, req in enumerate(requests):
+        sessions.setdefault(req.session_id, []).append(i)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_session(indices):
+        for i in indices:
+            req = requests[i]
+            async with semaphore:
+                try:
+                    async with admission.admit():
+                        result = await _process(req)
+                except Exception as exc:
+                    result = {"error": str(exc)}
+            results[i].set_result({"index": i, "session_id": req.session_id, **result})
+
+    tasks = [asyncio.create_task(run_session(indices)) for indices in sessions.values()]
+    # Keep the session tasks referenced until the last turn resolves.
+    if results:
+        asyncio.gather(*results).add_done_callback(lambda _: tasks.clear())
+    return results
+
+
+@router.post("/batch")
+async def chat_batch(batch: ChatBatchRequest, request: Request):
+    """Run many turns; the client's rate limit is charged one token per turn up front."""
+    if rate_limiter is not None and batch.requests:
+        if len(batch.requests) > rate_limiter.burst:
+            raise HTTPException(status_code=413, detail=f"A batch may hold at most {rate_limiter.burst:g} turns")
+        try:
+            rate_limiter.check(request.client.host if request.client else "unknown", len(batch.requests))
+        except Overloaded as exc:
+            raise HTTPException(status_code=429, detail="Too many requests",
+                                headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))})
+    results = run_batch(batch.requests, batch.concurrency or BATCH_CONCURRENCY)
+    if not batch.stream:
+        return {"results": list(await asyncio.gather(*results))}
+
+    async def lines():
+        for future in results:
+            yield json.dumps(await future) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,53 @@
+from datetime import date
+from typing import Dict, Literal
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from api.chat import agent
+
+router = APIRouter(prefix="/waitlist", tags=["Waitlist"])
+
+
+class WaitlistRequest(BaseModel):
+    patient: Dict[str, str]
+    appointment_type: str
+    date_from: date
+    date_to: date
+    band: Literal["morning", "afternoon", "evening"] | None = None
+    doctor_id: str | None = None
+    priority: int = Field(default=0, ge=0)
+
+
+@router.post("")
+async def join_waitlist(req: WaitlistRequest):
+    """Wait for a cancellation matching the constraints; it is booked for the patient as soon as it frees up.
+
+    Slots are freed by ``DELETE /bookings/{id}`` and ``POST /bookings/{id}/reschedule``; the
+    waitlist is per worker, so only those handled by this worker count.
+    """
+    duration = agent.appointment_durations.get(req.appointment_type)
+    if duration is None:
+        raise HTTPException(status_code=422, detail=f"Unknown appointment type {req.appointment_type!r}")
+    try:
+        return agent.booking_tool.join_waitlist(req.patient, req.appointment_type, duration, req.date_from,
+                                                req.date_to, band=req.band, doctor_id=req.doctor_id,
+                                                priority=req.priority)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@router.get("/{waitlist_id}")
+async def get_entry(waitlist_id: str):
+    entry = agent.booking_tool.waitlist.get(waitlist_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    return entry
+
+
+@router.delete("/{waitlist_id}")
+async def leave_waitlist(waitlist_id: str):
+    entry = agent.booking_tool.waitlist.remove(waitlist_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    return entry
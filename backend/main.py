@@ -1,10 +1,60 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api.chat import router as chat_router
+from fastapi.responses import JSONResponse, PlainTextResponse
+from api.bookings import router as bookings_router
+from api.waitlist import router as waitlist_router
+from api import chat
+from api.chat import agent, router as chat_router
+from utils import metrics
+from rag.faq_index import DEFAULT_CORPUS
+from tools.availability_tool import DEFAULT_SCHEDULE
+from utils.admission import AdmissionMiddleware
+from utils.file_watcher import FileWatcher
+
+logger = logging.getLogger(__name__)
+
+# background: serve at once, /ready flips after warm-up; block: finish warm-up before serving;
+# off: build each subsystem on first use.
+STARTUP_WARM_UP = os.getenv("STARTUP_WARM_UP", "background")
+# Poll interval for hot-reloading the clinic info and doctor schedule files; 0 disables.
+DATA_RELOAD_INTERVAL = float(os.getenv("DATA_RELOAD_INTERVAL_SECONDS", "5"))
+
+
+async def _warm_up():
+    try:
+        await agent.warm_up()
+    except Exception:
+        logger.exception("Warm-up failed; subsystems will be built on first use")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = None
+    if STARTUP_WARM_UP == "block":
+        await _warm_up()
+    elif STARTUP_WARM_UP == "background":
+        task = asyncio.create_task(_warm_up())
+    watcher = FileWatcher(DATA_RELOAD_INTERVAL)
+    if DATA_RELOAD_INTERVAL > 0:
+        watcher.watch(DEFAULT_CORPUS, agent.reload_faq)
+        watcher.watch(DEFAULT_SCHEDULE, agent.reload_schedule)
+        watcher.start()
+    yield
+    await watcher.stop()
+    if task is not None:
+        await task
+    agent.close()
+
 
 app = FastAPI(
     title="AI Appointment Scheduling Agent",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS
@@ -16,9 +66,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Shed chat load before it reaches the agent: 429 over a client's rate, 503 when the queue is full or too slow.
+# /chat/batch admits each of its turns itself.
+app.add_middleware(AdmissionMiddleware, controller=chat.admission, limiter=chat.rate_limiter, prefixes=("/chat",),
+                   exclude=("/chat/batch",))
+
 # Include chat router
 app.include_router(chat_router)
+app.include_router(bookings_router)
+app.include_router(waitlist_router)
 
 @app.get("/")
 def home():
     return {"message": "Backend running successfully!"}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 503 until the FAQ index, availability engine and booking store are loaded."""
+    loaded = agent.loaded()
+    if STARTUP_WARM_UP == "off" or all(loaded.values()):
+        return {"status": "ready", "subsystems": loaded}
+    return JSONResponse({"status": "starting", "subsystems": loaded}, status_code=503)
+
+
+metrics.REGISTRY.gauge("chat_active_sessions", "Conversation contexts held by this worker",
+                       callback=lambda: len(agent.conversation_contexts))
+
+
+def _cache_hit_ratios():
+    # Scraping must not build a subsystem that has not been loaded yet.
+    loaded = agent.loaded()
+    ratios = {"sessions": agent.conversation_contexts.hit_rate}
+    if loaded["faq_rag"]:
+        ratios["embeddings"] = agent.faq_rag.e.cache.hit_rate
+        ratios["faq_answers"] = agent.faq_rag.answers.exact.hit_rate
+    if loaded["availability_tool"]:
+        ratios["availability"] = agent.availability_tool.cache.stats()["hit_rate"]
+    return ratios
+
+
+metrics.REGISTRY.gauge("cache_hit_ratio", "Hit ratio per in-process cache", ["cache"], callback=_cache_hit_ratios)
+
+metrics.REGISTRY.gauge("waitlist_entries", "Patients waiting for a freed slot",
+                       callback=lambda: len(agent.booking_tool.waitlist) if agent.loaded()["booking_tool"] else 0)
+
+metrics.REGISTRY.gauge("admission_in_flight", "Chat requests admitted and running",
+                       callback=lambda: chat.admission.in_flight)
+metrics.REGISTRY.gauge("admission_queued", "Chat requests waiting for admission",
+                       callback=lambda: chat.admission.queued)
+
+if os.getenv("TRACE_SLOW_TURN_MS"):
+    metrics.set_tracer(metrics.slow_span_logger(float(os.environ["TRACE_SLOW_TURN_MS"]) / 1000))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,87 @@
+import os
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from utils.cache import LRUCache
+
+DEFAULT_SIZE = int(os.getenv("FAQ_ANSWER_CACHE_SIZE", "4096"))
+DEFAULT_SEMANTIC_SIZE = int(os.getenv("FAQ_SEMANTIC_CACHE_SIZE", "256"))
+DEFAULT_TTL = float(os.getenv("FAQ_ANSWER_CACHE_TTL_SECONDS", "3600"))
+DEFAULT_THRESHOLD = float(os.getenv("FAQ_SEMANTIC_THRESHOLD", "0.95"))
+
+
+class AnswerCache:
+    """Two-level cache of FAQ answers.
+
+    Level one is an LRU keyed on normalized query text, so a repeated question
+    skips embedding and retrieval. Level two keeps the embeddings of recent
+    queries in a fixed ring of rows; a new query whose cosine similarity to one
+    of them reaches ``threshold`` reuses that answer without searching the
+    index. Both levels expire entries after ``ttl`` seconds and are emptied by
+    ``clear`` whenever the corpus is rebuilt.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_SIZE, semantic_size: int = DEFAULT_SEMANTIC_SIZE,
+                 ttl: float = DEFAULT_TTL, threshold: float = DEFAULT_THRESHOLD,
+                 clock: Callable[[], float] = time.monotonic):
+        self.exact = LRUCache(maxsize=maxsize, ttl=ttl, sliding=False)
+        self.semantic_size = semantic_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.clock = clock
+        self._vectors: Optional[np.ndarray] = None
+        self._stamps = np.full(semantic_size, -np.inf)
+        self._answers: List[Optional[str]] = [None] * semantic_size
+        self._next = 0
+        self._count = 0
+        self.semantic_hits = 0
+        self.semantic_misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        return self.exact.get(key)
+
+    def get_similar(self, vector: np.ndarray, key: Optional[str] = None) -> Optional[str]:
+        """Answer cached for a near-duplicate of ``vector`` (L2-normalized), if any.
+
+        A hit is also stored under ``key`` so the next identical query stops at level one.
+        """
+        if not self._count or self.threshold > 1:
+            self.semantic_misses += 1
+            return None
+        scores = self._vectors[:self._count] @ vector
+        scores[self._stamps[:self._count] < self.clock() - self.ttl] = -np.inf
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.semantic_misses += 1
+            return None
+        self.semantic_hits += 1
+        answer = self._answers[best]
+        if key is not None:
+            self.exact.set(key, answer)
+        return answer
+
+    def put(self, key: str, vector: np.ndarray, answer: str):
+        self.exact.set(key, answer)
+        if not self.semantic_size:
+            return
+        if self._vectors is None:
+            self._vectors = np.zeros((self.semantic_size, len(vector)), dtype=np.float32)
+        i = self._next
+        self._vectors[i] = vector
+        self._stamps[i] = self.clock()
+        self._answers[i] = answer
+        self._next = (i + 1) % self.semantic_size
+        self._count = max(self._count, self._next or self.semantic_size)
+
+    def clear(self):
+        self.exact.clear()
+        self._stamps[:] = -np.inf
+        self._answers = [None] * self.semantic_size
+        self._next = self._count = 0
+
+    def stats(self):
+        lookups = self.semantic_hits + self.semantic_misses
+        return {**self.exact.stats(), "semantic_hits": self.semantic_hits,
+                "semantic_hit_rate": self.semantic_hits / lookups if lookups else 0.0}
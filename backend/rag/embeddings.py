@@ -1,3 +1,108 @@
+import re
+import time
+import zlib
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from utils.cache import LRUCache
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    "a an and are at be can do does for how i in is it me my of on or should "
+    "the to what when where which who why will with you your".split()
+)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(_TOKEN_RE.findall(text.lower()))
+
+
 class Embeddings:
-    async def create_embedding(self, text: str):
-        return [0.1] * 10  # Dummy vector
+    """Offline hashed n-gram TF-IDF embedder.
+
+    Word unigrams, word bigrams and character trigrams are hashed (crc32, so
+    vectors are stable across processes) into ``dim`` buckets. A batch is
+    assembled as one sparse scatter into a dense matrix, then sublinear TF,
+    IDF weighting and L2 normalization run as matrix ops. Rows are cached in
+    an LRU keyed on normalized text.
+    """
+
+    def __init__(self, dim: int = 512, cache_size: int = 4096):
+        self.dim = dim
+        self.idf: Optional[np.ndarray] = None
+        self.cache = LRUCache(maxsize=cache_size)
+        self.batches = 0
+        self.batch_seconds = 0.0
+        self.last_batch_seconds = 0.0
+
+    def features(self, normalized: str) -> List[int]:
+        words = [w for w in normalized.split() if w not in STOP_WORDS]
+        grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f"<{w}>"
+            grams.extend(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return [zlib.crc32(g.encode()) % self.dim for g in grams]
+
+    def fit(self, corpus: Iterable[str]):
+        counts = self._counts([normalize_text(t) for t in corpus])
+        df = (counts > 0).sum(axis=0)
+        self.idf = (np.log((1.0 + len(counts)) / (1.0 + df)) + 1.0).astype(np.float32)
+        self.cache.clear()
+        return self
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        start = time.perf_counter()
+        keys = [normalize_text(t) for t in texts]
+        out = np.empty((len(keys), self.dim), dtype=np.float32)
+        missing = {}
+        for i, key in enumerate(keys):
+            row = self.cache.get(key)
+            if row is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                out[i] = row
+        if missing:
+            fresh = self._weigh(self._counts(list(missing)))
+            for row, rows_idx in zip(fresh, missing.values()):
+                out[rows_idx] = row
+            for key, row in zip(missing, fresh):
+                self.cache.set(key, row.copy())
+
+        self.last_batch_seconds = time.perf_counter() - start
+        self.batch_seconds += self.last_batch_seconds
+        self.batches += 1
+        return out
+
+    async def create_embeddings(self, texts: List[str]) -> np.ndarray:
+        return self.encode(texts)
+
+    async def create_embedding(self, text: str) -> np.ndarray:
+        return self.encode([text])[0]
+
+    def stats(self):
+        return {
+            **self.cache.stats(),
+            "batches": self.batches,
+            "avg_batch_ms": 1000 * self.batch_seconds / self.batches if self.batches else 0.0,
+            "last_batch_ms": 1000 * self.last_batch_seconds,
+        }
+
+    def _counts(self, normalized: List[str]) -> np.ndarray:
+        rows, cols = [], []
+        for i, text in enumerate(normalized):
+            feats = self.features(text)
+            cols.extend(feats)
+            rows.extend([i] * len(feats))
+        counts = np.zeros((len(normalized), self.dim), dtype=np.float32)
+        np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+        return counts
+
+    def _weigh(self, counts: np.ndarray) -> np.ndarray:
+        weights = np.log1p(counts)
+        if self.idf is not None:
+            weights *= self.idf
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return weights / norms
@@ -0,0 +1,154 @@
+"""Offline FAQ index build step and memory-mapped loader.
+
+Build the artifact (from ``backend/``)::
+
+    python -m rag.faq_index --corpus ../data/clinic_info.json --out ../data/faq_index
+
+The artifact directory holds ``embeddings.npy`` (normalized float32 rows),
+``idf.npy``, ``offsets.npy`` + ``text.bin`` (question/answer strings packed
+into one UTF-8 blob) and ``meta.json``. Every file is opened read-only with
+mmap, so uvicorn workers on one host share the same page-cache pages.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag.embeddings import Embeddings
+
+DATA_DIR = Path(os.getenv("DATA_DIR", Path(__file__).resolve().parents[2] / "data"))
+DEFAULT_CORPUS = DATA_DIR / "clinic_info.json"
+DEFAULT_INDEX_DIR = Path(os.getenv("FAQ_INDEX_PATH", DATA_DIR / "faq_index"))
+
+INDEX_VERSION = 1
+
+
+def load_corpus(path: Path = DEFAULT_CORPUS) -> List[Dict[str, str]]:
+    info = json.loads(Path(path).read_text())
+    entries = []
+    if info.get("hours"):
+        entries.append({"category": "Clinic Details", "question": "clinic hours",
+                        "answer": f"We are open {info['hours']}."})
+    if info.get("location"):
+        entries.append({"category": "Clinic Details", "question": "location",
+                        "answer": f"We are located at {info['location']}."})
+    if info.get("phone"):
+        entries.append({"category": "Clinic Details", "question": "phone number",
+                        "answer": f"You can reach {info.get('name', 'us')} at {info['phone']}."})
+    entries.extend(
+        {"category": f.get("category", "General"), "question": f["question"], "answer": f["answer"]}
+        for f in info.get("faqs", [])
+    )
+    return entries
+
+
+def corpus_hash(path: Path = DEFAULT_CORPUS) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class AnswerTable(Sequence):
+    """Lazily decoded (question, answer, category) rows over the packed text blob."""
+
+    FIELDS = 3
+
+    def __init__(self, offsets: np.ndarray, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return (len(self._offsets) - 1) // self.FIELDS
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if not -len(self) <= idx < len(self):
+            raise IndexError(idx)
+        idx %= len(self)
+        base = idx * self.FIELDS
+        q, a, c = (self._text(base + i) for i in range(self.FIELDS))
+        return {"q": q, "a": a, "category": c}
+
+    def _text(self, i: int) -> str:
+        return bytes(self._blob[int(self._offsets[i]):int(self._offsets[i + 1])]).decode("utf-8")
+
+
+def build_index(
+    entries: List[Dict[str, str]], out_dir: Path = DEFAULT_INDEX_DIR, source_hash: str = "", dim: int = 512
+) -> Path:
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    questions = [e["question"] for e in entries]
+
+    embeddings = Embeddings(dim=dim).fit(questions)
+    matrix = embeddings.encode(questions) if entries else np.zeros((0, dim), dtype=np.float32)
+
+    chunks = [e[k].encode("utf-8") for e in entries for k in ("question", "answer", "category")]
+    offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in chunks], out=offsets[1:])
+
+    meta = {"version": INDEX_VERSION, "dim": dim, "count": len(entries), "corpus_hash": source_hash}
+
+    # Each file is replaced atomically and meta.json goes last, so a worker
+    # that opens the index mid-build sees either the old or the new artifact.
+    _write_atomic(out_dir / "embeddings.npy", lambda f: np.save(f, np.ascontiguousarray(matrix)))
+    _write_atomic(out_dir / "idf.npy", lambda f: np.save(f, embeddings.idf))
+    _write_atomic(out_dir / "offsets.npy", lambda f: np.save(f, offsets))
+    _write_atomic(out_dir / "text.bin", lambda f: f.write(b"".join(chunks)))
+    _write_atomic(out_dir / "meta.json", lambda f: f.write(json.dumps(meta).encode()))
+    return out_dir
+
+
+def load_index(
+    index_dir: Path = DEFAULT_INDEX_DIR, expected_hash: Optional[str] = None
+) -> Optional[Tuple[Dict[str, Any], np.ndarray, np.ndarray, AnswerTable]]:
+    """Open a built artifact, or return None if it is missing or stale."""
+    index_dir = Path(index_dir)
+    try:
+        meta = json.loads((index_dir / "meta.json").read_text())
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != INDEX_VERSION:
+        return None
+    if expected_hash is not None and meta.get("corpus_hash") != expected_hash:
+        return None
+
+    matrix = np.load(index_dir / "embeddings.npy", mmap_mode="r")
+    idf = np.load(index_dir / "idf.npy", mmap_mode="r")
+    offsets = np.load(index_dir / "offsets.npy", mmap_mode="r")
+    blob = _map_file(index_dir / "text.bin")
+    return meta, matrix, idf, AnswerTable(offsets, blob)
+
+
+def _map_file(path: Path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _write_atomic(path: Path, write):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the memory-mapped FAQ index.")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--out", type=Path, default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--dim", type=int, default=512)
+    args = parser.parse_args(argv)
+
+    entries = load_corpus(args.corpus)
+    out = build_index(entries, args.out, corpus_hash(args.corpus), args.dim)
+    print(f"Built FAQ index with {len(entries)} entries at {out}")
+
+
+if __name__ == "__main__":
+    main()
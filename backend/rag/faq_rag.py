@@ -1,15 +1,90 @@
-from rag.embeddings import Embeddings
+import logging
+from pathlib import Path
+from typing import Dict, List
+
+from rag.answer_cache import AnswerCache
+from rag.embeddings import Embeddings, normalize_text
+from rag.faq_index import DEFAULT_CORPUS, DEFAULT_INDEX_DIR, corpus_hash, load_corpus, load_index
 from rag.vector_store import VectorStore
+from utils.metrics import REGISTRY, timed
+
+logger = logging.getLogger(__name__)
+
+ANSWER_SECONDS = REGISTRY.histogram("faq_answer_seconds", "FAQRAG.get_answer latency")
+
+FALLBACK_ANSWER = "I don't have specific information about that. Please contact our office."
 
 class FAQRAG:
 
-    def __init__(self):
-        self.e = Embeddings()
-        self.v = VectorStore()
+    def __init__(self, corpus_path: Path = DEFAULT_CORPUS, index_path: Path = DEFAULT_INDEX_DIR,
+                 min_score: float = 0.3, answers: AnswerCache = None):
+        self.corpus_path = corpus_path
+        self.index_path = index_path
+        self.min_score = min_score
+        self.answers = answers or AnswerCache()
+        self._load()
+
+    def reload(self):
+        """Re-open the index after the corpus or artifact was rebuilt; drops every cached answer."""
+        self._load()
+        self.answers.clear()
+
+    def apply_corpus(self, entries: List[Dict[str, str]]) -> Dict[str, int]:
+        """Hot-reload changed FAQ entries in place, keyed by question text.
+
+        Only added or reworded questions are embedded (with the current IDF);
+        all index edits then run in one step without awaiting, so an in-flight
+        ``get_answer`` sees either the old or the new corpus. The first edit
+        copies a memory-mapped index into private memory.
+        """
+        current = {row["q"]: i for i, row in enumerate(self.v.data) if row is not None}
+        wanted = {e["question"]: e for e in entries}
+        removed = [i for q, i in current.items() if q not in wanted]
+        added = [e for q, e in wanted.items() if q not in current]
+        changed = [(current[q], e) for q, e in wanted.items() if q in current
+                   and (self.v.data[current[q]]["a"], self.v.data[current[q]].get("category"))
+                   != (e["answer"], e["category"])]
+        vectors = self.e.encode([e["question"] for e in added]) if added else []
+
+        for i in removed:
+            self.v.delete(i)
+        for entry, vec in zip(added, vectors):
+            self.v.add(entry["question"], entry["answer"], vec, category=entry["category"])
+        for i, entry in changed:
+            self.v.update(i, answer=entry["answer"], category=entry["category"])
+        if removed or added or changed:
+            self.answers.clear()
+        return {"added": len(added), "removed": len(removed), "changed": len(changed)}
 
-        self.v.add("clinic hours", "We are open 8AM - 6PM.", [])
-        self.v.add("location", "We are located at Main Street Hospital.", [])
-        self.v.add("insurance", "We accept major insurance providers.", [])
+    def _load(self):
+        self.from_artifact = False
+        loaded = load_index(self.index_path, expected_hash=corpus_hash(self.corpus_path))
+        if loaded:
+            meta, matrix, idf, answers = loaded
+            self.e = Embeddings(dim=meta["dim"])
+            self.e.idf = idf
+            self.v = VectorStore.from_matrix(matrix, answers)
+            self.from_artifact = True
+        else:
+            logger.warning("FAQ index at %s is missing or stale; embedding corpus in memory", self.index_path)
+            entries = load_corpus(self.corpus_path)
+            questions = [e["question"] for e in entries]
+            self.e = Embeddings().fit(questions)
+            self.v = VectorStore(dim=self.e.dim)
+            for entry, vec in zip(entries, self.e.encode(questions)):
+                self.v.add(entry["question"], entry["answer"], vec, category=entry["category"])
 
+    @timed(ANSWER_SECONDS.labels())
     async def get_answer(self, query: str):
-        return self.v.search(query)
+        key = normalize_text(query)
+        answer = self.answers.get(key)
+        if answer is not None:
+            return answer
+        vector = await self.e.create_embedding(query)
+        answer = self.answers.get_similar(vector, key)
+        if answer is not None:
+            return answer
+        hits = self.v.search(vector, k=1, min_score=self.min_score)
+        answer = hits[0]["answer"] if hits else FALLBACK_ANSWER
+        self.answers.put(key, vector, answer)
+        return answer
@@ -1,12 +1,144 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
 class VectorStore:
+    """Cosine-similarity index over a contiguous, L2-normalized float32 matrix.
+
+    Rows are normalized once on insert, so a search is a single mat-vec
+    product plus a partial sort. Deleted rows are tombstoned and their slots
+    reused by later inserts, so neither deletes nor updates trigger a rebuild.
+    """
+
+    def __init__(self, dim: Optional[int] = None, capacity: int = 64):
+        self.dim = dim
+        self._capacity = capacity
+        self._matrix: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._free: List[int] = []
+        self.data: List[Optional[Dict[str, Any]]] = []
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray, data: Sequence[Dict[str, Any]]) -> "VectorStore":
+        """Wrap prebuilt, already-normalized rows without copying them.
+
+        ``matrix`` may be a read-only memory map; it is only copied into
+        private memory on the first add/update/delete.
+        """
+        store = cls(dim=matrix.shape[1])
+        store._matrix = matrix
+        store._alive = np.ones(len(matrix), dtype=bool)
+        store._size = len(matrix)
+        store.data = data
+        return store
+
+    def __len__(self):
+        return self._size - len(self._free)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._matrix[: self._size]
+
+    def add(self, question, answer, embedding, **extra) -> int:
+        vec = self._normalize(embedding)
+        self._make_writable()
+        if self._free:
+            idx = self._free.pop()
+        else:
+            self._grow(self._size + 1)
+            idx = self._size
+            self._size += 1
+            self.data.append(None)
+        self._matrix[idx] = vec
+        self._alive[idx] = True
+        self.data[idx] = {"q": question, "a": answer, **extra}
+        return idx
+
+    def update(self, idx: int, question=None, answer=None, embedding=None, **extra):
+        self._check(idx)
+        self._make_writable()
+        if embedding is not None:
+            self._matrix[idx] = self._normalize(embedding)
+        if question is not None:
+            self.data[idx]["q"] = question
+        if answer is not None:
+            self.data[idx]["a"] = answer
+        self.data[idx].update(extra)
+
+    def delete(self, idx: int):
+        self._check(idx)
+        self._make_writable()
+        self._alive[idx] = False
+        self._matrix[idx] = 0.0
+        self.data[idx] = None
+        self._free.append(idx)
+
+    def search(self, query_vec, k: int = 1, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        if not len(self):
+            return []
+        q = self._normalize(query_vec)
+        scores = self.matrix @ q
+        return self._top_k(scores, k, min_score)
+
+    def search_batch(self, query_vecs, k: int = 1, min_score: float = 0.0) -> List[List[Dict[str, Any]]]:
+        queries = np.asarray(query_vecs, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if not len(self):
+            return [[] for _ in range(len(queries))]
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = self.matrix @ (queries / norms).T
+        return [self._top_k(scores[:, i], k, min_score) for i in range(scores.shape[1])]
+
+    def _top_k(self, scores: np.ndarray, k: int, min_score: float):
+        # Only live rows are candidates, whatever ``min_score`` lets through.
+        if k <= 0:
+            return []
+        ids = np.flatnonzero(self._alive[: self._size])
+        scores = scores[ids]
+        if k < len(ids):
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(len(ids))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {"id": int(i), "question": self.data[i]["q"], "answer": self.data[i]["a"], "score": float(score)}
+            for i, score in zip(ids[top].tolist(), scores[top].tolist())
+            if score >= min_score
+        ]
+
+    def _normalize(self, embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        if self.dim is None:
+            self.dim = vec.shape[0]
+        if vec.shape[0] != self.dim:
+            raise ValueError(f"Expected embedding of dim {self.dim}, got {vec.shape[0]}")
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
 
-    def __init__(self):
-        self.data = []
+    def _grow(self, needed: int):
+        if self._matrix is None:
+            self._matrix = np.zeros((max(self._capacity, needed), self.dim), dtype=np.float32)
+            self._alive = np.zeros(len(self._matrix), dtype=bool)
+        elif needed > len(self._matrix):
+            capacity = max(needed, 2 * len(self._matrix))
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            matrix[: self._size] = self._matrix[: self._size]
+            alive = np.zeros(capacity, dtype=bool)
+            alive[: self._size] = self._alive[: self._size]
+            self._matrix, self._alive = matrix, alive
 
-    def add(self, question, answer, embedding):
-        self.data.append({"q": question, "a": answer, "e": embedding})
+    def _make_writable(self):
+        if self._matrix is not None and not self._matrix.flags.writeable:
+            self._matrix = np.array(self._matrix, dtype=np.float32)
+        if not isinstance(self.data, list):
+            self.data = list(self.data)
 
-    def search(self, query):
-        if not self.data:
-            return None
-        return self.data[0]["a"]
+    def _check(self, idx: int):
+        if not (0 <= idx < self._size) or not self._alive[idx]:
+            raise KeyError(idx)
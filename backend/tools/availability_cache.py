@@ -0,0 +1,94 @@
+import asyncio
+import os
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from utils.cache import LRUCache
+
+DEFAULT_TTL = float(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", "30"))
+
+Slots = List[Dict[str, Any]]
+
+
+class AvailabilityCache:
+    """Slot lists keyed by ``(doctor_id, first_day, end_day, duration, limit)``.
+
+    ``end_day`` is exclusive and ``doctor_id`` is None for "any doctor". A
+    reserve/release on one doctor-day drops exactly the entries whose range
+    covers that day for that doctor (or any doctor). Concurrent misses on the
+    same key share one computation. Entries also carry a ``valid_until``
+    time (the first offered start, which drops out once it has passed) and a
+    short TTL as a backstop.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = DEFAULT_TTL,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.entries = LRUCache(maxsize, ttl=ttl, sliding=False)
+        self.clock = clock
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._dirty = set()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    async def get_or_compute(self, key: Tuple,
+                             compute: Callable[[], Awaitable[Tuple[Slots, Optional[datetime]]]]) -> Slots:
+        entry = self.entries.get(key, count=False)
+        if entry is not None and (entry[1] is None or self.clock() < entry[1]):
+            self.hits += 1
+            return self._copy(entry[0])
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return self._copy(await asyncio.shield(future))
+
+        self.misses += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        self._dirty.discard(key)
+        try:
+            slots, valid_until = await compute()
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # waiters re-raise it; don't log it as unretrieved
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        # A booking that landed while we computed may have made the result stale.
+        if key not in self._dirty:
+            self.entries.set(key, [slots, valid_until])
+        self._dirty.discard(key)
+        future.set_result(slots)
+        return self._copy(slots)
+
+    def invalidate(self, doctor_id: str, day: date) -> int:
+        def affected(key):
+            return key[0] in (None, doctor_id) and key[1] <= day < key[2]
+
+        dropped = [key for key in self.entries.keys() if affected(key)]
+        for key in dropped:
+            self.entries.pop(key)
+        self._dirty.update(key for key in self._inflight if affected(key))
+        self.invalidations += len(dropped)
+        return len(dropped)
+
+    def clear(self):
+        self.entries.clear()
+        self._dirty.update(self._inflight)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            **self.entries.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "inflight": len(self._inflight),
+        }
+
+    @staticmethod
+    def _copy(slots: Slots) -> Slots:
+        return [dict(s) for s in slots]
@@ -0,0 +1,368 @@
+import heapq
+import json
+import math
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MINUTES_PER_DAY = 1440
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Used for legacy schedule files that name a doctor but no weekly hours.
+DEFAULT_WEEKLY_HOURS = {
+    **{day: [["08:00", "18:00"]] for day in WEEKDAYS[:5]},
+    "saturday": [["09:00", "14:00"]],
+}
+
+
+def parse_minute(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minute(minute: int) -> str:
+    return f"{minute // 60}:{minute % 60:02d}"
+
+
+def load_schedule(path: Path) -> Dict[str, Any]:
+    schedule = json.loads(Path(path).read_text())
+    if "doctors" not in schedule:
+        schedule = {"doctors": [{
+            "id": schedule.get("id", "default"),
+            "name": schedule.get("doctor", "Doctor"),
+            "specialization": schedule.get("specialization", ""),
+            "weekly_hours": schedule.get("weekly_hours", DEFAULT_WEEKLY_HOURS),
+        }]}
+    return schedule
+
+
+class AvailabilityEngine:
+    """Minute-granularity free/busy grid for every doctor-day in a rolling window.
+
+    ``free[doctor, day, minute]`` is True when the doctor works that minute and
+    nothing is booked over it; it is always ``working & ~booked``, so changing
+    working hours never forgets a reservation. Fit queries run as one cumulative-sum pass over
+    the requested sub-grid; reserve/release touch only the slot's minutes.
+    """
+
+    def __init__(self, doctors: List[Dict[str, Any]], horizon_days: int = 30, granularity: int = 15,
+                 start_date: Optional[date] = None, today: Callable[[], date] = date.today):
+        self.doctors = list(doctors)
+        self.index = {d["id"]: i for i, d in enumerate(self.doctors)}
+        self.horizon_days = horizon_days
+        self.granularity = granularity
+        self.today = today
+        self.base = start_date or today()
+        self.weekly = np.stack([self._weekly_mask(d.get("weekly_hours", {})) for d in self.doctors]) \
+            if self.doctors else np.zeros((0, 7, MINUTES_PER_DAY), dtype=bool)
+        self.working = self._working_for(self.base, horizon_days)
+        self.booked = np.zeros_like(self.working)
+        self.free = self.working.copy()
+        self.blocks = self._fold(self.free, granularity)
+        # (row, day offset) -> (n, 2) array of maximal free [start, end) runs, filled lazily.
+        self._runs: Dict[Tuple[int, int], np.ndarray] = {}
+
+    @classmethod
+    def from_file(cls, path: Path, **kwargs) -> "AvailabilityEngine":
+        schedule = load_schedule(path)
+        kwargs.setdefault("horizon_days", schedule.get("horizon_days", 30))
+        kwargs.setdefault("granularity", schedule.get("slot_granularity_minutes", 15))
+        return cls(schedule["doctors"], **kwargs)
+
+    def find_starts(self, duration: int, start_date: Optional[date] = None, days: Optional[int] = None,
+                    doctor_ids: Optional[Iterable[str]] = None,
+                    not_before: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (doctor_row, day_offset, start_minute) arrays of every fitting start.
+
+        Results are ordered by day, then start time, then doctor.
+        """
+        self.roll()
+        offset = (start_date - self.base).days if start_date else 0
+        first = max(0, offset)
+        last = self.horizon_days if days is None else min(self.horizon_days, offset + days)
+        rows = np.arange(len(self.doctors)) if doctor_ids is None else \
+            np.array([self.index[d] for d in doctor_ids if d in self.index], dtype=np.intp)
+        empty = np.zeros(0, dtype=np.intp)
+        if first >= last or not len(rows) or duration > MINUTES_PER_DAY:
+            return empty, empty, empty
+
+        # Minutes are folded into blocks of gcd(granularity, duration): every
+        # candidate start and end falls on a block edge, so a slot fits when
+        # ``duration // block`` consecutive blocks are entirely free. The
+        # common case (block == granularity) reads the maintained block grid.
+        block = math.gcd(self.granularity, duration)
+        source = self.blocks if block == self.granularity else self.free
+        blocks = source[:, first:last] if doctor_ids is None else source[rows, first:last]
+        if block != self.granularity:
+            blocks = self._fold(blocks, block)
+        span, step = duration // block, self.granularity // block
+        csum = np.zeros(blocks.shape[:2] + (blocks.shape[2] + 1,), dtype=np.int16)
+        np.cumsum(blocks, axis=-1, out=csum[..., 1:])
+        first_blocks = np.arange(0, blocks.shape[2] - span + 1, step)
+        fits = (csum[..., first_blocks + span] - csum[..., first_blocks]) == span
+        starts = first_blocks * block
+
+        if not_before is not None:
+            cutoff_day = (not_before.date() - self.base).days - first
+            cutoff_minute = not_before.hour * 60 + not_before.minute
+            if 0 <= cutoff_day < fits.shape[1]:
+                fits[:, :cutoff_day] = False
+                fits[:, cutoff_day, starts < cutoff_minute] = False
+            elif cutoff_day >= fits.shape[1]:
+                fits[:] = False
+
+        day_idx, start_idx, row_idx = np.nonzero(fits.transpose(1, 2, 0))
+        return rows[row_idx], day_idx + first, starts[start_idx]
+
+    def best_starts(self, duration: int, k: int, start_date: Optional[date] = None, days: Optional[int] = None,
+                    doctor_ids: Optional[Iterable[str]] = None, band: Optional[Tuple[int, int]] = None,
+                    target_day: Optional[date] = None, target_minute: Optional[int] = None,
+                    day_weight: int = 240, not_before: Optional[datetime] = None) -> List[Tuple[int, int, int, int]]:
+        """Return up to k (cost, doctor_row, day_offset, start_minute), cheapest first.
+
+        cost = ``day_weight`` minutes per day away from ``target_day`` (default:
+        the first day) plus minutes away from ``target_minute`` (default: the
+        start of ``band``, i.e. earliest). ``band`` limits start times to
+        ``[lo, hi)``. Ties go to the earlier day, then start, then doctor.
+
+        Every free run's best start is scored in one vectorized pass; only
+        the k cheapest seed a heap, which then walks outwards along the grid,
+        so no per-candidate list is ever built.
+        """
+        self.roll()
+        offset = (start_date - self.base).days if start_date else 0
+        first = max(0, offset)
+        last = self.horizon_days if days is None else min(self.horizon_days, offset + days)
+        rows = list(range(len(self.doctors))) if doctor_ids is None else \
+            [self.index[d] for d in doctor_ids if d in self.index]
+        if not_before is not None:
+            first = max(first, (not_before.date() - self.base).days)
+        if first >= last or not rows or k <= 0 or duration > MINUTES_PER_DAY:
+            return []
+
+        g = self.granularity
+        band_lo, band_hi = band or (0, MINUTES_PER_DAY)
+        target_offset = (target_day - self.base).days if target_day else first
+        target = band_lo if target_minute is None else target_minute
+
+        run_row, run_day, run_start, run_end = self._runs_for(rows, first, last)
+        floor = np.full(len(run_start), band_lo)
+        if not_before is not None:
+            today = run_day == (not_before.date() - self.base).days
+            floor[today] = np.maximum(band_lo, not_before.hour * 60 + not_before.minute)
+        lo = -(-np.maximum(run_start, floor) // g) * g
+        hi = np.minimum(run_end - duration, band_hi - 1) // g * g
+        ok = lo <= hi
+        run_row, run_day, lo, hi = run_row[ok], run_day[ok], lo[ok], hi[ok]
+        best = np.clip((target + g // 2) // g * g, lo, hi)
+        cost = day_weight * np.abs(run_day - target_offset) + np.abs(best - target)
+
+        # A run's starts never cost less than its best one, so runs outside
+        # the k cheapest seeds cannot place in the top k.
+        seeds = np.lexsort((run_row, best, run_day, cost))[:k]
+        heap = [(c, d, b, r, 0, l, h) for c, d, b, r, l, h in zip(
+            cost[seeds].tolist(), run_day[seeds].tolist(), best[seeds].tolist(), run_row[seeds].tolist(),
+            lo[seeds].tolist(), hi[seeds].tolist())]
+        heapq.heapify(heap)
+
+        found = []
+        while heap and len(found) < k:
+            cost_, day, start, row, direction, lo_, hi_ = heapq.heappop(heap)
+            found.append((cost_, row, day, start))
+            day_cost = cost_ - abs(start - target)
+            for step in ((-g, g) if direction == 0 else (direction,)):
+                nxt = start + step
+                if lo_ <= nxt <= hi_:
+                    heapq.heappush(heap, (day_cost + abs(nxt - target), day, nxt, row, step, lo_, hi_))
+        return found
+
+    def is_free(self, doctor_id: str, day: date, start: int, duration: int) -> bool:
+        loc = self._locate(doctor_id, day, start, duration)
+        return loc is not None and bool(self.free[loc].all())
+
+    def free_many(self, doctor_ids: List[str], days: List[date], starts, durations) -> np.ndarray:
+        """Vectorized ``is_free`` for many slots: one gather and one cumulative sum."""
+        self.roll()
+        rows = np.array([self.index.get(d, -1) for d in doctor_ids], dtype=np.intp)
+        offsets = np.array([(d - self.base).days for d in days], dtype=np.intp)
+        starts = np.asarray(starts, dtype=np.intp)
+        ends = starts + np.asarray(durations, dtype=np.intp)
+        result = np.zeros(len(rows), dtype=bool)
+        valid = np.nonzero((rows >= 0) & (offsets >= 0) & (offsets < self.horizon_days)
+                           & (starts >= 0) & (ends > starts) & (ends <= MINUTES_PER_DAY))[0]
+        if len(valid):
+            csum = np.zeros((len(valid), MINUTES_PER_DAY + 1), dtype=np.int16)
+            np.cumsum(self.free[rows[valid], offsets[valid]], axis=1, out=csum[:, 1:])
+            at = np.arange(len(valid))
+            lo, hi = starts[valid], ends[valid]
+            result[valid] = csum[at, hi] - csum[at, lo] == hi - lo
+        return result
+
+    def reserve(self, doctor_id: str, day: date, start: int, duration: int) -> bool:
+        loc = self._locate(doctor_id, day, start, duration)
+        if loc is None or not self.free[loc].all():
+            return False
+        self.booked[loc] = True
+        self.free[loc] = False
+        self._refresh_blocks(loc)
+        return True
+
+    def release(self, doctor_id: str, day: date, start: int, duration: int):
+        loc = self._locate(doctor_id, day, start, duration)
+        if loc is not None:
+            self.booked[loc] = False
+            self.free[loc] = self.working[loc]
+            self._refresh_blocks(loc)
+
+    def set_booked(self, doctor_id: str, day: date, intervals: Iterable[Tuple[int, int]]) -> bool:
+        """Replace one doctor-day's reservations with ``intervals`` of [start, end) minutes."""
+        loc = self._locate(doctor_id, day, 0, MINUTES_PER_DAY)
+        if loc is None:
+            return False
+        row, offset, _ = loc
+        self.booked[row, offset] = False
+        for start, end in intervals:
+            self.booked[row, offset, max(start, 0):min(end, MINUTES_PER_DAY)] = True
+        self.free[row, offset] = self.working[row, offset] & ~self.booked[row, offset]
+        self._refresh_blocks(loc)
+        return True
+
+    def update_doctors(self, doctors: List[Dict[str, Any]]) -> Optional[List[Tuple[str, date]]]:
+        """Switch to a changed doctor list, keeping every reservation.
+
+        When the roster is the same, only doctor-days whose weekday hours
+        changed are recomputed, and those (doctor_id, day) pairs are returned.
+        Adding, removing or reordering doctors rebuilds the grids side by side
+        and swaps them in together; that returns None (everything changed).
+        Either way the update runs without awaiting, so no query on the event
+        loop sees a partial state.
+        """
+        self.roll()
+        doctors = list(doctors)
+        masks = [self._weekly_mask(d.get("weekly_hours", {})) for d in doctors]
+        weekdays = np.array([(self.base + timedelta(days=i)).weekday() for i in range(self.horizon_days)])
+        if [d["id"] for d in doctors] != [d["id"] for d in self.doctors]:
+            self._rebuild(doctors, masks, weekdays)
+            return None
+
+        touched = []
+        for row, (doctor, mask) in enumerate(zip(doctors, masks)):
+            changed = np.nonzero((mask != self.weekly[row]).any(axis=1))[0]
+            self.weekly[row] = mask
+            days = np.nonzero(np.isin(weekdays, changed))[0]
+            if not len(days):
+                continue
+            self.working[row, days] = mask[weekdays[days]]
+            self.free[row, days] = self.working[row, days] & ~self.booked[row, days]
+            self.blocks[row, days] = self._fold(self.free[row, days], self.granularity)
+            for day in days.tolist():
+                self._runs.pop((row, day), None)
+                touched.append((doctor["id"], self.day_of(day)))
+        self.doctors = doctors
+        return touched
+
+    def _rebuild(self, doctors, masks, weekdays):
+        weekly = np.stack(masks) if masks else np.zeros((0, 7, MINUTES_PER_DAY), dtype=bool)
+        working = weekly[:, weekdays, :]
+        booked = np.zeros_like(working)
+        for row, doctor in enumerate(doctors):
+            old = self.index.get(doctor["id"])
+            if old is not None:
+                booked[row] = self.booked[old]
+        self.doctors, self.index = doctors, {d["id"]: i for i, d in enumerate(doctors)}
+        self.weekly, self.working, self.booked, self.free = weekly, working, booked, working & ~booked
+        self.blocks = self._fold(self.free, self.granularity)
+        self._runs = {}
+
+    def extend_to(self, day: date) -> Optional[date]:
+        """Grow the window so it covers ``day``; returns the first newly covered day, or None.
+
+        New days start with their working hours and no reservations; the
+        window keeps its new length as it rolls.
+        """
+        self.roll()
+        extra = (day - self.base).days + 1 - self.horizon_days
+        if extra <= 0:
+            return None
+        first = self.day_of(self.horizon_days)
+        fresh = self._working_for(first, extra)
+        self.working = np.concatenate([self.working, fresh], axis=1)
+        self.booked = np.concatenate([self.booked, np.zeros_like(fresh)], axis=1)
+        self.free = np.concatenate([self.free, fresh], axis=1)
+        self.blocks = np.concatenate([self.blocks, self._fold(fresh, self.granularity)], axis=1)
+        self.horizon_days += extra
+        return first
+
+    def day_of(self, offset: int) -> date:
+        return self.base + timedelta(days=int(offset))
+
+    def roll(self, today: Optional[date] = None):
+        today = today or self.today()
+        shift = (today - self.base).days
+        if shift <= 0:
+            return
+        if shift >= self.horizon_days:
+            self.working = self._working_for(today, self.horizon_days)
+            self.booked = np.zeros_like(self.working)
+            self.free = self.working.copy()
+        else:
+            fresh = self._working_for(self.base + timedelta(days=self.horizon_days), shift)
+            self.working = np.concatenate([self.working[:, shift:], fresh], axis=1)
+            self.booked = np.concatenate([self.booked[:, shift:], np.zeros_like(fresh)], axis=1)
+            self.free = np.concatenate([self.free[:, shift:], fresh], axis=1)
+        self.blocks = self._fold(self.free, self.granularity)
+        self._runs.clear()
+        self.base = today
+
+    def _locate(self, doctor_id: str, day: date, start: int, duration: int):
+        self.roll()
+        row = self.index.get(doctor_id)
+        offset = (day - self.base).days
+        if row is None or not 0 <= offset < self.horizon_days or start < 0 or start + duration > MINUTES_PER_DAY:
+            return None
+        return row, offset, slice(start, start + duration)
+
+    def _refresh_blocks(self, loc):
+        row, offset, minutes = loc
+        g = self.granularity
+        lo, hi = minutes.start // g, -(-minutes.stop // g)
+        self.blocks[row, offset, lo:hi] = self._fold(self.free[row, offset, lo * g:hi * g], g)
+        self._runs.pop((row, offset), None)
+
+    def _runs_for(self, rows: List[int], first: int, last: int):
+        """Flat (row, day, start, end) arrays of the maximal free runs in the window."""
+        keys = [(row, day) for row in rows for day in range(first, last)]
+        missing = [key for key in keys if key not in self._runs]
+        if missing:
+            miss_rows, miss_days = (list(x) for x in zip(*missing))
+            padded = np.zeros((len(missing), MINUTES_PER_DAY + 2), dtype=np.int8)
+            padded[:, 1:-1] = self.free[miss_rows, miss_days]
+            edges = np.diff(padded)
+            which, starts = np.nonzero(edges == 1)
+            ends = np.nonzero(edges == -1)[1]
+            split = np.searchsorted(which, np.arange(1, len(missing)))
+            for key, run_starts, run_ends in zip(missing, np.split(starts, split), np.split(ends, split)):
+                self._runs[key] = np.stack([run_starts, run_ends], axis=1)
+        runs = [self._runs[key] for key in keys]
+        counts = [len(r) for r in runs]
+        flat = np.concatenate(runs) if runs else np.zeros((0, 2), dtype=np.intp)
+        key_rows, key_days = zip(*keys)
+        return (np.repeat(key_rows, counts), np.repeat(key_days, counts), flat[:, 0], flat[:, 1])
+
+    @staticmethod
+    def _fold(grid: np.ndarray, block: int) -> np.ndarray:
+        return grid.reshape(grid.shape[:-1] + (grid.shape[-1] // block, block)).all(axis=-1)
+
+    def _working_for(self, first_day: date, days: int) -> np.ndarray:
+        weekdays = [(first_day + timedelta(days=i)).weekday() for i in range(days)]
+        return self.weekly[:, weekdays, :]
+
+    @staticmethod
+    def _weekly_mask(weekly_hours: Dict[str, List[List[str]]]) -> np.ndarray:
+        mask = np.zeros((7, MINUTES_PER_DAY), dtype=bool)
+        for day, ranges in weekly_hours.items():
+            for start, end in ranges:
+                mask[WEEKDAYS.index(day.lower()), parse_minute(start):parse_minute(end)] = True
+        return mask
@@ -1,17 +1,194 @@
-from datetime import datetime, timedelta
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from tools.availability_cache import AvailabilityCache
+from tools.availability_engine import AvailabilityEngine, format_minute, parse_minute
+from utils.metrics import REGISTRY, timed
+
+DATA_DIR = Path(os.getenv("DATA_DIR", Path(__file__).resolve().parents[2] / "data"))
+DEFAULT_SCHEDULE = DATA_DIR / "doctor_schedule.json"
+
+# Start-time bands, [lo, hi) minutes after midnight.
+TIME_BANDS = {"morning": (0, 12 * 60), "afternoon": (12 * 60, 17 * 60), "evening": (17 * 60, 24 * 60)}
+
+# How far ahead a series may grow the window; see ``AvailabilityTool.extend_to``.
+MAX_HORIZON_DAYS = int(os.getenv("AVAILABILITY_MAX_HORIZON_DAYS", "366"))
+
+QUERY_SECONDS = REGISTRY.histogram("availability_query_seconds", "AvailabilityTool.get_available_slots latency")
+
+
+def slot_id(doctor_id: str, day: date, start: int) -> str:
+    return f"{doctor_id}_{day:%Y%m%d}_{start // 60:02d}{start % 60:02d}"
+
+
+def parse_slot_id(value: str):
+    """Inverse of ``slot_id``: (doctor_id, date, start_minute)."""
+    doctor_id, day, hhmm = value.rsplit("_", 2)
+    return doctor_id, datetime.strptime(day, "%Y%m%d").date(), int(hhmm[:2]) * 60 + int(hhmm[2:])
+
+
+def slot_key(slot: Dict[str, Any]):
+    """(doctor_id, date, start_minute, duration) for a slot dict produced by this tool."""
+    return (
+        slot.get("doctor_id", "default"),
+        date.fromisoformat(slot["date"]),
+        parse_minute(slot["time"]),
+        int(slot.get("duration", 30)),
+    )
+
+
+def series_slots(doctor_id: str, first_day: date, time: str, duration: int, occurrences: int,
+                 every_days: int = 7, appointment_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Slot dicts for a recurring appointment, e.g. every Tuesday 9:00 for 8 weeks."""
+    start = parse_minute(time)
+    days = [first_day + timedelta(days=i * every_days) for i in range(occurrences)]
+    return [{"id": slot_id(doctor_id, day, start), "doctor_id": doctor_id, "date": day.isoformat(),
+             "time": format_minute(start), "duration": duration, "appointment_type": appointment_type}
+            for day in days]
+
 
 class AvailabilityTool:
 
-    async def get_available_slots(self, days_ahead=5):
-        slots = []
-        now = datetime.now()
-        for i in range(days_ahead):
-            d = now + timedelta(days=i)
-            for hour in [9, 11, 14, 16]:
-                slots.append({
-                    "id": f"slot_{i}_{hour}",
-                    "date": d.strftime("%Y-%m-%d"),
-                    "time": f"{hour}:00",
-                    "duration": 30
-                })
-        return slots
+    def __init__(self, schedule_path: Path = DEFAULT_SCHEDULE, engine: Optional[AvailabilityEngine] = None,
+                 cache: Optional[AvailabilityCache] = None, clock: Callable[[], datetime] = datetime.now):
+        self.engine = engine or AvailabilityEngine.from_file(schedule_path)
+        self.clock = clock
+        self.cache = cache or AvailabilityCache(clock=clock)
+
+    @timed(QUERY_SECONDS.labels())
+    async def get_available_slots(self, days_ahead=5, duration=30, doctor_id=None, limit=None,
+                                  start_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        start_date = start_date or self.clock().date()
+        key = (doctor_id, start_date, start_date + timedelta(days=days_ahead), duration, limit)
+        return await self.cache.get_or_compute(
+            key, lambda: self._compute(days_ahead, duration, doctor_id, limit, start_date))
+
+    @timed(QUERY_SECONDS.labels())
+    async def find_best_slots(self, k=5, duration=30, days_ahead=30, start_date: Optional[date] = None,
+                              doctor_id=None, specialization=None, band: Optional[str] = None,
+                              preferred_date: Optional[date] = None, preferred_time: Optional[int] = None,
+                              ) -> List[Dict[str, Any]]:
+        """Best k slots ranked by distance from the preferred date/time (earliest when none).
+
+        ``band`` is one of TIME_BANDS; ``preferred_time`` is minutes after midnight.
+        """
+        start_date = start_date or self.clock().date()
+        doctor_ids = [doctor_id] if doctor_id else self._doctors_with(specialization)
+        key = (doctor_id, start_date, start_date + timedelta(days=days_ahead), duration, k,
+               specialization, band, preferred_date, preferred_time)
+
+        async def compute():
+            found = self.engine.best_starts(
+                duration, k, start_date=start_date, days=days_ahead, doctor_ids=doctor_ids,
+                band=TIME_BANDS[band] if band else None, target_day=preferred_date,
+                target_minute=preferred_time, not_before=self.clock())
+            return self._slots_with_expiry([(r, d, s) for _, r, d, s in found], duration)
+
+        return await self.cache.get_or_compute(key, compute)
+
+    def _doctors_with(self, specialization):
+        if not specialization:
+            return None
+        wanted = specialization.lower()
+        return [d["id"] for d in self.engine.doctors if wanted in d.get("specialization", "").lower()]
+
+    async def _compute(self, days_ahead, duration, doctor_id, limit, start_date):
+        rows, days, starts = self.engine.find_starts(
+            duration,
+            start_date=start_date,
+            days=days_ahead,
+            doctor_ids=[doctor_id] if doctor_id else None,
+            not_before=self.clock(),
+        )
+        if limit is not None:
+            rows, days, starts = rows[:limit], days[:limit], starts[:limit]
+        return self._slots_with_expiry(zip(rows.tolist(), days.tolist(), starts.tolist()), duration)
+
+    def _slots_with_expiry(self, found, duration):
+        found = list(found)
+        slots = [self._slot(r, d, s, duration) for r, d, s in found]
+        # The list goes stale once its earliest start is in the past.
+        valid_until = None
+        if found:
+            _, day, start = min(found, key=lambda f: (f[1], f[2]))
+            valid_until = datetime.combine(self.engine.day_of(day), datetime.min.time()) \
+                + timedelta(minutes=start + 1)
+        return slots, valid_until
+
+    def apply_schedule(self, schedule: Dict[str, Any]):
+        """Hot-reload doctors from a parsed schedule; only changed doctor-days leave the cache."""
+        old = [{k: v for k, v in d.items() if k != "weekly_hours"} for d in self.engine.doctors]
+        touched = self.engine.update_doctors(schedule["doctors"])
+        # Cached slots carry doctor names, so any roster or name change drops them all.
+        if touched is None or old != [{k: v for k, v in d.items() if k != "weekly_hours"}
+                                      for d in self.engine.doctors]:
+            self.cache.clear()
+        else:
+            for doctor_id, day in touched:
+                self.cache.invalidate(doctor_id, day)
+        return touched
+
+    def extend_to(self, day: date) -> Optional[date]:
+        """Grow the window to cover ``day``, e.g. for a long series; returns the first new day, or None.
+
+        Raises ValueError for a day ``MAX_HORIZON_DAYS`` or more ahead.
+        """
+        self.engine.roll()
+        if (day - self.engine.base).days >= MAX_HORIZON_DAYS:
+            raise ValueError(f"{day.isoformat()} is more than {MAX_HORIZON_DAYS} days ahead")
+        first = self.engine.extend_to(day)
+        if first is not None:
+            # Cached ranges reaching past the old window were cut short there.
+            self.cache.clear()
+        return first
+
+    def is_free(self, slot: Dict[str, Any]) -> bool:
+        return self.engine.is_free(*slot_key(slot))
+
+    def are_free(self, slots: List[Dict[str, Any]]) -> List[bool]:
+        if not slots:
+            return []
+        doctor_ids, days, starts, durations = zip(*(slot_key(slot) for slot in slots))
+        return self.engine.free_many(list(doctor_ids), list(days), starts, durations).tolist()
+
+    def nearest_slot(self, slot: Dict[str, Any], search_days: int = 3) -> Optional[Dict[str, Any]]:
+        """Free slot for the same doctor and duration closest to ``slot``, within ``search_days`` either side."""
+        doctor_id, day, start, duration = slot_key(slot)
+        found = self.engine.best_starts(
+            duration, 1, start_date=day - timedelta(days=search_days), days=2 * search_days + 1,
+            doctor_ids=[doctor_id], target_day=day, target_minute=start, not_before=self.clock())
+        if not found:
+            return None
+        _, row, offset, minute = found[0]
+        return {**self._slot(row, offset, minute, duration), "appointment_type": slot.get("appointment_type")}
+
+    def reserve(self, slot: Dict[str, Any]) -> bool:
+        doctor_id, day, start, duration = slot_key(slot)
+        if not self.engine.reserve(doctor_id, day, start, duration):
+            return False
+        self.cache.invalidate(doctor_id, day)
+        return True
+
+    def release(self, slot: Dict[str, Any]):
+        doctor_id, day, start, duration = slot_key(slot)
+        self.engine.release(doctor_id, day, start, duration)
+        self.cache.invalidate(doctor_id, day)
+
+    def sync_day(self, doctor_id: str, day: date, bookings: List[Dict[str, Any]]):
+        """Make one doctor-day match ``bookings`` (its confirmed store records), e.g. after another worker wrote it."""
+        if self.engine.set_booked(doctor_id, day, [(b["start"], b["end"]) for b in bookings]):
+            self.cache.invalidate(doctor_id, day)
+
+    def _slot(self, row: int, offset: int, start: int, duration: int) -> Dict[str, Any]:
+        doctor = self.engine.doctors[row]
+        day = self.engine.day_of(offset)
+        return {
+            "id": slot_id(doctor["id"], day, start),
+            "date": day.isoformat(),
+            "time": format_minute(start),
+            "duration": duration,
+            "doctor_id": doctor["id"],
+            "doctor": doctor.get("name", doctor["id"]),
+        }
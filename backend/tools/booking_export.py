@@ -0,0 +1,110 @@
+"""Streaming export of bookings for reporting.
+
+Rows are read in keyset pages by booking id, so memory stays flat however
+many bookings match, and each page is a separate awaited store call, so the
+event loop is never held for a whole export. Run from ``backend/``::
+
+    python -m tools.booking_export --database sqlite:///bookings.db --format csv --from 2024-01-01 > out.csv
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+from typing import Any, AsyncIterator, Dict, Optional
+
+from tools.booking_store import open_booking_store
+
+PAGE_SIZE = 500
+
+CSV_COLUMNS = ["booking_id", "doctor_id", "date", "start", "end", "appointment_type", "status", "created_at",
+               "patient_name", "patient_email", "patient_phone"]
+
+
+async def iter_bookings(store, after: int = 0, page_size: int = PAGE_SIZE, **filters) -> AsyncIterator[Dict[str, Any]]:
+    """Matching bookings numbered after ``after``, in id order.
+
+    Filters are ``date_from``/``date_to`` (inclusive ISO dates), ``doctor_id``,
+    ``appointment_type`` and ``status``; None values are ignored. The last
+    ``booking_id`` seen is a valid ``after`` to resume an interrupted export.
+    """
+    filters = {k: v for k, v in filters.items() if v is not None}
+    cursor: Optional[int] = after
+    while cursor is not None:
+        records, cursor = await store.page(cursor, page_size, **filters)
+        for record in records:
+            yield record
+
+
+def _time(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def _row(record: Dict[str, Any]) -> Dict[str, Any]:
+    patient = record.get("patient") or {}
+    return {
+        "booking_id": record["booking_id"],
+        "doctor_id": record["doctor_id"],
+        "date": record["date"],
+        "start": _time(record["start"]),
+        "end": _time(record["end"]),
+        "appointment_type": record.get("appointment_type") or "",
+        "status": record["status"],
+        "created_at": record.get("created_at") or "",
+        "patient_name": patient.get("name", ""),
+        "patient_email": patient.get("email", ""),
+        "patient_phone": patient.get("phone", ""),
+    }
+
+
+async def ndjson_lines(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    async for record in records:
+        yield json.dumps(_row(record), separators=(",", ":")) + "\n"
+
+
+async def csv_lines(records: AsyncIterator[Dict[str, Any]], header: bool = True) -> AsyncIterator[str]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, CSV_COLUMNS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    async for record in records:
+        writer.writerow(_row(record))
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+FORMATS = {"ndjson": (ndjson_lines, "application/x-ndjson"), "csv": (csv_lines, "text/csv")}
+
+
+async def _export(args, out):
+    store = open_booking_store(args.database)
+    try:
+        records = iter_bookings(store, args.cursor, date_from=args.date_from, date_to=args.date_to,
+                                doctor_id=args.doctor, appointment_type=args.type, status=args.status)
+        async for line in FORMATS[args.format][0](records):
+            out.write(line)
+    finally:
+        store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export bookings as NDJSON or CSV.")
+    parser.add_argument("--database", default=None, help="sqlite:///path; defaults to DATABASE_URL")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--from", dest="date_from")
+    parser.add_argument("--to", dest="date_to")
+    parser.add_argument("--doctor")
+    parser.add_argument("--type")
+    parser.add_argument("--status")
+    parser.add_argument("--cursor", type=int, default=0, help="resume after this booking number")
+    parser.add_argument("--out", type=argparse.FileType("w"), default=sys.stdout)
+    args = parser.parse_args(argv)
+    asyncio.run(_export(args, args.out))
+
+
+if __name__ == "__main__":
+    main()
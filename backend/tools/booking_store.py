@@ -0,0 +1,365 @@
+import json
+import os
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from tools.availability_tool import slot_key
+from utils.sqlite_pool import SQLitePool
+
+
+def make_record(patient: Dict[str, Any], slot: Dict[str, Any]) -> Dict[str, Any]:
+    doctor_id, day, start, duration = slot_key(slot)
+    return {
+        "booking_id": None,
+        "doctor_id": doctor_id,
+        "date": day.isoformat(),
+        "start": start,
+        "end": start + duration,
+        "appointment_type": slot.get("appointment_type"),
+        "patient": patient,
+        "slot": slot,
+        "status": "confirmed",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def booking_number(booking_id: str) -> int:
+    """Numeric part of a ``BOOK{n}`` id; ids grow monotonically, so it doubles as a cursor."""
+    try:
+        return int(str(booking_id).removeprefix("BOOK"))
+    except ValueError:
+        return -1
+
+
+def _matches(record: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    return (record["date"] >= filters.get("date_from", "")
+            and record["date"] <= filters.get("date_to", "9999")
+            and all(record[k] == filters[k] for k in ("doctor_id", "appointment_type", "status") if k in filters))
+
+
+def _overlaps(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return a["doctor_id"] == b["doctor_id"] and a["date"] == b["date"] \
+        and a["start"] < b["end"] and b["start"] < a["end"]
+
+
+def _batch_overlaps(records: List[Dict[str, Any]]) -> List[int]:
+    """Indices of records that overlap an earlier record of the same batch."""
+    by_day: Dict[tuple, List[Dict[str, Any]]] = {}
+    clashes = []
+    for i, record in enumerate(records):
+        earlier = by_day.setdefault((record["doctor_id"], record["date"]), [])
+        if any(_overlaps(record, other) for other in earlier):
+            clashes.append(i)
+        earlier.append(record)
+    return clashes
+
+
+class MemoryBookingStore:
+    """Process-local store used when no database is configured."""
+
+    def __init__(self):
+        self.bookings: Dict[str, Dict[str, Any]] = {}
+        self._last_id = 0
+        self._by_day: Dict[tuple, Dict[str, Dict[str, Any]]] = {}
+
+    async def book(self, record: Dict[str, Any]) -> Optional[str]:
+        if self._conflict(record):
+            return None
+        self._last_id += 1
+        record = {**record, "booking_id": f"BOOK{self._last_id}"}
+        self._insert(record)
+        return record["booking_id"]
+
+    async def book_many(self, records: List[Dict[str, Any]]) -> Tuple[Optional[List[str]], List[int]]:
+        """Book every record or none: (booking ids, []) or (None, indices that conflict)."""
+        clashes = sorted(set(_batch_overlaps(records)) | {i for i, r in enumerate(records) if self._conflict(r)})
+        if clashes:
+            return None, clashes
+        ids = []
+        for record in records:
+            self._last_id += 1
+            ids.append(f"BOOK{self._last_id}")
+            self._insert({**record, "booking_id": ids[-1]})
+        return ids, []
+
+    async def cancel(self, booking_id: str) -> Optional[Dict[str, Any]]:
+        record = self.bookings.get(booking_id)
+        if record is None or record["status"] != "confirmed":
+            return None
+        self._remove(record)
+        record["status"] = "cancelled"
+        return record
+
+    async def reschedule(self, booking_id: str, new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        old = self.bookings.get(booking_id)
+        if old is None or old["status"] != "confirmed" or self._conflict(new, ignore=booking_id):
+            return None
+        self._remove(old)
+        self._insert({**old, **{k: new[k] for k in ("doctor_id", "date", "start", "end", "slot")}})
+        return old
+
+    async def get(self, booking_id: str) -> Optional[Dict[str, Any]]:
+        return self.bookings.get(booking_id)
+
+    async def by_patient(self, email: str) -> List[Dict[str, Any]]:
+        return [r for r in self.bookings.values() if r["patient"].get("email") == email]
+
+    async def by_doctor_day(self, doctor_id: str, day: str) -> List[Dict[str, Any]]:
+        return sorted(self._by_day.get((doctor_id, day), {}).values(), key=lambda r: r["start"])
+
+    async def by_date(self, day: str) -> List[Dict[str, Any]]:
+        return [r for (_, d), rows in self._by_day.items() if d == day for r in rows.values()]
+
+    async def page(self, after: int, limit: int, **filters) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Bookings numbered after ``after`` that match ``filters``, in id order.
+
+        Returns (records, cursor): resume from ``cursor``, or stop when it is
+        None. At most ``max(limit, 4096)`` ids are scanned per call, so a
+        selective filter never holds the event loop for long.
+        """
+        found = []
+        stop = min(self._last_id, after + max(limit, 4096))
+        n = after
+        while n < stop and len(found) < limit:
+            n += 1
+            record = self.bookings.get(f"BOOK{n}")
+            if record is not None and _matches(record, filters):
+                found.append(record)
+        return found, (n if n < self._last_id else None)
+
+    def upcoming(self, since: date) -> Iterator[Dict[str, Any]]:
+        return (r for r in list(self.bookings.values())
+                if r["status"] == "confirmed" and r["date"] >= since.isoformat())
+
+    def last_change(self) -> int:
+        return 0
+
+    async def changes_since(self, seq: int) -> Tuple[int, List[Tuple[str, str]]]:
+        """Nothing to report: every write to this store goes through the caller's own process."""
+        return seq, []
+
+    def close(self):
+        pass
+
+    def _conflict(self, record, ignore=None) -> bool:
+        rows = self._by_day.get((record["doctor_id"], record["date"]), {})
+        return any(bid != ignore and _overlaps(record, r) for bid, r in rows.items())
+
+    def _insert(self, record):
+        self.bookings[record["booking_id"]] = record
+        self._by_day.setdefault((record["doctor_id"], record["date"]), {})[record["booking_id"]] = record
+
+    def _remove(self, record):
+        key = (record["doctor_id"], record["date"])
+        rows = self._by_day.get(key, {})
+        rows.pop(record["booking_id"], None)
+        if not rows:
+            self._by_day.pop(key, None)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doctor_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    start_min INTEGER NOT NULL,
+    end_min INTEGER NOT NULL,
+    appointment_type TEXT,
+    patient_email TEXT,
+    patient_json TEXT NOT NULL,
+    slot_json TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'confirmed',
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_doctor_day ON bookings (doctor_id, date, start_min);
+CREATE INDEX IF NOT EXISTS idx_bookings_patient_email ON bookings (patient_email);
+CREATE TABLE IF NOT EXISTS booking_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    writer TEXT NOT NULL,
+    doctor_id TEXT NOT NULL,
+    date TEXT NOT NULL
+);
+"""
+
+_COLUMNS = "id, doctor_id, date, start_min, end_min, appointment_type, patient_json, slot_json, status, created_at"
+
+_CONFLICT_SQL = (
+    "SELECT 1 FROM bookings WHERE doctor_id = ? AND date = ? AND status = 'confirmed' "
+    "AND start_min < ? AND end_min > ? AND id != ? LIMIT 1"
+)
+
+
+class SQLiteBookingStore:
+    """Durable booking store on SQLite in WAL mode.
+
+    Connections come from a fixed-size pool and every call runs on a thread
+    pool, so the event loop never blocks on disk. Each write is one
+    ``BEGIN IMMEDIATE`` transaction, which also serializes conflicting
+    bookings across worker processes sharing the file, and appends the
+    doctor-days it touched to ``booking_changes`` so each worker can bring
+    its in-memory availability up to date (``changes_since``).
+    """
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self.pool = SQLitePool(path, pool_size, name="booking-db")
+        self.writer = uuid.uuid4().hex
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    async def book(self, record: Dict[str, Any]) -> Optional[str]:
+        return await self.pool.run(self._book, record)
+
+    async def book_many(self, records: List[Dict[str, Any]]) -> Tuple[Optional[List[str]], List[int]]:
+        """All-or-nothing batch in one transaction; see ``MemoryBookingStore.book_many``."""
+        return await self.pool.run(self._book_many, records)
+
+    async def cancel(self, booking_id: str) -> Optional[Dict[str, Any]]:
+        return await self.pool.run(self._cancel, booking_id)
+
+    async def reschedule(self, booking_id: str, new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self.pool.run(self._reschedule, booking_id, new)
+
+    async def get(self, booking_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self.pool.run(self._select, "id = ?", (booking_number(booking_id),))
+        return rows[0] if rows else None
+
+    async def by_patient(self, email: str) -> List[Dict[str, Any]]:
+        return await self.pool.run(self._select, "patient_email = ?", (email,))
+
+    async def by_doctor_day(self, doctor_id: str, day: str) -> List[Dict[str, Any]]:
+        return await self.pool.run(self._select, "doctor_id = ? AND date = ? AND status = 'confirmed'",
+                                   (doctor_id, day), "start_min")
+
+    async def by_date(self, day: str) -> List[Dict[str, Any]]:
+        return await self.pool.run(self._select, "date = ? AND status = 'confirmed'",
+                                   (day,), "doctor_id, start_min")
+
+    async def page(self, after: int, limit: int, **filters) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Keyset page by row id; see ``MemoryBookingStore.page``."""
+        return await self.pool.run(self._page, after, limit, filters)
+
+    def upcoming(self, since: date) -> Iterator[Dict[str, Any]]:
+        return iter(self._select("date >= ? AND status = 'confirmed'", (since.isoformat(),)))
+
+    def last_change(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM booking_changes").fetchone()[0]
+
+    async def changes_since(self, seq: int) -> Tuple[int, List[Tuple[str, str]]]:
+        """(latest seq, distinct (doctor_id, date) pairs other store instances wrote after ``seq``)."""
+        return await self.pool.run(self._changes_since, seq)
+
+    def close(self):
+        self.pool.close()
+
+    def _book(self, record):
+        with self.pool.transaction() as conn:
+            if self._conflicts(conn, record):
+                return None
+            return self._insert(conn, record)
+
+    def _book_many(self, records):
+        with self.pool.transaction() as conn:
+            clashes = set(_batch_overlaps(records))
+            clashes.update(i for i, r in enumerate(records) if i not in clashes and self._conflicts(conn, r))
+            if clashes:
+                return None, sorted(clashes)
+            return [self._insert(conn, r) for r in records], []
+
+    @staticmethod
+    def _conflicts(conn, record) -> bool:
+        return conn.execute(_CONFLICT_SQL, (record["doctor_id"], record["date"], record["end"],
+                                            record["start"], -1)).fetchone() is not None
+
+    def _insert(self, conn, record) -> str:
+        cur = conn.execute(
+            "INSERT INTO bookings (doctor_id, date, start_min, end_min, appointment_type, patient_email, "
+            "patient_json, slot_json, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'confirmed', ?)",
+            (record["doctor_id"], record["date"], record["start"], record["end"],
+             record["appointment_type"], record["patient"].get("email"),
+             json.dumps(record["patient"]), json.dumps(record["slot"]), record["created_at"]),
+        )
+        self._changed(conn, record["doctor_id"], record["date"])
+        return f"BOOK{cur.lastrowid}"
+
+    def _changed(self, conn, doctor_id, day):
+        conn.execute("INSERT INTO booking_changes (writer, doctor_id, date) VALUES (?, ?, ?)",
+                     (self.writer, doctor_id, day))
+
+    def _changes_since(self, seq):
+        with self.pool.connection() as conn:
+            latest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM booking_changes").fetchone()[0]
+            if latest <= seq:
+                return seq, []
+            rows = conn.execute("SELECT DISTINCT doctor_id, date FROM booking_changes "
+                                "WHERE seq > ? AND seq <= ? AND writer != ?", (seq, latest, self.writer)).fetchall()
+        return latest, [tuple(row) for row in rows]
+
+    def _cancel(self, booking_id):
+        with self.pool.transaction() as conn:
+            row = self._fetch_confirmed(conn, booking_id)
+            if row is None:
+                return None
+            conn.execute("UPDATE bookings SET status = 'cancelled' WHERE id = ?", (row[0],))
+            self._changed(conn, row[1], row[2])
+            return {**self._to_record(row), "status": "cancelled"}
+
+    def _reschedule(self, booking_id, new):
+        with self.pool.transaction() as conn:
+            row = self._fetch_confirmed(conn, booking_id)
+            if row is None or conn.execute(_CONFLICT_SQL, (new["doctor_id"], new["date"], new["end"],
+                                                           new["start"], row[0])).fetchone():
+                return None
+            conn.execute(
+                "UPDATE bookings SET doctor_id = ?, date = ?, start_min = ?, end_min = ?, slot_json = ? WHERE id = ?",
+                (new["doctor_id"], new["date"], new["start"], new["end"], json.dumps(new["slot"]), row[0]),
+            )
+            self._changed(conn, row[1], row[2])
+            self._changed(conn, new["doctor_id"], new["date"])
+            return self._to_record(row)
+
+    def _page(self, after, limit, filters):
+        clauses, params = ["id > ?"], [after]
+        for key, clause in (("date_from", "date >= ?"), ("date_to", "date <= ?"), ("doctor_id", "doctor_id = ?"),
+                            ("appointment_type", "appointment_type = ?"), ("status", "status = ?")):
+            if key in filters:
+                clauses.append(clause)
+                params.append(filters[key])
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"SELECT {_COLUMNS} FROM bookings WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?",
+                                (*params, limit)).fetchall()
+        return [self._to_record(r) for r in rows], (rows[-1][0] if len(rows) == limit else None)
+
+    def _fetch_confirmed(self, conn, booking_id):
+        return conn.execute(f"SELECT {_COLUMNS} FROM bookings WHERE id = ? AND status = 'confirmed'",
+                            (booking_number(booking_id),)).fetchone()
+
+    def _select(self, where, params, order="id"):
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"SELECT {_COLUMNS} FROM bookings WHERE {where} ORDER BY {order}", params)
+            return [self._to_record(r) for r in rows.fetchall()]
+
+    @staticmethod
+    def _to_record(row) -> Dict[str, Any]:
+        return {
+            "booking_id": f"BOOK{row[0]}",
+            "doctor_id": row[1],
+            "date": row[2],
+            "start": row[3],
+            "end": row[4],
+            "appointment_type": row[5],
+            "patient": json.loads(row[6]),
+            "slot": json.loads(row[7]),
+            "status": row[8],
+            "created_at": row[9],
+        }
+
+
+def open_booking_store(url: Optional[str] = None):
+    """Store for ``DATABASE_URL`` (``sqlite:///path``), or in-memory when unset."""
+    url = url if url is not None else os.getenv("DATABASE_URL", "")
+    if url.startswith("sqlite:///"):
+        return SQLiteBookingStore(url[len("sqlite:///"):])
+    return MemoryBookingStore()
@@ -1,16 +1,253 @@
+import asyncio
+import weakref
+from contextlib import AsyncExitStack
+from datetime import date, datetime, timedelta
+
+from tools.availability_tool import slot_key
+from tools.booking_store import MemoryBookingStore, make_record
+from tools.waitlist import BACKFILLS, Waitlist
+from utils.cache import LRUCache
+from utils.idempotency import IdempotencyCache
+from utils.metrics import REGISTRY, timed
+
+SLOT_TAKEN = {"success": False, "error": "Slot is no longer available"}
+NOT_FOUND = {"success": False, "error": "Booking not found"}
+SERIES_CONFLICT = {"success": False, "error": "Some occurrences are not available"}
+SLOT_STARTED = {"success": False, "error": "Slot has already started"}
+
+OP_SECONDS = REGISTRY.histogram("booking_op_seconds", "BookingTool operation latency", ["op"])
+
+
+def _succeeded(result):
+    return result["success"]
+
+
 class BookingTool:
 
-    def __init__(self):
-        self.bookings = {}
-        self.counter = 1
+    def __init__(self, availability=None, store=None, idempotency=None, waitlist=None):
+        self.availability = availability
+        self.store = store or MemoryBookingStore()
+        self.waitlist = waitlist or Waitlist()
+        self.idempotency = idempotency or IdempotencyCache(scope="booking")
+        # booking id -> idempotency key, so a cancelled booking is never replayed.
+        self._booking_keys = LRUCache(maxsize=self.idempotency.results.maxsize)
+        # One lock per doctor-day, dropped automatically once no coroutine
+        # holds or waits on it, so unrelated bookings never contend.
+        self._locks = weakref.WeakValueDictionary()
+        self._extending = asyncio.Lock()
+
+        # Seq of the last shared-store write reflected in ``availability``; see ``sync``.
+        self._seen = self.store.last_change()
+        if availability:
+            for record in self.store.upcoming(self._now().date()):
+                if "doctor_id" in record["slot"]:
+                    availability.reserve(record["slot"])
+
+    def _lock_for(self, key):
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def _tracked(self, slot):
+        return self.availability is not None and "doctor_id" in slot
+
+    @timed(OP_SECONDS.labels("book"))
+    async def book_appointment(self, patient, slot, idempotency_key=None):
+        """Book ``slot``; calls repeating an ``idempotency_key`` get the first successful result.
+
+        A failed claim is not remembered, so retrying it once the slot frees up books it.
+        """
+        if idempotency_key is None:
+            return await self._book(patient, slot)
+        fingerprint = (*slot_key(slot), patient.get("email"))
+        result = await self.idempotency.run(idempotency_key, fingerprint, lambda: self._book(patient, slot),
+                                            keep=_succeeded)
+        if result["success"]:
+            self._booking_keys.set(result["booking_id"], idempotency_key)
+        return result
+
+    async def sync(self):
+        """Bring availability up to date with writes other workers made to a shared store.
+
+        The store stays the authority on conflicts; this only keeps the local
+        engine honest. It runs before slots are listed, so a worker does not
+        offer slots booked elsewhere, and whenever the engine and the store
+        disagree on a claim, so a slot freed elsewhere is not refused.
+        Returns how many doctor-days were refreshed.
+        """
+        seq, days = await self.store.changes_since(self._seen)
+        if self.availability is not None:
+            for doctor_id, day in days:
+                async with self._lock_for((doctor_id, day)):
+                    bookings = await self.store.by_doctor_day(doctor_id, day)
+                    self.availability.sync_day(doctor_id, date.fromisoformat(day), bookings)
+        self._seen = max(self._seen, seq)
+        return len(days)
 
-    async def book_appointment(self, patient, slot):
-        booking_id = f"BOOK{self.counter}"
-        self.counter += 1
+    async def _sync_if_taken(self, slots):
+        """Sync before refusing: a slot this worker sees as taken may have been freed by another one."""
+        tracked = [slot for slot in slots if self._tracked(slot)]
+        if tracked and not all(self.availability.are_free(tracked)):
+            await self.sync()
 
-        self.bookings[booking_id] = {
-            "patient": patient,
-            "slot": slot
-        }
+    async def _book(self, patient, slot):
+        if self._started(slot):
+            return dict(SLOT_STARTED)
+        await self._sync_if_taken([slot])
+        record = make_record(patient, slot)
+        async with self._lock_for((record["doctor_id"], record["date"])):
+            if self._tracked(slot) and not self.availability.is_free(slot):
+                return dict(SLOT_TAKEN)
+            booking_id = await self.store.book(record)
+            if booking_id is not None and self._tracked(slot):
+                self.availability.reserve(slot)
+        if booking_id is None:
+            await self.sync()  # booked by another worker; learn about it
+            return dict(SLOT_TAKEN)
 
         return {"success": True, "booking_id": booking_id}
+
+    @timed(OP_SECONDS.labels("book_series"))
+    async def book_series(self, patient, slots, idempotency_key=None):
+        """Book every slot of a series or none of them.
+
+        Availability for all occurrences is checked in one vectorized pass and
+        the store commits them in one transaction. On failure the result lists
+        each conflicting occurrence with the nearest free alternative.
+        """
+        if idempotency_key is None:
+            return await self._book_series(patient, slots)
+        fingerprint = (tuple(slot_key(slot) for slot in slots), patient.get("email"))
+        result = await self.idempotency.run(idempotency_key, fingerprint,
+                                            lambda: self._book_series(patient, slots), keep=_succeeded)
+        for booking_id in result.get("booking_ids", ()):
+            self._booking_keys.set(booking_id, idempotency_key)
+        return result
+
+    async def _cover(self, slots):
+        """Grow availability over the last day of ``slots``, loading what the store already holds there.
+
+        Raises ValueError when that day is too far ahead to track.
+        """
+        days = [slot_key(slot)[1] for slot in slots if self._tracked(slot)]
+        if not days:
+            return
+        async with self._extending:
+            last = max(days)
+            day = self.availability.extend_to(last)
+            while day is not None and day <= last:
+                for record in await self.store.by_date(day.isoformat()):
+                    if "doctor_id" in record["slot"]:
+                        self.availability.reserve(record["slot"])
+                day += timedelta(days=1)
+
+    async def _book_series(self, patient, slots):
+        started = [i for i, slot in enumerate(slots) if self._started(slot)]
+        if started:
+            return {**SLOT_STARTED, "started": started}
+        await self._cover(slots)
+        await self._sync_if_taken(slots)
+        records = [make_record(patient, slot) for slot in slots]
+        tracked = [i for i, slot in enumerate(slots) if self._tracked(slot)]
+        async with AsyncExitStack() as stack:
+            for key in sorted({(r["doctor_id"], r["date"]) for r in records}):
+                await stack.enter_async_context(self._lock_for(key))
+            free = self.availability.are_free([slots[i] for i in tracked]) if tracked else []
+            conflicts = [i for i, ok in zip(tracked, free) if not ok]
+            if not conflicts:
+                booking_ids, conflicts = await self.store.book_many(records)
+            if conflicts:
+                return {**SERIES_CONFLICT, "conflicts": [self._series_conflict(i, slots[i]) for i in conflicts]}
+            for i in tracked:
+                self.availability.reserve(slots[i])
+        return {"success": True, "booking_ids": booking_ids}
+
+    def _series_conflict(self, index, slot):
+        alternative = self.availability.nearest_slot(slot) if self._tracked(slot) else None
+        return {"index": index, "slot": slot, "alternative": alternative}
+
+    @timed(OP_SECONDS.labels("cancel"))
+    async def cancel_appointment(self, booking_id):
+        booking = await self.store.get(booking_id)
+        if booking is None:
+            return dict(NOT_FOUND)
+        async with self._lock_for((booking["doctor_id"], booking["date"])):
+            cancelled = await self.store.cancel(booking_id)
+            if cancelled is None:
+                return dict(NOT_FOUND)
+            if self._tracked(cancelled["slot"]):
+                self.availability.release(cancelled["slot"])
+            backfill = await self._backfill(cancelled["slot"])
+        self._forget(booking_id)
+        return {"success": True, "booking": cancelled, "backfill": backfill}
+
+    @timed(OP_SECONDS.labels("reschedule"))
+    async def reschedule_appointment(self, booking_id, new_slot):
+        booking = await self.store.get(booking_id)
+        if booking is None or booking["status"] != "confirmed":
+            return dict(NOT_FOUND)
+        new_slot = {"appointment_type": booking["appointment_type"], "duration": booking["end"] - booking["start"],
+                    **new_slot}
+        if self._started(new_slot):
+            return dict(SLOT_STARTED)
+        await self._sync_if_taken([new_slot])
+        new = make_record(booking["patient"], new_slot)
+        keys = sorted({(booking["doctor_id"], booking["date"]), (new["doctor_id"], new["date"])})
+
+        async with AsyncExitStack() as stack:
+            for key in keys:
+                await stack.enter_async_context(self._lock_for(key))
+            old_slot = booking["slot"]
+            if self._tracked(old_slot):
+                self.availability.release(old_slot)
+            taken = self._tracked(new_slot) and not self.availability.is_free(new_slot)
+            if taken or await self.store.reschedule(booking_id, new) is None:
+                if self._tracked(old_slot):
+                    self.availability.reserve(old_slot)
+                return dict(SLOT_TAKEN)
+            if self._tracked(new_slot):
+                self.availability.reserve(new_slot)
+            backfill = await self._backfill(old_slot)
+        self._forget(booking_id)
+        return {"success": True, "booking_id": booking_id, "backfill": backfill}
+
+    def join_waitlist(self, patient, appointment_type, duration, date_from, date_to, band=None, doctor_id=None,
+                      priority=0):
+        """Wait for a slot in ``date_from``..``date_to``; the first matching cancellation is booked for it."""
+        self.waitlist.prune(self._now().date())
+        return self.waitlist.add(patient, duration, date_from, date_to, appointment_type=appointment_type,
+                                 band=band, doctor_id=doctor_id, priority=priority)
+
+    async def _backfill(self, freed):
+        """Book ``freed`` for the best matching waitlist entry; the caller holds its doctor-day lock."""
+        if self._started(freed):
+            return None
+        entry = self.waitlist.match(freed)
+        if entry is None:
+            return None
+        slot = {**freed, "duration": entry["duration"], "appointment_type": entry["appointment_type"]}
+        if self._tracked(slot) and not self.availability.is_free(slot):
+            BACKFILLS.labels("taken").inc()
+            return None
+        booking_id = await self.store.book(make_record(entry["patient"], slot))
+        if booking_id is None:
+            BACKFILLS.labels("taken").inc()
+            return None
+        if self._tracked(slot):
+            self.availability.reserve(slot)
+        self.waitlist.fulfil(entry["waitlist_id"], booking_id)
+        BACKFILLS.labels("booked").inc()
+        return {"waitlist_id": entry["waitlist_id"], "booking_id": booking_id, "slot": slot}
+
+    def _now(self):
+        return self.availability.clock() if self.availability is not None else datetime.now()
+
+    def _started(self, slot):
+        _, day, start, _ = slot_key(slot)
+        return datetime.combine(day, datetime.min.time()) + timedelta(minutes=start) <= self._now()
+
+    def _forget(self, booking_id):
+        key = self._booking_keys.pop(booking_id)
+        if key is not None:
+            self.idempotency.forget(key)
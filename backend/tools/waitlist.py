@@ -0,0 +1,129 @@
+import heapq
+import itertools
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from tools.availability_tool import TIME_BANDS, slot_key
+from utils.metrics import REGISTRY
+
+MAX_WINDOW_DAYS = int(os.getenv("WAITLIST_MAX_WINDOW_DAYS", "60"))
+
+BACKFILLS = REGISTRY.counter("waitlist_backfills_total", "Freed slots offered to the waitlist", ["outcome"])
+
+
+def band_of(minute: int) -> Optional[str]:
+    return next((name for name, (lo, hi) in TIME_BANDS.items() if lo <= minute < hi), None)
+
+
+class Waitlist:
+    """Patients waiting for a slot, indexed so a freed slot finds its match without a scan.
+
+    Each entry is pushed onto one heap per day of its date window, under
+    ``(day, duration, band, doctor_id)``; ``band`` and ``doctor_id`` are None
+    for "any". A freed slot only peeks at the heads of the few heaps it could
+    satisfy (every known duration that fits, its own band or any, its doctor
+    or any), so matching is O(log n) whatever the waitlist size. Heaps order by
+    ``(priority, registration order)``. Entries that leave the list are marked
+    and dropped lazily when they reach a heap head; past days are pruned whole.
+
+    Entries live in this process only. Workers sharing a booking store do not
+    share their waitlists, so backfill needs a single worker.
+    """
+
+    def __init__(self, max_window_days: int = MAX_WINDOW_DAYS):
+        self.max_window_days = max_window_days
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._days: Dict[date, Dict[Tuple[int, Optional[str], Optional[str]], List[tuple]]] = {}
+        self._durations = set()
+        self._ids = itertools.count(1)
+        self._waiting = 0
+        self._pruned = date.min
+
+    def add(self, patient: Dict[str, Any], duration: int, date_from: date, date_to: date,
+            appointment_type: Optional[str] = None, band: Optional[str] = None,
+            doctor_id: Optional[str] = None, priority: int = 0) -> Dict[str, Any]:
+        """Register a patient; lower ``priority`` is served first, then first come first served."""
+        if band is not None and band not in TIME_BANDS:
+            raise ValueError(f"Unknown time band {band!r}")
+        if date_to < date_from or (date_to - date_from).days >= self.max_window_days:
+            raise ValueError(f"Date window must span 1 to {self.max_window_days} days")
+        seq = next(self._ids)
+        entry = {
+            "waitlist_id": f"WAIT{seq}",
+            "patient": patient,
+            "appointment_type": appointment_type,
+            "duration": duration,
+            "date_from": date_from.isoformat(),
+            "date_to": date_to.isoformat(),
+            "band": band,
+            "doctor_id": doctor_id,
+            "priority": priority,
+            "status": "waiting",
+            "booking_id": None,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.entries[entry["waitlist_id"]] = entry
+        self._waiting += 1
+        self._durations.add(duration)
+        item = (priority, seq, entry["waitlist_id"])
+        day = date_from
+        while day <= date_to:
+            heapq.heappush(self._days.setdefault(day, {}).setdefault((duration, band, doctor_id), []), item)
+            day += timedelta(days=1)
+        return entry
+
+    def get(self, waitlist_id: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(waitlist_id)
+
+    def remove(self, waitlist_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(waitlist_id)
+        if entry is None or entry["status"] != "waiting":
+            return None
+        entry["status"] = "removed"
+        self._waiting -= 1
+        return entry
+
+    def fulfil(self, waitlist_id: str, booking_id: str):
+        entry = self.entries[waitlist_id]
+        entry["status"], entry["booking_id"] = "booked", booking_id
+        self._waiting -= 1
+
+    def match(self, slot: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Best waiting entry that fits in ``slot`` (a freed slot dict), left on the list."""
+        doctor_id, day, start, duration = slot_key(slot)
+        buckets = self._days.get(day)
+        if not buckets:
+            return None
+        best = None
+        for key in self._keys(duration, band_of(start), doctor_id):
+            heap = buckets.get(key)
+            while heap and self.entries[heap[0][2]]["status"] != "waiting":
+                heapq.heappop(heap)
+            if heap and (best is None or heap[0] < best):
+                best = heap[0]
+        return self.entries[best[2]] if best else None
+
+    def _keys(self, duration: int, band: Optional[str], doctor_id: str) -> Iterable[tuple]:
+        for length in self._durations:
+            if length <= duration:
+                for b in (band, None):
+                    for d in (doctor_id, None):
+                        yield length, b, d
+
+    def prune(self, today: date) -> int:
+        """Drop the heaps of days before ``today`` and entries whose window has passed; once a day."""
+        if today <= self._pruned:
+            return 0
+        self._pruned = today
+        for day in [d for d in self._days if d < today]:
+            del self._days[day]
+        expired = [e for e in self.entries.values() if date.fromisoformat(e["date_to"]) < today]
+        for entry in expired:
+            if entry["status"] == "waiting":
+                self._waiting -= 1
+            del self.entries[entry["waitlist_id"]]
+        return len(expired)
+
+    def __len__(self):
+        return self._waiting
@@ -0,0 +1,199 @@
+"""Admission control: a global in-flight limit, a bounded wait queue and per-client rate limits.
+
+``AdmissionMiddleware`` puts both in front of selected path prefixes, so an
+overloaded worker answers in microseconds with 503 (or 429 for a client over
+its rate) instead of letting every request's latency collapse together.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Deque, Hashable, Optional, Sequence
+
+from utils.cache import LRUCache
+from utils.metrics import REGISTRY
+
+MAX_IN_FLIGHT = int(os.getenv("CHAT_MAX_IN_FLIGHT", "64"))
+MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "256"))
+QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT_MS", "2000")) / 1000
+
+REJECTED = REGISTRY.counter("admission_rejected_total", "Requests shed before reaching a handler", ["reason"])
+QUEUE_WAIT = REGISTRY.histogram("admission_queue_wait_seconds", "Time admitted requests spent queued")
+
+
+class Overloaded(Exception):
+    """Request shed; carries the HTTP status and a Retry-After hint in seconds."""
+
+    def __init__(self, reason: str, status: int = 503, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """At most ``max_in_flight`` admitted requests; up to ``max_queue`` more wait in FIFO order.
+
+    A request arriving to a full queue is rejected at once; a queued request
+    still waiting after ``queue_timeout`` seconds is rejected then. Either way
+    the caller gets ``Overloaded`` and no work was started for it.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, max_queue: int = MAX_QUEUE,
+                 queue_timeout: float = QUEUE_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            REJECTED.labels("queue_full").inc()
+            raise Overloaded("queue_full", retry_after=self.queue_timeout)
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release()  # handed a slot nobody will use: pass it on
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                REJECTED.labels("deadline").inc()
+                raise Overloaded("deadline", retry_after=self.queue_timeout) from None
+        QUEUE_WAIT.observe(time.perf_counter() - start)
+
+    def release(self):
+        # Hand the slot straight to the oldest waiter, so in_flight never dips
+        # and a newcomer cannot overtake the queue.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {"in_flight": self.in_flight, "queued": self.queued, "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue}
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = now
+
+    def take(self, now: float, cost: float = 1.0) -> float:
+        """Spend ``cost`` tokens; returns 0 on success, else seconds until they are available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """One token bucket per client key; idle buckets are evicted LRU-first."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 100_000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.buckets = LRUCache(maxsize=max_clients)
+
+    def check(self, client: Hashable, cost: float = 1.0):
+        """Charge ``cost`` requests to ``client``; a cost above ``burst`` can never be paid."""
+        now = self.clock()
+        bucket = self.buckets.get(client, count=False)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, now)
+            self.buckets.set(client, bucket)
+        wait = bucket.take(now, cost)
+        if wait:
+            REJECTED.labels("rate_limited").inc()
+            raise Overloaded("rate_limited", status=429, retry_after=wait)
+
+    @classmethod
+    def from_env(cls) -> Optional["RateLimiter"]:
+        """Limiter from ``RATE_LIMIT_REQUESTS_PER_MINUTE``/``RATE_LIMIT_BURST``, if ``ENABLE_RATE_LIMITING``."""
+        if os.getenv("ENABLE_RATE_LIMITING", "").lower() not in ("1", "true", "yes"):
+            return None
+        per_minute = float(os.getenv("RATE_LIMIT_REQUESTS_PER_MINUTE", "60"))
+        return cls(per_minute / 60, float(os.getenv("RATE_LIMIT_BURST", "20")))
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying a rate limiter and an admission controller to HTTP paths.
+
+    The slot is held until the response body has been sent, so streaming
+    responses count against the limit for as long as they run. Paths in
+    ``exclude`` (e.g. a batch endpoint) admit and charge their own work. Clients are
+    keyed by peer address; behind a proxy run uvicorn with ``--proxy-headers``.
+    """
+
+    def __init__(self, app, controller: AdmissionController, limiter: Optional[RateLimiter] = None,
+                 prefixes: Sequence[str] = ("/",), exclude: Sequence[str] = ()):
+        self.app = app
+        self.controller = controller
+        self.limiter = limiter
+        self.prefixes = tuple(prefixes)
+        self.exclude = frozenset(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes) or scope["path"] in self.exclude:
+            return await self.app(scope, receive, send)
+        try:
+            if self.limiter is not None:
+                self.limiter.check((scope.get("client") or ("unknown",))[0])
+            await self.controller.acquire()
+        except Overloaded as exc:
+            return await _reject(send, exc)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+async def _reject(send, exc: Overloaded):
+    body = json.dumps({"detail": "Too many requests" if exc.status == 429 else "Server busy, retry shortly",
+                       "reason": exc.reason}).encode()
+    await send({"type": "http.response.start", "status": exc.status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, math.ceil(exc.retry_after))).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,94 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded LRU mapping with an optional TTL and hit/miss counters.
+
+    With ``sliding=True`` the TTL is an idle timeout refreshed on every hit,
+    otherwise entries expire a fixed time after they were set.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, sliding: bool = True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sliding = sliding
+        self._data: "OrderedDict[Hashable, list]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        entry = self._data.get(key)
+        if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+            del self._data[key]
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            if count:
+                self.misses += 1
+            return default
+        if count:
+            self.hits += 1
+        self._data.move_to_end(key)
+        if self.ttl is not None and self.sliding:
+            entry[1] = time.monotonic()
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = [value, time.monotonic()]
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def keys(self):
+        return list(self._data)
+
+    def expire(self) -> int:
+        """Drop expired entries from the cold end; O(number expired)."""
+        if self.ttl is None:
+            return 0
+        cutoff = time.monotonic() - self.ttl
+        expired = 0
+        while self._data:
+            key, entry = next(iter(self._data.items()))
+            if entry[1] > cutoff:
+                break
+            del self._data[key]
+            expired += 1
+        self.expirations += expired
+        return expired
+
+    def clear(self):
+        self._data.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class FileWatcher:
+    """Polls files and calls ``callback(path)`` when their content changes.
+
+    A poll is one ``stat`` per file; content is only read and hashed when
+    size or mtime moved, so touching a file without changing it is ignored.
+    If a callback raises (say the file is half-written and not valid JSON
+    yet) or returns False (it could not apply the change yet), the change is
+    retried on the next poll.
+    """
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._watches: Dict[Path, Tuple[Callable[[Path], object], Optional[tuple], Optional[str]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.errors = 0
+
+    def watch(self, path, callback: Callable[[Path], object]):
+        path = Path(path)
+        stat = self._stat(path)
+        self._watches[path] = (callback, stat, self._digest(path) if stat else None)
+
+    def poll(self) -> List[Path]:
+        """Check every file once; returns the paths whose callbacks ran successfully."""
+        changed = []
+        for path, (callback, stat, digest) in list(self._watches.items()):
+            new_stat = self._stat(path)
+            if new_stat is None or new_stat == stat:
+                continue
+            new_digest = self._digest(path)
+            if new_digest != digest:
+                try:
+                    applied = callback(path)
+                except Exception:
+                    self.errors += 1
+                    logger.exception("Reloading %s failed; will retry", path)
+                    continue
+                if applied is False:
+                    continue
+                self.reloads += 1
+                changed.append(path)
+            self._watches[path] = (callback, new_stat, new_digest)
+        return changed
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.poll()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def _digest(path: Path) -> Optional[str]:
+        try:
+            return hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return None
@@ -0,0 +1,81 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from utils.cache import LRUCache
+from utils.metrics import REGISTRY
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+DEFAULT_TTL = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+
+REPLAYS = REGISTRY.counter("idempotent_replays_total", "Requests answered from a stored or in-flight result",
+                           ["scope"])
+
+
+class IdempotencyConflict(Exception):
+    """An idempotency key was reused for a different request."""
+
+
+class IdempotencyCache:
+    """Stored results per idempotency key, bounded by entry count and TTL.
+
+    The first call for a key runs ``compute``; a retry that arrives while it
+    is still running awaits the same result instead of starting a second
+    one, and a retry after it finished gets the stored result back. Failures
+    (an exception, or a result ``keep`` rejects) are not stored, so a retry
+    after one runs again. ``fingerprint``
+    identifies the request body: reusing a key for a different body raises
+    ``IdempotencyConflict`` rather than replaying an unrelated result.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL, scope: str = "default"):
+        self.results = LRUCache(maxsize=maxsize, ttl=ttl, sliding=False)
+        self._in_flight: Dict[Hashable, Tuple[Hashable, asyncio.Future]] = {}
+        self._replays = REPLAYS.labels(scope)
+        self.replays = 0
+        self.joined = 0
+
+    async def run(self, key: Hashable, fingerprint: Hashable, compute: Callable[[], Awaitable[Any]],
+                  keep: Optional[Callable[[Any], bool]] = None) -> Any:
+        stored = self.results.get(key)
+        if stored is not None:
+            self._check(key, stored[0], fingerprint)
+            self.replays += 1
+            self._replays.inc()
+            return stored[1]
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self._check(key, pending[0], fingerprint)
+            self.joined += 1
+            self._replays.inc()
+            return await asyncio.shield(pending[1])
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when no retry is waiting
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+        if keep is None or keep(result):
+            self.results.set(key, (fingerprint, result))
+        future.set_result(result)
+        return result
+
+    def forget(self, key: Hashable):
+        self.results.pop(key)
+
+    def stats(self):
+        return {**self.results.stats(), "in_flight": len(self._in_flight), "replays": self.replays,
+                "joined": self.joined}
+
+    @staticmethod
+    def _check(key, stored, fingerprint):
+        if stored != fingerprint:
+            raise IdempotencyConflict(f"Idempotency key {key!r} was already used for a different request")
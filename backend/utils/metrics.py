@@ -0,0 +1,220 @@
+"""In-process metrics with Prometheus text exposition and an optional span hook.
+
+Metrics are plain objects on a module-level ``REGISTRY``; recording is a
+dict lookup plus a few integer/float updates, cheap enough for every chat
+turn. ``Gauge`` values can come from a callback read at scrape time, which
+is how session counts and cache hit rates are exported without touching
+their hot paths.
+
+``set_tracer(fn)`` installs a hook that receives one dict per finished span
+(name, start, duration, attributes); without one, ``span`` costs a single
+attribute check.
+"""
+import functools
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; tuned for in-process work from ~50us to multi-second upstream calls.
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for values, child in list(self._children.items()):
+            yield from self._render_child(_format_labels(self.labelnames, values), values, child)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _render_child(self, labels, values, child):
+        yield f"{self.name}{labels} {child.value}"
+
+
+class Gauge(_Metric):
+    """Set directly, or pass ``callback`` returning ``{label_values: value}`` (or a number)."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), callback: Optional[Callable] = None):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def render(self):
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception:
+                logger.exception("gauge callback for %s failed", self.name)
+                values = {}
+            if not isinstance(values, dict):
+                values = {(): values}
+            for key, value in values.items():
+                key = key if isinstance(key, tuple) else (key,)
+                self.labels(*key).set(value)
+        yield from super().render()
+
+    def _render_child(self, labels, values, child):
+        yield f"{self.name}{labels} {child.value}"
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, labels, values, child):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}"
+        yield f"{self.name}_sum{labels} {child.sum}"
+        yield f"{self.name}_count{labels} {child.count}"
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        # Re-registering a name replaces it, so reloaded modules and fresh
+        # app instances export their own objects.
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=(), callback=None) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, callback))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(line for metric in list(self.metrics.values()) for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def timed(child):
+    """Decorate a coroutine function to observe its duration on a histogram child."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+_tracer: Optional[Callable[[dict], None]] = None
+
+
+def set_tracer(tracer: Optional[Callable[[dict], None]]):
+    global _tracer
+    _tracer = tracer
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block and hand it to the tracer; a no-op when none is installed."""
+    if _tracer is None:
+        yield attributes
+        return
+    start = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        _tracer({"name": name, "start": start, "duration": time.perf_counter() - t0, "attributes": attributes})
+
+
+def slow_span_logger(threshold_seconds: float, log: logging.Logger = logger) -> Callable[[dict], None]:
+    """Tracer that logs spans slower than ``threshold_seconds``."""
+    def trace(s):
+        if s["duration"] >= threshold_seconds:
+            log.warning("slow span %s took %.1fms %s", s["name"], s["duration"] * 1000, s["attributes"])
+    return trace
@@ -0,0 +1,70 @@
+"""Sustained bookings/second through BookingTool on the SQLite (WAL) store.
+
+Usage (from the repo root):
+    python benchmarks/bench_booking_store.py --bookings 20000 --concurrency 200 --pool-sizes 1,2,4,8
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from tools.booking_store import MemoryBookingStore, SQLiteBookingStore  # noqa: E402
+from tools.booking_tool import BookingTool  # noqa: E402
+
+PATIENT = {"name": "Load Test", "phone": "555-000-0000", "email": "load@test.com", "reason": "Benchmark"}
+
+
+def attempts(n, doctors, seed=5):
+    rng = random.Random(seed)
+    base = date.today()
+    for _ in range(n):
+        minute = rng.randrange(32, 72) * 15
+        yield {"doctor_id": f"dr_{rng.randrange(doctors)}",
+               "date": (base + timedelta(days=rng.randrange(60))).isoformat(),
+               "time": f"{minute // 60}:{minute % 60:02d}", "duration": 15}
+
+
+async def run(tool, slots, concurrency):
+    queue = list(slots)
+    booked = 0
+
+    async def worker():
+        nonlocal booked
+        while queue:
+            result = await tool.book_appointment(PATIENT, queue.pop())
+            booked += result["success"]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return booked, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--pool-sizes", default="1,2,4,8")
+    args = parser.parse_args()
+
+    print(f"bookings={args.bookings} concurrency={args.concurrency} doctors={args.doctors}")
+    slots = list(attempts(args.bookings, args.doctors))
+    booked, elapsed = asyncio.run(run(BookingTool(store=MemoryBookingStore()), slots, args.concurrency))
+    print(f"{'memory':>10} {args.bookings / elapsed:>10,.0f} ops/s  ({booked} booked)")
+
+    for pool in (int(p) for p in args.pool_sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteBookingStore(str(Path(tmp) / "bookings.db"), pool_size=pool)
+            booked, elapsed = asyncio.run(run(BookingTool(store=store), slots, args.concurrency))
+            store.close()
+        print(f"{f'sqlite/{pool}':>10} {args.bookings / elapsed:>10,.0f} ops/s  ({booked} booked)")
+
+
+if __name__ == "__main__":
+    main()
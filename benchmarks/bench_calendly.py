@@ -0,0 +1,109 @@
+"""Scheduling-provider client: throughput and tail latency against the fake server.
+
+Starts ``api.calendly_fake`` on a local port with uvicorn (or uses --url) and
+fires concurrent busy-time range calls through the pooled client and through
+a fresh connection per call, then the same lookups through the coalescing,
+cached busy-time layer. Falls back to an in-process ASGI transport,
+without the per-call comparison, when uvicorn is not installed.
+
+Usage (from the repo root):
+    python benchmarks/bench_calendly.py --calls 2000 --concurrency 100 --latency 0.02 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from api.calendly_fake import Faults, create_app  # noqa: E402
+from api.calendly_integration import CalendlyAPI, CalendlyError  # noqa: E402
+
+
+def serve(app):
+    import uvicorn
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+async def drive(call, calls, concurrency):
+    latencies, errors = [], 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with gate:
+            start = time.perf_counter()
+            try:
+                await call(f"2024-01-{15 + i % 10}")
+            except (CalendlyError, httpx.HTTPError):
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return time.perf_counter() - start, np.array(latencies) * 1000, errors
+
+
+def report(label, elapsed, ms, errors):
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    print(f"{label:16} {len(ms) / elapsed:8.0f} calls/s  p50={p50:6.1f}ms p95={p95:6.1f}ms "
+          f"p99={p99:6.1f}ms errors={errors}")
+
+
+async def main_async(args):
+    app = create_app(Faults(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate), seed=11)
+    transport = None
+    url = args.url
+    if url is None:
+        try:
+            url = serve(app)
+        except ImportError:
+            print("uvicorn not installed: in-process ASGI transport, no per-call comparison")
+            url, transport = "http://fake", httpx.ASGITransport(app=app)
+
+    api = CalendlyAPI(base_url=url, token="bench", timeout=args.timeout, max_in_flight=args.concurrency,
+                      transport=transport)
+    report("pooled client", *await drive(lambda day: api.get_busy_range(day, day), args.calls, args.concurrency))
+    print(f"{'':16} {api.stats()}")
+
+    report("busy-time layer", *await drive(api.get_busy_times, args.calls, args.concurrency))
+    print(f"{'':16} upstream calls={api.busy.stats()['upstream_calls']} for {args.calls} lookups")
+    await api.close()
+
+    if transport is None:
+        async def per_call(day):
+            async with httpx.AsyncClient(base_url=url, timeout=args.timeout) as client:
+                response = await client.get("/busy_times", params={"start": day, "end": day})
+                response.raise_for_status()
+
+        report("client per call", *await drive(per_call, args.calls, args.concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="benchmark an already running server instead")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
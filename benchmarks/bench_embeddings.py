@@ -0,0 +1,56 @@
+"""Embedding cache sizing: hit rate and per-batch latency under Zipfian traffic.
+
+Chat traffic repeats a small set of FAQ phrasings, so queries are drawn from a
+Zipf distribution over a pool of distinct phrasings.
+
+Usage (from the repo root):
+    python benchmarks/bench_embeddings.py --phrasings 5000 --queries 50000 --batch 32
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from rag.embeddings import Embeddings  # noqa: E402
+
+TEMPLATES = [
+    "what are your {} hours",
+    "do you take {} insurance",
+    "where is the {} clinic located",
+    "can i park near the {} entrance",
+    "how much does a {} visit cost",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--phrasings", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--zipf", type=float, default=1.2)
+    parser.add_argument("--cache-sizes", default="0,256,1024,4096,16384")
+    args = parser.parse_args()
+
+    pool = [TEMPLATES[i % len(TEMPLATES)].format(f"term{i}") for i in range(args.phrasings)]
+    rng = np.random.default_rng(7)
+    picks = (rng.zipf(args.zipf, size=args.queries) - 1) % args.phrasings
+    stream = [pool[i] for i in picks]
+
+    print(f"phrasings={args.phrasings} queries={args.queries} batch={args.batch} zipf={args.zipf}")
+    print(f"{'cache':>8} {'hit rate':>9} {'avg batch ms':>13} {'total s':>8}")
+    for size in (int(s) for s in args.cache_sizes.split(",")):
+        emb = Embeddings(cache_size=max(size, 1) if size else 1)
+        start = time.perf_counter()
+        for i in range(0, len(stream), args.batch):
+            emb.encode(stream[i:i + args.batch])
+        total = time.perf_counter() - start
+        stats = emb.stats()
+        print(f"{size:>8} {stats['hit_rate']:>9.1%} {stats['avg_batch_ms']:>13.3f} {total:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
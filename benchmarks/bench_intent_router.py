@@ -0,0 +1,65 @@
+"""Intent routing cost as the phrase vocabulary grows.
+
+Compares the single-pass phrase table against a naive scan that tests every
+phrase with a substring check, for synthetic vocabularies of increasing size.
+
+Usage (from the repo root):
+    python benchmarks/bench_intent_router.py --sizes 10,100,500,1000 --messages 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from agent.intent_router import IntentRouter  # noqa: E402
+
+MESSAGES = [
+    "Hi, I'd like to book a follow-up appointment next week",
+    "Do you take topic{} insurance and where do I park?",
+    "The second one please, at 2:30 pm on 2024-01-15",
+    "Name: Jo\nPhone: 555-1234\nEmail: jo@email.com\nReason: checkup",
+    "what are your hours on saturday for topic{}",
+]
+
+
+def vocabulary(size):
+    return {"faq": {f"topic{i}": [f"topic{i}", f"topic {i} question"] for i in range(size)}}
+
+
+def naive_classify(intents, message):
+    text = message.lower()
+    return {category: label for category, labels in intents.items()
+            for label, phrases in labels.items() if any(p in text for p in phrases)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,100,500,1000")
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    print(f"{'phrases':>8} {'router us/msg':>14} {'naive us/msg':>13}")
+    for size in map(int, args.sizes.split(",")):
+        intents = vocabulary(size)
+        router = IntentRouter(intents)
+        messages = [MESSAGES[i % len(MESSAGES)].format(rng.integers(size)) for i in range(args.messages)]
+
+        t0 = time.perf_counter()
+        for m in messages:
+            router.classify(m)
+        routed = (time.perf_counter() - t0) / len(messages) * 1e6
+
+        t0 = time.perf_counter()
+        for m in messages:
+            naive_classify(intents, m)
+        naive = (time.perf_counter() - t0) / len(messages) * 1e6
+        print(f"{2 * size:>8} {routed:>14.1f} {naive:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Per-turn instrumentation overhead: one ``span`` plus one histogram observation.
+
+The figure is microseconds per turn, measured against an empty loop doing the
+same ``perf_counter`` calls. The baseline lives in
+``benchmarks/baselines/metrics.json``; ``--check`` exits non-zero when the
+overhead is worse than it by more than ``--tolerance``, ``--save`` records it.
+
+Usage (from the repo root):
+    python benchmarks/bench_metrics.py --turns 200000 --check
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from utils.metrics import Registry, span  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "metrics.json"
+
+
+def per_turn(n, instrumented):
+    h = Registry().histogram("turn_seconds", "t", ["phase"])
+    start = time.perf_counter()
+    for _ in range(n):
+        t0 = time.perf_counter()
+        if instrumented:
+            with span("chat.turn", phase="slots"):
+                pass
+            h.labels("slots").observe(time.perf_counter() - t0)
+        else:
+            time.perf_counter() - t0
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help="record this run as the baseline")
+    parser.add_argument("--check", action="store_true", help="fail on a regression against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+
+    bare = min(per_turn(args.turns, False) for _ in range(args.repeat))
+    instrumented = min(per_turn(args.turns, True) for _ in range(args.repeat))
+    result = {"turns": args.turns, "overhead_us": round((instrumented - bare) * 1e6, 3)}
+    print(f"overhead {result['overhead_us']:.3f} us/turn (bare loop {bare * 1e6:.3f} us)")
+
+    if args.save:
+        BASELINE.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"saved baseline to {BASELINE}")
+    if args.check:
+        if not BASELINE.exists():
+            sys.exit(f"no baseline in {BASELINE}; run with --save first")
+        baseline = json.loads(BASELINE.read_text())
+        if result["overhead_us"] > baseline["overhead_us"] * (1 + args.tolerance):
+            print(f"REGRESSION: overhead {result['overhead_us']}us > baseline {baseline['overhead_us']}us")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Recurring series: one ``book_series`` call vs booking each occurrence separately.
+
+Usage (from the repo root):
+    python benchmarks/bench_series.py --series 200 --occurrences 50
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from tools.availability_engine import AvailabilityEngine  # noqa: E402
+from tools.availability_tool import AvailabilityTool, series_slots  # noqa: E402
+from tools.booking_store import SQLiteBookingStore  # noqa: E402
+from tools.booking_tool import BookingTool  # noqa: E402
+
+PATIENT = {"name": "Load Test", "phone": "555-000-0000", "email": "load@test.com", "reason": "Benchmark"}
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def make_tool(path, doctors, weeks):
+    roster = [{"id": f"dr_{i}", "name": f"Dr. {i}", "weekly_hours": {d: [["08:00", "18:00"]] for d in DAYS}}
+              for i in range(doctors)]
+    engine = AvailabilityEngine(roster, horizon_days=7 * weeks + 7)
+    return BookingTool(AvailabilityTool(engine=engine), store=SQLiteBookingStore(path))
+
+
+def series(n, doctors, occurrences):
+    first = date.today() + timedelta(days=1)
+    for i in range(n):
+        minute = 8 * 60 + (i // doctors) * 15
+        yield series_slots(f"dr_{i % doctors}", first, f"{minute // 60}:{minute % 60:02d}", 15, occurrences)
+
+
+async def one_by_one(tool, all_series):
+    for slots in all_series:
+        for slot in slots:
+            await tool.book_appointment(PATIENT, slot)
+
+
+async def batched(tool, all_series):
+    for slots in all_series:
+        await tool.book_series(PATIENT, slots)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--series", type=int, default=200)
+    parser.add_argument("--occurrences", type=int, default=50)
+    parser.add_argument("--doctors", type=int, default=10)
+    args = parser.parse_args()
+
+    all_series = list(series(args.series, args.doctors, args.occurrences))
+    bookings = args.series * args.occurrences
+    print(f"series={args.series} occurrences={args.occurrences} doctors={args.doctors}")
+    for name, run in (("single", one_by_one), ("series", batched)):
+        with tempfile.TemporaryDirectory() as tmp:
+            tool = make_tool(str(Path(tmp) / "bookings.db"), args.doctors, args.occurrences)
+            start = time.perf_counter()
+            asyncio.run(run(tool, all_series))
+            elapsed = time.perf_counter() - start
+            tool.store.close()
+        print(f"{name:>8} {bookings / elapsed:>10,.0f} bookings/s  {elapsed / args.series * 1e3:>8.2f} ms/series")
+
+
+if __name__ == "__main__":
+    main()
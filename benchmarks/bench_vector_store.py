@@ -0,0 +1,74 @@
+"""Compare VectorStore top-k search against a brute-force Python loop.
+
+Usage (from the repo root):
+    python benchmarks/bench_vector_store.py --entries 5000 --dim 256 --queries 200
+"""
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from rag.vector_store import VectorStore  # noqa: E402
+
+
+def brute_force(rows, query, k):
+    qn = math.sqrt(sum(x * x for x in query)) or 1.0
+    scored = []
+    for i, row in enumerate(rows):
+        rn = math.sqrt(sum(x * x for x in row)) or 1.0
+        scored.append((sum(a * b for a, b in zip(row, query)) / (rn * qn), i))
+    scored.sort(reverse=True)
+    return [i for _, i in scored[:k]]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = rng.normal(size=(args.entries, args.dim)).astype(np.float32)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    store = VectorStore(dim=args.dim)
+    start = time.perf_counter()
+    for i, v in enumerate(vectors):
+        store.add(f"q{i}", f"a{i}", v)
+    insert_s = time.perf_counter() - start
+
+    rows = vectors.tolist()
+    py_queries = queries.tolist()
+    n_py = min(args.queries, 10)
+
+    single = timed(lambda: [store.search(q, k=args.k) for q in queries], 3) / args.queries
+    batched = timed(lambda: store.search_batch(queries, k=args.k), 3) / args.queries
+    loop = timed(lambda: [brute_force(rows, q, args.k) for q in py_queries[:n_py]], 1) / n_py
+
+    expected = brute_force(rows, py_queries[0], args.k)
+    got = [h["id"] for h in store.search(queries[0], k=args.k)]
+    assert got == expected, (got, expected)
+
+    print(f"entries={args.entries} dim={args.dim} k={args.k}")
+    print(f"insert           {insert_s * 1e6 / args.entries:10.2f} us/entry")
+    print(f"search           {single * 1e6:10.2f} us/query")
+    print(f"search_batch     {batched * 1e6:10.2f} us/query")
+    print(f"python loop      {loop * 1e6:10.2f} us/query  ({loop / single:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Waitlist match latency for a freed slot as the waitlist grows.
+
+Usage (from the repo root):
+    python benchmarks/bench_waitlist.py --entries 1000,10000,50000 --matches 20000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from tools.waitlist import Waitlist  # noqa: E402
+
+PATIENT = {"name": "Load Test", "phone": "555-000-0000", "email": "load@test.com", "reason": "Benchmark"}
+DURATIONS = [15, 30, 45, 60]
+BANDS = [None, "morning", "afternoon", "evening"]
+
+
+def build(n, doctors, rng):
+    waitlist = Waitlist()
+    today = date.today()
+    for _ in range(n):
+        first = today + timedelta(days=rng.randrange(30))
+        waitlist.add(PATIENT, rng.choice(DURATIONS), first, first + timedelta(days=rng.randrange(7)),
+                     band=rng.choice(BANDS), doctor_id=rng.choice([None] + [f"dr_{i}" for i in range(doctors)]),
+                     priority=rng.randrange(3))
+    return waitlist
+
+
+def freed_slots(n, doctors, rng):
+    today = date.today()
+    for _ in range(n):
+        minute = rng.randrange(32, 72) * 15
+        yield {"doctor_id": f"dr_{rng.randrange(doctors)}",
+               "date": (today + timedelta(days=rng.randrange(30))).isoformat(),
+               "time": f"{minute // 60}:{minute % 60:02d}", "duration": rng.choice(DURATIONS)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", default="1000,10000,50000")
+    parser.add_argument("--matches", type=int, default=20000)
+    parser.add_argument("--doctors", type=int, default=20)
+    args = parser.parse_args()
+
+    for n in (int(e) for e in args.entries.split(",")):
+        rng = random.Random(7)
+        waitlist = build(n, args.doctors, rng)
+        slots = list(freed_slots(args.matches, args.doctors, rng))
+        matched = 0
+        start = time.perf_counter()
+        for slot in slots:
+            entry = waitlist.match(slot)
+            if entry is not None:
+                waitlist.fulfil(entry["waitlist_id"], "BOOK0")
+                matched += 1
+        elapsed = time.perf_counter() - start
+        print(f"entries={n:>7,} {elapsed / args.matches * 1e6:>8.1f} us/match  ({matched} matched)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Load test: thousands of concurrent booking conversations end to end.
+
+Every synthetic session walks greeting -> appointment type -> slot pick ->
+patient details -> confirm, either straight through
+``SchedulingAgent.process_message`` (``--mode inprocess``) or through the
+FastAPI app over an ASGI transport (``--mode asgi``). Reports p50/p95/p99
+latency per phase, turn and conversation throughput, and peak RSS growth.
+
+Sessions all see the same first five slots, so many confirms lose the race
+and get fresh slots re-offered; that path is part of the confirm numbers.
+
+Baselines live in ``benchmarks/baselines/load_test.json``, one entry per
+mode. ``--check`` exits non-zero when a phase p95 or the throughput is worse
+than the baseline by more than ``--tolerance``; ``--save`` records a new one.
+
+Usage (from the repo root):
+    python benchmarks/load_test.py --mode inprocess --sessions 2000 --concurrency 500 --check
+    python benchmarks/load_test.py --mode asgi --sessions 2000 --save
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+BASELINES = Path(__file__).resolve().parent / "baselines" / "load_test.json"
+PHASES = ["greeting", "type", "slot", "patient", "confirm"]
+TYPES = ["I need a general consultation", "Book a follow-up", "I'd like a physical exam",
+         "Specialist consultation please"]
+
+
+def script(i, rng):
+    return [
+        "Hello",
+        rng.choice(TYPES),
+        str(rng.randrange(1, 6)),
+        f"Name: Patient {i}\nPhone: 555-{i:07d}\nEmail: p{i}@load.test\nReason: Load test",
+        "yes",
+    ]
+
+
+def rss_mb():
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def make_sender(mode):
+    if mode == "inprocess":
+        from agent.scheduling_agent import SchedulingAgent
+
+        agent = SchedulingAgent()
+
+        async def send(message, session_id):
+            return (await agent.process_message(message, session_id))["response"]
+
+        return send, None
+
+    import httpx
+    from main import app
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load")
+
+    async def send(message, session_id):
+        response = await client.post("/chat/", json={"message": message, "session_id": session_id})
+        response.raise_for_status()
+        return response.json()["response"]
+
+    return send, client
+
+
+async def run(mode, sessions, concurrency, seed):
+    send, client = await make_sender(mode)
+    rng = random.Random(seed)
+    timings = {phase: [] for phase in PHASES}
+    booked = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def conversation(i):
+        nonlocal booked
+        async with gate:
+            for phase, message in zip(PHASES, script(i, rng)):
+                start = time.perf_counter()
+                reply = await send(message, f"load-{seed}-{i}")
+                timings[phase].append(time.perf_counter() - start)
+            booked += reply.startswith("Booked!")
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    if client is not None:
+        await client.aclose()
+
+    result = {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "booked": booked,
+        "turns_per_s": round(sessions * len(PHASES) / elapsed, 1),
+        "conversations_per_s": round(sessions / elapsed, 1),
+        "peak_rss_growth_mb": round(rss_mb() - rss_before, 1),
+        "phases_ms": {},
+    }
+    for phase, samples in timings.items():
+        p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+        result["phases_ms"][phase] = {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3)}
+    return result
+
+
+def regressions(result, baseline, tolerance):
+    found = []
+    if result["turns_per_s"] < baseline["turns_per_s"] * (1 - tolerance):
+        found.append(f"throughput {result['turns_per_s']} < baseline {baseline['turns_per_s']} turns/s")
+    for phase, stats in result["phases_ms"].items():
+        base = baseline["phases_ms"].get(phase)
+        if base and stats["p95"] > base["p95"] * (1 + tolerance):
+            found.append(f"{phase} p95 {stats['p95']}ms > baseline {base['p95']}ms")
+    return found
+
+
+def report(mode, result):
+    print(f"mode={mode} sessions={result['sessions']} concurrency={result['concurrency']} "
+          f"booked={result['booked']}")
+    print(f"throughput {result['turns_per_s']} turns/s, {result['conversations_per_s']} conversations/s; "
+          f"peak RSS +{result['peak_rss_growth_mb']} MB")
+    print(f"{'phase':10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for phase, stats in result["phases_ms"].items():
+        print(f"{phase:10} {stats['p50']:9.3f} {stats['p95']:9.3f} {stats['p99']:9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["inprocess", "asgi"], default="inprocess")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", action="store_true", help="record this run as the mode's baseline")
+    parser.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.mode, args.sessions, args.concurrency, args.seed))
+    report(args.mode, result)
+
+    baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    if args.save:
+        baselines[args.mode] = result
+        BASELINES.parent.mkdir(parents=True, exist_ok=True)
+        BASELINES.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"saved baseline to {BASELINES}")
+    if args.check:
+        if args.mode not in baselines:
+            sys.exit(f"no {args.mode} baseline in {BASELINES}; run with --save first")
+        baseline = baselines[args.mode]
+        if (baseline["sessions"], baseline["concurrency"]) != (args.sessions, args.concurrency):
+            print(f"note: baseline ran {baseline['sessions']} sessions at concurrency {baseline['concurrency']}")
+        found = regressions(result, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION: {line}")
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,4 +25,35 @@ export class ChatAPI {
       return { success: false };
     }
   }
+
+  // Streams the reply from /chat/stream (SSE); onDelta receives each chunk.
+  async streamMessage(message, sessionId, userId, onDelta) {
+    try {
+      const response = await fetch(`${BASE_URL}/chat/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ message, session_id: sessionId, user_id: userId })
+      });
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let reply = "";
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const block of events) {
+          const [eventLine, dataLine] = block.split("\n");
+          const data = JSON.parse(dataLine.slice("data: ".length));
+          if (eventLine === "event: delta") onDelta(data.text);
+          else reply = data.response;
+        }
+      }
+      return { success: true, data: { response: reply } };
+    } catch (error) {
+      return { success: false };
+    }
+  }
 }
@@ -0,0 +1,83 @@
+import sys
+from datetime import date, datetime, time
+from pathlib import Path
+
+import pytest
+
+# The backend modules import each other as top-level packages (``from rag...``),
+# the same way uvicorn sees them when started from ``backend/``.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from tools.availability_engine import AvailabilityEngine, format_minute  # noqa: E402
+from tools.availability_tool import AvailabilityTool  # noqa: E402
+from tools.booking_store import MemoryBookingStore, SQLiteBookingStore  # noqa: E402
+from tools.booking_tool import BookingTool  # noqa: E402
+
+
+class Clock:
+    """A settable ``datetime.now`` (or ``time.monotonic``) stand-in."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def monday():
+    return date(2024, 1, 15)
+
+
+@pytest.fixture
+def patient():
+    return {"name": "Wendy Wait", "phone": "555-222-3333", "email": "wendy@email.com", "reason": "Checkup"}
+
+
+@pytest.fixture
+def doctors():
+    """Default roster; modules override this fixture with the schedule their tests need."""
+    return [
+        {"id": "dr_a", "name": "Dr. A",
+         "weekly_hours": {"monday": [["09:00", "12:00"]], "tuesday": [["09:00", "10:00"]]}},
+        {"id": "dr_b", "name": "Dr. B", "weekly_hours": {"monday": [["10:00", "11:00"]]}},
+    ]
+
+
+@pytest.fixture
+def clock(monday):
+    return Clock(datetime.combine(monday, time(7, 0)))
+
+
+@pytest.fixture
+def make_slot(monday):
+    """Slot dict factory; ``day`` defaults to ``monday``."""
+    def make(doctor_id="dr_a", day=None, minute=600, duration=30, **extra):
+        return {"doctor_id": doctor_id, "date": (day or monday).isoformat(), "time": format_minute(minute),
+                "duration": duration, **extra}
+    return make
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Each booking store in turn, empty."""
+    store = MemoryBookingStore() if request.param == "memory" else SQLiteBookingStore(str(tmp_path / "b.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def make_engine(doctors, monday):
+    """Engine factory anchored on ``monday``; ``roster`` defaults to the ``doctors`` fixture."""
+    def make(roster=None, horizon_days=14, **kwargs):
+        return AvailabilityEngine(doctors if roster is None else roster, horizon_days=horizon_days,
+                                  today=lambda: monday, **kwargs)
+    return make
+
+
+@pytest.fixture
+def make_tool(make_engine, clock):
+    """BookingTool factory over a fresh engine, read at 07:00 on ``monday``."""
+    def make(roster=None, horizon_days=7, store=None):
+        return BookingTool(AvailabilityTool(engine=make_engine(roster, horizon_days), clock=clock), store=store)
+    return make
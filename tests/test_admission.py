@@ -0,0 +1,145 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from agent.scheduling_agent import SchedulingAgent
+from conftest import Clock
+from utils.admission import AdmissionController, AdmissionMiddleware, Overloaded, RateLimiter
+
+
+class TestAdmissionController:
+
+    @pytest.mark.asyncio
+    async def test_limit_and_fifo_handoff(self):
+        controller = AdmissionController(max_in_flight=2, max_queue=10, queue_timeout=1)
+        order, active, peak = [], [0], [0]
+
+        async def work(i):
+            async with controller.admit():
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                order.append(i)
+                await asyncio.sleep(0.005)
+                active[0] -= 1
+
+        await asyncio.gather(*(work(i) for i in range(8)))
+        assert peak[0] == 2 and order == list(range(8))
+        assert controller.stats()["in_flight"] == 0 and controller.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_is_rejected_immediately(self):
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1)
+        await controller.acquire()
+        queued = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as exc:
+            await controller.acquire()
+        assert (exc.value.status, exc.value.reason) == (503, "queue_full")
+        controller.release()
+        await queued
+        assert controller.in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_deadline_and_cancel_leave_no_waiters(self):
+        controller = AdmissionController(max_in_flight=1, max_queue=5, queue_timeout=0.01)
+        await controller.acquire()
+        with pytest.raises(Overloaded) as exc:
+            await controller.acquire()
+        assert exc.value.reason == "deadline"
+
+        waiting = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert controller.queued == 0
+        controller.release()
+        assert controller.in_flight == 0
+
+
+class TestRateLimiter:
+
+    def test_burst_then_refill(self):
+        clock = Clock()
+        limiter = RateLimiter(rate=2, burst=3, clock=clock)
+        for _ in range(3):
+            limiter.check("a")
+        with pytest.raises(Overloaded) as exc:
+            limiter.check("a")
+        assert exc.value.status == 429 and exc.value.retry_after == pytest.approx(0.5)
+        limiter.check("b")
+        clock.now = 0.5
+        limiter.check("a")
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.delenv("ENABLE_RATE_LIMITING", raising=False)
+        assert RateLimiter.from_env() is None
+        monkeypatch.setenv("ENABLE_RATE_LIMITING", "True")
+        monkeypatch.setenv("RATE_LIMIT_REQUESTS_PER_MINUTE", "120")
+        assert RateLimiter.from_env().rate == 2
+
+
+def _app(controller, limiter=None):
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=controller, limiter=limiter, prefixes=("/chat",))
+
+    @app.get("/chat/slow")
+    async def slow():
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    return app
+
+
+class TestAdmissionMiddleware:
+
+    @pytest.mark.asyncio
+    async def test_sheds_with_503_and_retry_after(self):
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1)
+        transport = httpx.ASGITransport(app=_app(controller))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            responses = await asyncio.gather(*(client.get("/chat/slow") for _ in range(4)),
+                                             client.get("/health"))
+        codes = sorted(r.status_code for r in responses[:4])
+        assert codes == [200, 200, 503, 503]
+        shed = next(r for r in responses if r.status_code == 503)
+        assert shed.headers["retry-after"] == "1" and shed.json()["reason"] == "queue_full"
+        assert responses[4].status_code == 200 and controller.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_client_gets_429(self):
+        limiter = RateLimiter(rate=0.5, burst=2, clock=Clock())
+        transport = httpx.ASGITransport(app=_app(AdmissionController(), limiter))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            codes = [(await client.get("/chat/slow")).status_code for _ in range(3)]
+            last = await client.get("/chat/slow")
+        assert codes == [200, 200, 429]
+        assert last.headers["retry-after"] == "2"
+
+
+class TestSessionOrdering:
+
+    @pytest.mark.asyncio
+    async def test_turns_of_one_session_never_overlap(self, monkeypatch):
+        agent = SchedulingAgent()
+        events = []
+
+        async def reply(context, message, intent):
+            events.append(("start", context.session_id, message))
+            await asyncio.sleep(0.002)
+            events.append(("end", context.session_id, message))
+            yield message
+
+        monkeypatch.setattr(agent, "_reply", reply)
+        await asyncio.gather(*(agent.process_message(f"m{i}", "s") for i in range(5)),
+                             agent.process_message("other", "t"))
+        own = [e for e in events if e[1] == "s"]
+        assert own == [(kind, "s", f"m{i}") for i in range(5) for kind in ("start", "end")]
+        # Another session is not held up behind "s".
+        assert events.index(("start", "t", "other")) < events.index(("end", "s", "m0"))
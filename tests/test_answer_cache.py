@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+
+from conftest import Clock
+from rag.answer_cache import AnswerCache
+from rag.faq_rag import FAQRAG
+
+
+def unit(*values):
+    vec = np.asarray(values, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+class TestAnswerCache:
+
+    def test_near_duplicate_reuses_answer(self):
+        cache = AnswerCache(threshold=0.95)
+        cache.put("hours", unit(1, 0, 0), "9 to 5")
+        assert cache.get_similar(unit(1, 0.1, 0), "opening hours") == "9 to 5"
+        assert cache.get("opening hours") == "9 to 5"
+        assert cache.get_similar(unit(1, 1, 0)) is None
+        assert cache.stats()["semantic_hits"] == 1
+
+    def test_ring_is_bounded_and_ttl_applies(self):
+        clock = Clock()
+        cache = AnswerCache(semantic_size=2, ttl=10, clock=clock)
+        for i, vec in enumerate([unit(1, 0, 0), unit(0, 1, 0), unit(0, 0, 1)]):
+            cache.put(f"q{i}", vec, f"a{i}")
+        assert cache.get_similar(unit(1, 0, 0)) is None
+        assert cache.get_similar(unit(0, 0, 1)) == "a2"
+        clock.now = 11
+        assert cache.get_similar(unit(0, 0, 1)) is None
+
+    def test_clear(self):
+        cache = AnswerCache()
+        cache.put("hours", unit(1, 0), "9 to 5")
+        cache.clear()
+        assert cache.get("hours") is None and cache.get_similar(unit(1, 0)) is None
+
+
+class TestFAQRAGAnswerCache:
+
+    @pytest.fixture
+    def corpus(self, tmp_path):
+        path = tmp_path / "clinic_info.json"
+        path.write_text(json.dumps({"hours": "9AM - 5PM", "faqs": [
+            {"question": "Is there parking?", "answer": "Free parking."}]}))
+        return path
+
+    @pytest.fixture
+    def rag(self, corpus, tmp_path):
+        rag = FAQRAG(corpus_path=corpus, index_path=tmp_path / "missing")
+        rag.searches = 0
+        search = rag.v.search
+
+        def counting_search(*args, **kwargs):
+            rag.searches += 1
+            return search(*args, **kwargs)
+
+        rag.v.search = counting_search
+        return rag
+
+    @pytest.mark.asyncio
+    async def test_repeats_skip_retrieval(self, rag):
+        first = await rag.get_answer("Is there parking?")
+        assert first == "Free parking."
+        assert await rag.get_answer("  is there PARKING ") == first
+        assert rag.searches == 1
+
+    @pytest.mark.asyncio
+    async def test_reload_invalidates(self, rag, corpus):
+        assert await rag.get_answer("Is there parking?") == "Free parking."
+        corpus.write_text(json.dumps({"faqs": [{"question": "Is there parking?", "answer": "Paid parking."}]}))
+        rag.reload()
+        assert await rag.get_answer("Is there parking?") == "Paid parking."
@@ -0,0 +1,123 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from tools.availability_cache import AvailabilityCache
+from tools.availability_tool import AvailabilityTool
+from tools.booking_tool import BookingTool
+
+
+@pytest.fixture
+def tool(make_engine, clock):
+    return AvailabilityTool(engine=make_engine(), clock=clock)
+
+
+def _key(first, doctor=None, days=7):
+    return doctor, first, first + timedelta(days=days), 30, 5
+
+
+async def _value(slots, valid_until=None):
+    return slots, valid_until
+
+
+class TestAvailabilityCache:
+
+    @pytest.mark.asyncio
+    async def test_hit_after_miss_returns_copies(self, monday):
+        cache = AvailabilityCache()
+        first = await cache.get_or_compute(_key(monday), lambda: _value([{"id": "x"}]))
+        first[0]["id"] = "mutated"
+        assert await cache.get_or_compute(_key(monday), lambda: _value([])) == [{"id": "x"}]
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidation_is_precise(self, monday):
+        cache = AvailabilityCache()
+        keys = {
+            "any": _key(monday),
+            "a": _key(monday, "dr_a"),
+            "b": _key(monday, "dr_b"),
+            "a_next_week": _key(monday + timedelta(days=7), "dr_a"),
+        }
+        for key in keys.values():
+            await cache.get_or_compute(key, lambda: _value([]))
+
+        assert cache.invalidate("dr_a", monday + timedelta(days=2)) == 2
+        assert set(cache.entries.keys()) == {keys["b"], keys["a_next_week"]}
+        assert cache.invalidate("dr_a", monday + timedelta(days=7)) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_compute_once(self, monday):
+        cache = AvailabilityCache()
+        calls = 0
+
+        async def slow():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return [{"id": "x"}], None
+
+        results = await asyncio.gather(*(cache.get_or_compute(_key(monday), slow) for _ in range(50)))
+        assert calls == 1
+        assert all(r == [{"id": "x"}] for r in results)
+        assert cache.stats()["coalesced"] == 49
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_compute_is_not_cached(self, monday):
+        cache = AvailabilityCache()
+
+        async def racing():
+            cache.invalidate("dr_a", monday)
+            return [{"id": "stale"}], None
+
+        assert await cache.get_or_compute(_key(monday), racing) == [{"id": "stale"}]
+        assert len(cache.entries) == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_waiters_and_are_not_cached(self, monday):
+        cache = AvailabilityCache()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("engine down")
+
+        results = await asyncio.gather(*(cache.get_or_compute(_key(monday), failing) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await cache.get_or_compute(_key(monday), lambda: _value([])) == []
+
+
+class TestCachedAvailabilityTool:
+
+    @pytest.mark.asyncio
+    async def test_repeat_queries_hit(self, tool):
+        for _ in range(10):
+            await tool.get_available_slots(days_ahead=7, duration=30, limit=5)
+        assert tool.cache.stats()["hits"] == 9
+
+    @pytest.mark.asyncio
+    async def test_booking_and_cancel_invalidate(self, tool):
+        booking = BookingTool(tool)
+        first = (await tool.get_available_slots(days_ahead=7, limit=5))[0]
+        other_doctor = await tool.get_available_slots(days_ahead=7, doctor_id="dr_b")
+
+        result = await booking.book_appointment({"name": "Jo"}, first)
+        assert first not in await tool.get_available_slots(days_ahead=7, limit=5)
+        assert first["doctor_id"] == "dr_a"
+        assert await tool.get_available_slots(days_ahead=7, doctor_id="dr_b") == other_doctor
+        assert tool.cache.stats()["hits"] == 1
+
+        await booking.cancel_appointment(result["booking_id"])
+        assert (await tool.get_available_slots(days_ahead=7, limit=5))[0] == first
+
+    @pytest.mark.asyncio
+    async def test_first_slot_passing_expires_entry(self, tool, clock):
+        slots = await tool.get_available_slots(days_ahead=1, limit=5)
+        assert slots[0]["time"] == "9:00"
+
+        clock.now = datetime(2024, 1, 15, 9, 0, 30)
+        assert (await tool.get_available_slots(days_ahead=1, limit=5))[0]["time"] == "9:00"
+        clock.now = datetime(2024, 1, 15, 9, 1)
+        assert (await tool.get_available_slots(days_ahead=1, limit=5))[0]["time"] == "9:15"
+        assert tool.cache.stats()["misses"] == 2
@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from tools.availability_engine import DEFAULT_WEEKLY_HOURS, AvailabilityEngine, load_schedule
+from tools.availability_tool import AvailabilityTool, slot_key
+from tools.booking_tool import BookingTool
+
+
+@pytest.fixture
+def engine(make_engine):
+    return make_engine(granularity=15)
+
+
+class TestAvailabilityEngine:
+
+    def test_working_hours_follow_weekdays(self, engine):
+        assert engine.free[0, 0, 9 * 60:12 * 60].all()
+        assert not engine.free[0, 0, 12 * 60:].any()
+        assert engine.free[0, 1].sum() == 60
+        assert not engine.free[:, 2].any()
+        assert engine.free[0, 7].sum() == 180
+
+    def test_find_starts_respects_duration(self, engine, monday):
+        rows, days, starts = engine.find_starts(45, start_date=monday, days=1)
+        assert set(zip(rows.tolist(), starts.tolist())) == (
+            {(0, m) for m in range(9 * 60, 11 * 60 + 16, 15)} | {(1, 600), (1, 615)}
+        )
+        assert (days == 0).all()
+
+    def test_find_starts_is_ordered_by_day_time_doctor(self, engine, monday):
+        rows, days, starts = engine.find_starts(30, start_date=monday, days=8)
+        keys = list(zip(days.tolist(), starts.tolist(), rows.tolist()))
+        assert keys == sorted(keys)
+        assert days.max() == 7
+
+    def test_reserve_and_release(self, engine, monday):
+        assert engine.reserve("dr_b", monday, 600, 30)
+        assert not engine.reserve("dr_b", monday, 615, 30)
+        rows, _, starts = engine.find_starts(30, start_date=monday, days=1, doctor_ids=["dr_b"])
+        assert starts.tolist() == [630]
+
+        np.testing.assert_array_equal(engine.blocks, engine._fold(engine.free, 15))
+
+        engine.release("dr_b", monday, 600, 30)
+        np.testing.assert_array_equal(engine.blocks, engine._fold(engine.free, 15))
+        _, _, starts = engine.find_starts(30, start_date=monday, days=1, doctor_ids=["dr_b"])
+        assert starts.tolist() == [600, 615, 630]
+
+    def test_durations_off_the_granularity_grid(self, engine, monday):
+        engine.reserve("dr_b", monday, 640, 5)
+        _, _, starts = engine.find_starts(20, start_date=monday, days=1, doctor_ids=["dr_b"])
+        assert starts.tolist() == [600, 615]
+
+    def test_release_never_frees_non_working_minutes(self, engine, monday):
+        engine.release("dr_b", monday, 9 * 60, 180)
+        assert engine.free[1, 0].sum() == 60
+
+    def test_reserve_outside_window_or_hours_fails(self, engine, monday):
+        assert not engine.reserve("dr_a", monday - timedelta(days=1), 600, 30)
+        assert not engine.reserve("dr_a", monday + timedelta(days=30), 600, 30)
+        assert not engine.reserve("dr_a", monday, 11 * 60 + 45, 30)
+        assert not engine.reserve("unknown", monday, 600, 30)
+
+    def test_not_before_hides_past_starts(self, engine, monday):
+        _, days, starts = engine.find_starts(30, start_date=monday, days=2,
+                                             not_before=datetime(2024, 1, 15, 11, 10))
+        assert list(zip(days.tolist(), starts.tolist()))[0] == (0, 11 * 60 + 15)
+
+    def test_roll_keeps_bookings_and_appends_days(self, engine, monday):
+        engine.reserve("dr_a", monday + timedelta(days=1), 9 * 60, 30)
+        engine.roll(monday + timedelta(days=1))
+        assert engine.base == monday + timedelta(days=1)
+        assert engine.free.shape == (2, 14, 1440)
+        assert engine.free[0, 0].sum() == 30
+        assert engine.free[0, 13].sum() == 180
+
+    def test_legacy_schedule_file(self, tmp_path):
+        path = tmp_path / "doctor_schedule.json"
+        path.write_text('{"doctor": "Dr. Smith", "specialization": "General Physician", "slots": []}')
+        schedule = load_schedule(path)
+        assert schedule["doctors"][0]["name"] == "Dr. Smith"
+        assert AvailabilityEngine.from_file(path).free.any()
+
+
+class TestAvailabilityTool:
+
+    @pytest.fixture
+    def tool(self, make_engine, clock):
+        return AvailabilityTool(engine=make_engine(), clock=clock)
+
+    @pytest.mark.asyncio
+    async def test_slot_dicts(self, tool):
+        slots = await tool.get_available_slots(days_ahead=14, duration=30, limit=3)
+        assert len(slots) == 3
+        for slot in slots:
+            assert {"id", "date", "time", "duration", "doctor_id", "doctor"} <= slot.keys()
+            assert slot["duration"] == 30
+        assert slot_key(slots[0])[0] in ("dr_a", "dr_b")
+
+    @pytest.mark.asyncio
+    async def test_booking_removes_slot_and_cancel_restores_it(self, tool):
+        booking = BookingTool(tool)
+        slots = await tool.get_available_slots(days_ahead=14, duration=30, doctor_id="dr_b")
+        first = slots[0]
+
+        result = await booking.book_appointment({"name": "Jo"}, first)
+        assert result["success"]
+        assert first["id"] not in [s["id"] for s in await tool.get_available_slots(days_ahead=14, doctor_id="dr_b")]
+        assert not (await booking.book_appointment({"name": "Al"}, first))["success"]
+
+        assert (await booking.cancel_appointment(result["booking_id"]))["success"]
+        assert first in await tool.get_available_slots(days_ahead=14, doctor_id="dr_b")
+
+    @pytest.mark.asyncio
+    async def test_default_schedule_file_loads(self):
+        tool = AvailabilityTool()
+        assert len(tool.engine.doctors) >= 1
+        slots = await tool.get_available_slots(days_ahead=7, duration=45, limit=5)
+        assert all(s["duration"] == 45 for s in slots)
+        assert np.all(tool.engine.free <= tool.engine.working)
+
+
+def _brute_best(engine, duration, k, target_day=None, target_minute=None, band=None, day_weight=240):
+    rows, days, starts = engine.find_starts(duration)
+    lo, hi = band or (0, 1440)
+    target = lo if target_minute is None else target_minute
+    target_offset = (target_day - engine.base).days if target_day else 0
+    ranked = sorted((day_weight * abs(d - target_offset) + abs(s - target), d, s, r)
+                    for r, d, s in zip(rows.tolist(), days.tolist(), starts.tolist()) if lo <= s < hi)
+    return [(c, r, d, s) for c, d, s, r in ranked[:k]]
+
+
+class TestBestStarts:
+
+    @pytest.fixture
+    def busy_engine(self, make_engine, monday):
+        import random
+
+        engine = make_engine([{"id": f"dr_{i}", "weekly_hours": DEFAULT_WEEKLY_HOURS} for i in range(8)])
+        rng = random.Random(2)
+        for _ in range(300):
+            engine.reserve(f"dr_{rng.randrange(8)}", monday + timedelta(days=rng.randrange(14)),
+                           rng.randrange(32, 72) * 15, rng.choice([15, 30, 45]))
+        return engine
+
+    @pytest.mark.parametrize("duration, k, target_offset, target_minute, band", [
+        (30, 10, None, None, None),
+        (45, 5, 4, 14 * 60, None),
+        (60, 20, None, 14 * 60 + 7, (12 * 60, 17 * 60)),
+        (15, 40, 10, None, (0, 12 * 60)),
+        (20, 10, 2, 9 * 60 + 10, None),
+    ])
+    def test_matches_exhaustive_ranking(self, busy_engine, monday, duration, k, target_offset, target_minute, band):
+        target_day = None if target_offset is None else monday + timedelta(days=target_offset)
+        got = busy_engine.best_starts(duration, k, target_day=target_day, target_minute=target_minute, band=band)
+        assert got == _brute_best(busy_engine, duration, k, target_day, target_minute, band)
+
+    def test_tracks_bookings(self, engine, monday):
+        assert engine.best_starts(30, 1, target_minute=10 * 60)[0][1:] == (0, 0, 600)
+        engine.reserve("dr_a", monday, 600, 30)
+        engine.reserve("dr_b", monday, 600, 30)
+        assert [f[1:] for f in engine.best_starts(30, 2, target_minute=10 * 60)] == [(0, 0, 570), (0, 0, 630)]
+        engine.release("dr_a", monday, 600, 30)
+        assert engine.best_starts(30, 1, target_minute=10 * 60)[0][1:] == (0, 0, 600)
+
+    def test_band_window_and_not_before(self, engine, monday):
+        found = engine.best_starts(30, 50, days=1, band=(10 * 60, 11 * 60),
+                                   not_before=datetime(2024, 1, 15, 10, 20))
+        assert [(r, s) for _, r, _, s in found] == [(0, 630), (1, 630), (0, 645)]
+        assert engine.best_starts(30, 5, start_date=monday + timedelta(days=20)) == []
+
+
+class TestFindBestSlots:
+
+    @pytest.mark.asyncio
+    async def test_ranked_by_preference(self, make_engine, clock, monday):
+        tool = AvailabilityTool(engine=make_engine(), clock=clock)
+        slots = await tool.find_best_slots(k=3, duration=30, preferred_date=monday + timedelta(days=1),
+                                           preferred_time=9 * 60 + 30)
+        assert [(s["date"], s["time"]) for s in slots] == [
+            ("2024-01-16", "9:30"), ("2024-01-16", "9:15"), ("2024-01-16", "9:00")]
+
+        afternoon = await tool.find_best_slots(k=3, band="afternoon")
+        assert afternoon == []  # nobody works afternoons
+        only_b = await tool.find_best_slots(k=10, doctor_id="dr_b")
+        assert {s["doctor_id"] for s in only_b} == {"dr_b"}
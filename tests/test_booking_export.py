@@ -0,0 +1,120 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import chat
+from main import app
+from tools.booking_export import CSV_COLUMNS, csv_lines, iter_bookings, main, ndjson_lines
+from tools.booking_store import MemoryBookingStore, SQLiteBookingStore, booking_number, make_record
+
+
+@pytest.fixture
+def fill(patient, monday, make_slot):
+    """``fill(store, n)`` books ``n`` slots, ten a day from ``monday``, alternating dr_b and dr_a."""
+    async def fill(store, n=30):
+        ids = []
+        for i in range(n):
+            slot = make_slot("dr_a" if i % 2 else "dr_b", monday + timedelta(days=i // 10), 540 + 30 * (i % 10),
+                             appointment_type="follow_up" if i % 3 == 0 else "consultation")
+            ids.append(await store.book(make_record(patient, slot)))
+        return ids
+    return fill
+
+
+async def collect(gen):
+    return [item async for item in gen]
+
+
+class TestIterBookings:
+
+    @pytest.mark.asyncio
+    async def test_pages_through_everything_in_id_order(self, store, fill):
+        ids = await fill(store)
+        await store.cancel(ids[4])
+        records = await collect(iter_bookings(store, page_size=7))
+        assert [r["booking_id"] for r in records] == ids
+        confirmed = await collect(iter_bookings(store, page_size=7, status="confirmed"))
+        assert ids[4] not in [r["booking_id"] for r in confirmed] and len(confirmed) == 29
+
+    @pytest.mark.asyncio
+    async def test_filters(self, store, fill, monday):
+        await fill(store)
+        records = await collect(iter_bookings(store, page_size=4, date_from=(monday + timedelta(days=1)).isoformat(),
+                                              date_to=(monday + timedelta(days=1)).isoformat(), doctor_id="dr_a",
+                                              appointment_type="follow_up", status=None))
+        assert records and all(r["date"] == "2024-01-16" and r["doctor_id"] == "dr_a"
+                               and r["appointment_type"] == "follow_up" for r in records)
+        assert len(records) == len([i for i in range(10, 20) if i % 2 and i % 3 == 0])
+
+    @pytest.mark.asyncio
+    async def test_resume_from_last_seen_id(self, store, fill):
+        ids = await fill(store)
+        head = []
+        async for record in iter_bookings(store, page_size=5):
+            head.append(record["booking_id"])
+            if len(head) == 12:
+                break
+        tail = await collect(iter_bookings(store, booking_number(head[-1]), page_size=5))
+        assert head + [r["booking_id"] for r in tail] == ids
+
+    @pytest.mark.asyncio
+    async def test_memory_page_scan_is_bounded(self, fill):
+        store = MemoryBookingStore()
+        await fill(store, 10)
+        records, cursor = await store.page(0, 100, doctor_id="nobody")
+        assert records == [] and cursor is None
+
+
+class TestFormats:
+
+    @pytest.mark.asyncio
+    async def test_ndjson_and_csv(self, fill, patient):
+        store = MemoryBookingStore()
+        await fill(store, 3)
+        lines = await collect(ndjson_lines(iter_bookings(store)))
+        first = json.loads(lines[0])
+        assert (first["booking_id"], first["start"], first["end"], first["patient_email"]) == \
+            ("BOOK1", "09:00", "09:30", patient["email"])
+
+        text = "".join(await collect(csv_lines(iter_bookings(store))))
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert list(rows[0]) == CSV_COLUMNS
+        assert [r["booking_id"] for r in rows] == ["BOOK1", "BOOK2", "BOOK3"]
+
+    def test_cli(self, tmp_path, fill):
+        db = tmp_path / "b.db"
+        store = SQLiteBookingStore(str(db))
+        asyncio.run(fill(store, 5))
+        store.close()
+        out = tmp_path / "out.csv"
+        main(["--database", f"sqlite:///{db}", "--format", "csv", "--doctor", "dr_b", "--out", str(out)])
+        rows = list(csv.DictReader(out.open()))
+        assert [r["booking_id"] for r in rows] == ["BOOK1", "BOOK3", "BOOK5"]
+
+
+class TestExportEndpoint:
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        store = MemoryBookingStore()
+        monkeypatch.setattr(chat.agent.booking_tool, "store", store)
+        return TestClient(app), store
+
+    def test_streams_with_filters_and_cursor(self, client, fill):
+        client, store = client
+        asyncio.run(fill(store, 12))
+        res = client.get("/bookings/export", params={"doctor_id": "dr_a", "cursor": "BOOK4"})
+        assert res.status_code == 200 and res.headers["content-type"].startswith("application/x-ndjson")
+        ids = [json.loads(line)["booking_id"] for line in res.text.splitlines()]
+        assert ids == ["BOOK6", "BOOK8", "BOOK10", "BOOK12"]
+
+        res = client.get("/bookings/export", params={"format": "csv", "date_to": "2024-01-15"})
+        assert res.headers["content-type"].startswith("text/csv")
+        assert len(res.text.splitlines()) == 11
+
+        assert client.get("/bookings/export", params={"cursor": "nope"}).status_code == 400
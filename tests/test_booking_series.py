@@ -0,0 +1,149 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import chat
+from main import app
+from tools.availability_tool import AvailabilityTool, series_slots
+from tools.booking_store import MemoryBookingStore, make_record
+from tools.booking_tool import SLOT_STARTED, BookingTool
+
+
+@pytest.fixture
+def doctors():
+    return [
+        {"id": "dr_a", "name": "Dr. A", "weekly_hours": {"tuesday": [["09:00", "12:00"]]}},
+        {"id": "dr_b", "name": "Dr. B", "weekly_hours": {"monday": [["08:00", "18:00"]]}},
+    ]
+
+
+@pytest.fixture
+def tuesday(monday):
+    return monday + timedelta(days=1)
+
+
+@pytest.fixture
+def tool(store, make_tool):
+    return make_tool(horizon_days=70, store=store)
+
+
+class TestFreeMany:
+
+    def test_matches_is_free(self, monday, tuesday, make_engine):
+        engine = make_engine()
+        engine.reserve("dr_a", tuesday, 600, 30)
+        rng = random.Random(3)
+        slots = [(rng.choice(["dr_a", "dr_b", "dr_x"]), monday + timedelta(days=rng.randrange(-2, 16)),
+                  rng.randrange(0, 1440, 5), rng.choice([15, 30, 45, 60])) for _ in range(500)]
+        expected = [engine.is_free(*slot) for slot in slots]
+        assert engine.free_many(*zip(*slots)).tolist() == expected
+        assert any(expected)
+
+
+class TestBookSeries:
+
+    @pytest.mark.asyncio
+    async def test_books_every_occurrence(self, tool, tuesday, patient):
+        slots = series_slots("dr_a", tuesday, "9:00", 30, 8, appointment_type="follow_up")
+        result = await tool.book_series(patient, slots)
+        assert result["success"] and len(result["booking_ids"]) == 8
+        assert [s["date"] for s in slots][-1] == (tuesday + timedelta(weeks=7)).isoformat()
+        assert not any(tool.availability.are_free(slots))
+        booking = await tool.store.get(result["booking_ids"][3])
+        assert booking["date"] == slots[3]["date"] and booking["appointment_type"] == "follow_up"
+
+    @pytest.mark.asyncio
+    async def test_conflict_books_nothing_and_offers_nearest(self, tool, tuesday, patient):
+        slots = series_slots("dr_a", tuesday, "9:00", 30, 8)
+        taken = await tool.book_appointment({"email": "other@email.com"}, slots[2])
+        result = await tool.book_series(patient, slots)
+
+        assert not result["success"]
+        assert [c["index"] for c in result["conflicts"]] == [2]
+        alternative = result["conflicts"][0]["alternative"]
+        assert (alternative["date"], alternative["time"]) == (slots[2]["date"], "9:30")
+        assert await tool.store.by_patient(patient["email"]) == []
+        assert tool.availability.are_free(slots) == [True, True, False] + [True] * 5
+        assert taken["success"]
+
+    @pytest.mark.asyncio
+    async def test_store_conflict_is_all_or_nothing(self, tool, tuesday, patient):
+        # Slots without a doctor are not tracked by the engine, only checked by the store.
+        slots = [{"date": (tuesday + timedelta(weeks=i)).isoformat(), "time": "9:00",
+                  "duration": 30} for i in range(4)]
+        await tool.store.book(make_record(patient, slots[3]))
+        result = await tool.book_series(patient, slots)
+        assert [c["index"] for c in result["conflicts"]] == [3]
+        assert len(await tool.store.by_patient(patient["email"])) == 1
+
+        overlapping = [slots[0], {**slots[0], "time": "9:15"}]
+        ids, clashes = await tool.store.book_many([make_record(patient, s) for s in overlapping])
+        assert ids is None and clashes == [1]
+
+    @pytest.mark.asyncio
+    async def test_grows_window_over_bookings_already_in_store(self, tool, tuesday, patient):
+        slots = series_slots("dr_a", tuesday, "9:00", 30, 14)
+        assert tool.availability.engine.day_of(69) < date.fromisoformat(slots[12]["date"])
+        # Booked past this worker's window, e.g. by another worker that had already grown its own.
+        await tool.store.book(make_record({"email": "other@email.com"}, slots[12]))
+
+        result = await tool.book_series(patient, slots)
+        assert [c["index"] for c in result["conflicts"]] == [12]
+        assert result["conflicts"][0]["alternative"]["time"] == "9:30"
+        result = await tool.book_series(patient, series_slots("dr_a", tuesday, "10:00", 30, 14))
+        assert result["success"] and not tool.availability.is_free(slots[12])
+        assert tool.availability.engine.horizon_days == 93
+
+    @pytest.mark.asyncio
+    async def test_started_occurrence_books_nothing(self, tool, monday, patient, clock):
+        clock.now = clock.now.replace(hour=12)
+        result = await tool.book_series(patient, series_slots("dr_b", monday, "11:30", 30, 3))
+        assert result == {**SLOT_STARTED, "started": [0]}
+        assert await tool.store.by_patient(patient["email"]) == []
+
+    @pytest.mark.asyncio
+    async def test_idempotent_retry(self, tool, tuesday, patient):
+        slots = series_slots("dr_a", tuesday, "10:00", 30, 4)
+        first = await tool.book_series(patient, slots, idempotency_key="series-1")
+        retry = await tool.book_series(patient, slots, idempotency_key="series-1")
+        assert first == retry and first["success"]
+        assert len(await tool.store.by_patient(patient["email"])) == 4
+
+
+class TestSeriesEndpoint:
+
+    def test_created_then_conflict(self, monkeypatch, tuesday, patient, make_tool):
+        monkeypatch.setattr(chat.agent, "booking_tool", make_tool(horizon_days=70))
+        client = TestClient(app)
+        body = {"patient": patient, "doctor_id": "dr_a", "start_date": tuesday.isoformat(), "time": "11:00",
+                "occurrences": 6}
+        created = client.post("/bookings/series", json=body)
+        assert created.status_code == 200 and len(created.json()["booking_ids"]) == 6
+
+        clash = client.post("/bookings/series", json={**body, "occurrences": 8})
+        assert clash.status_code == 409
+        assert [c["index"] for c in clash.json()["conflicts"]] == list(range(6))
+        assert client.post("/bookings/series", json={**body, "occurrences": 0}).status_code == 422
+        started = client.post("/bookings/series", json={**body, "start_date": (tuesday - timedelta(days=1)).isoformat(),
+                                                        "time": "6:00"})
+        assert started.status_code == 422 and started.json()["error"] == SLOT_STARTED["error"]
+
+    def test_shipped_schedule_books_series_past_horizon(self, monkeypatch, patient):
+        monkeypatch.setattr(chat.agent, "booking_tool", BookingTool(AvailabilityTool(), store=MemoryBookingStore()))
+        client = TestClient(app)
+        today = date.today()
+        tuesday = today + timedelta(days=(1 - today.weekday()) % 7 or 7)
+        body = {"patient": patient, "doctor_id": "dr_smith", "start_date": tuesday.isoformat(), "time": "9:00",
+                "occurrences": 8}
+        eight = client.post("/bookings/series", json=body)
+        assert eight.status_code == 200 and len(eight.json()["booking_ids"]) == 8
+
+        year = client.post("/bookings/series", json={**body, "time": "10:00", "occurrences": 52})
+        assert year.status_code == 200 and len(year.json()["booking_ids"]) == 52
+        assert client.post("/bookings/series", json=body).status_code == 409
+
+        too_far = client.post("/bookings/series", json={**body, "time": "11:00", "every_days": 28,
+                                                       "occurrences": 52})
+        assert too_far.status_code == 422 and "days ahead" in too_far.json()["detail"]
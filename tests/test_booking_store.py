@@ -0,0 +1,117 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from tools.availability_engine import DEFAULT_WEEKLY_HOURS
+from tools.booking_store import MemoryBookingStore, SQLiteBookingStore, make_record, open_booking_store
+
+
+@pytest.fixture
+def doctors():
+    return [{"id": "dr_a", "weekly_hours": DEFAULT_WEEKLY_HOURS}]
+
+
+class TestBookingStores:
+
+    @pytest.mark.asyncio
+    async def test_book_get_and_conflict(self, store, patient, make_slot):
+        booking_id = await store.book(make_record(patient, make_slot(appointment_type="follow_up")))
+        assert booking_id.startswith("BOOK")
+        record = await store.get(booking_id)
+        assert record["patient"] == patient
+        assert (record["start"], record["end"], record["appointment_type"]) == (600, 630, "follow_up")
+
+        assert await store.book(make_record(patient, make_slot(minute=615))) is None
+        assert await store.book(make_record(patient, make_slot(minute=630))) is not None
+        assert await store.book(make_record(patient, make_slot(doctor_id="dr_b", minute=615))) is not None
+
+    @pytest.mark.asyncio
+    async def test_cancel_frees_the_interval(self, store, patient, make_slot):
+        booking_id = await store.book(make_record(patient, make_slot()))
+        cancelled = await store.cancel(booking_id)
+        assert cancelled["status"] == "cancelled"
+        assert await store.cancel(booking_id) is None
+        assert await store.book(make_record(patient, make_slot())) is not None
+
+    @pytest.mark.asyncio
+    async def test_reschedule_moves_booking(self, store, patient, monday, make_slot):
+        first = await store.book(make_record(patient, make_slot(minute=600)))
+        await store.book(make_record(patient, make_slot(minute=700)))
+
+        assert await store.reschedule(first, make_record(patient, make_slot(minute=690))) is None
+        assert await store.reschedule(first, make_record(patient, make_slot(minute=615))) is not None
+        moved = await store.get(first)
+        assert (moved["start"], moved["end"]) == (615, 645)
+        assert [r["start"] for r in await store.by_doctor_day("dr_a", monday.isoformat())] == [615, 700]
+
+    @pytest.mark.asyncio
+    async def test_lookups(self, store, patient, monday, make_slot):
+        await store.book(make_record(patient, make_slot()))
+        await store.book(make_record({**patient, "email": "other@email.com"}, make_slot(doctor_id="dr_b")))
+        await store.book(make_record(patient, make_slot(day=monday + timedelta(days=1))))
+
+        assert len(await store.by_patient("wendy@email.com")) == 2
+        assert len(await store.by_date(monday.isoformat())) == 2
+        assert len(list(store.upcoming(monday + timedelta(days=1)))) == 1
+
+
+class TestSQLiteBookingStore:
+
+    @pytest.mark.asyncio
+    async def test_bookings_survive_reopen(self, tmp_path, patient, make_slot):
+        path = str(tmp_path / "bookings.db")
+        store = SQLiteBookingStore(path)
+        booking_id = await store.book(make_record(patient, make_slot()))
+        store.close()
+
+        reopened = open_booking_store(f"sqlite:///{path}")
+        assert (await reopened.get(booking_id))["patient"] == patient
+        assert reopened.pool._pool.get().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_restart_reseeds_availability(self, tmp_path, patient, make_slot, make_tool):
+        path = str(tmp_path / "bookings.db")
+
+        tool = make_tool(store=SQLiteBookingStore(path))
+        assert (await tool.book_appointment(patient, make_slot()))["success"]
+        tool.store.close()
+
+        restarted = make_tool(store=SQLiteBookingStore(path))
+        assert not restarted.availability.is_free(make_slot())
+        assert not (await restarted.book_appointment(patient, make_slot(minute=615)))["success"]
+        restarted.store.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_bookings_through_the_pool(self, tmp_path, patient, monday, make_slot, make_tool):
+        roster = [{"id": f"dr_{d}", "weekly_hours": DEFAULT_WEEKLY_HOURS} for d in range(5)]
+        tool = make_tool(roster, store=SQLiteBookingStore(str(tmp_path / "bookings.db"), pool_size=4))
+        attempts = [make_slot(f"dr_{i // 20 % 5}", minute=540 + (i % 20) * 15, duration=15) for i in range(400)]
+        results = await asyncio.gather(*(tool.book_appointment(patient, s) for s in attempts))
+
+        assert sum(r["success"] for r in results) == 100
+        for d in range(5):
+            starts = [r["start"] for r in await tool.store.by_doctor_day(f"dr_{d}", monday.isoformat())]
+            assert starts == list(range(540, 840, 15))
+        tool.store.close()
+
+    def test_memory_store_by_default(self):
+        assert isinstance(open_booking_store(""), MemoryBookingStore)
+
+
+class TestReschedule:
+
+    @pytest.mark.asyncio
+    async def test_reschedule_updates_availability(self, patient, make_slot, make_tool):
+        tool = make_tool()
+        booking = await tool.book_appointment(patient, make_slot())
+
+        result = await tool.reschedule_appointment(booking["booking_id"], make_slot(minute=615))
+        assert result["success"]
+        assert not tool.availability.is_free(make_slot(minute=615))
+        assert tool.availability.is_free(make_slot(minute=600, duration=15))
+
+        other = await tool.book_appointment(patient, make_slot(minute=700))
+        assert not (await tool.reschedule_appointment(other["booking_id"], make_slot(minute=630)))["success"]
+        assert not tool.availability.is_free(make_slot(minute=700))
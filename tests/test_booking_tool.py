@@ -0,0 +1,197 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+import pytest
+
+from agent.scheduling_agent import SchedulingAgent
+from tools.availability_engine import DEFAULT_WEEKLY_HOURS
+from tools.availability_tool import slot_key
+from tools.booking_store import SQLiteBookingStore
+from tools.booking_tool import SLOT_STARTED
+
+
+@pytest.fixture
+def doctors():
+    return [{"id": f"dr_{i}", "weekly_hours": DEFAULT_WEEKLY_HOURS} for i in range(4)]
+
+
+class TestBookingTool:
+
+    @pytest.fixture
+    def tool(self, make_tool):
+        return make_tool(horizon_days=14)
+
+    @pytest.mark.asyncio
+    async def test_second_claim_on_same_slot_fails(self, tool, patient, make_slot):
+        slot = make_slot("dr_0", minute=9 * 60)
+        first = await tool.book_appointment(patient, slot)
+        second = await tool.book_appointment(patient, slot)
+        assert first["success"] and not second["success"]
+
+    @pytest.mark.asyncio
+    async def test_overlapping_claim_fails_adjacent_succeeds(self, tool, patient, make_slot):
+        assert (await tool.book_appointment(patient, make_slot("dr_0", minute=600)))["success"]
+        assert not (await tool.book_appointment(patient, make_slot("dr_0", minute=615)))["success"]
+        assert (await tool.book_appointment(patient, make_slot("dr_0", minute=630)))["success"]
+        assert (await tool.book_appointment(patient, make_slot("dr_1", minute=600)))["success"]
+
+    @pytest.mark.asyncio
+    async def test_slots_outside_the_engine_still_conflict(self, tool, patient, monday):
+        slot = {"date": monday.isoformat(), "time": "9:00", "duration": 30}
+        assert (await tool.book_appointment(patient, slot))["success"]
+        assert not (await tool.book_appointment(patient, slot))["success"]
+
+    @pytest.mark.asyncio
+    async def test_started_slot_is_refused(self, tool, patient, make_slot, clock):
+        booking = await tool.book_appointment(patient, make_slot("dr_0", minute=11 * 60))
+        clock.now = clock.now.replace(hour=9, minute=30)
+        for minute in (9 * 60, 9 * 60 + 30):
+            assert await tool.book_appointment(patient, make_slot("dr_0", minute=minute)) == SLOT_STARTED
+        assert tool.availability.is_free(make_slot("dr_0", minute=9 * 60))
+        assert await tool.reschedule_appointment(booking["booking_id"], make_slot("dr_0", minute=9 * 60)) == \
+            SLOT_STARTED
+        assert (await tool.store.get(booking["booking_id"]))["start"] == 11 * 60
+        assert (await tool.book_appointment(patient, make_slot("dr_0", minute=9 * 60 + 45)))["success"]
+
+    @pytest.mark.asyncio
+    async def test_cancel_frees_slot(self, tool, patient, make_slot):
+        slot = make_slot("dr_2", minute=14 * 60, duration=45)
+        booking = await tool.book_appointment(patient, slot)
+        assert (await tool.cancel_appointment(booking["booking_id"]))["success"]
+        assert not (await tool.cancel_appointment(booking["booking_id"]))["success"]
+        assert (await tool.book_appointment(patient, slot))["success"]
+        assert not tool._locks
+
+    @pytest.mark.asyncio
+    async def test_concurrent_confirmations_never_double_book(self, tool, patient, monday, make_slot):
+        rng = random.Random(11)
+        attempts = [
+            make_slot(f"dr_{rng.randrange(4)}", monday + timedelta(days=rng.randrange(2) * 7),
+                      rng.randrange(36, 44) * 15, rng.choice([15, 30, 45, 60]))
+            for _ in range(5000)
+        ]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(tool.book_appointment(patient, s) for s in attempts))
+        elapsed = time.perf_counter() - start
+
+        booked = defaultdict(list)
+        for slot, result in zip(attempts, results):
+            if result["success"]:
+                doctor_id, d, begin, duration = slot_key(slot)
+                booked[(doctor_id, d)].append((begin, begin + duration))
+        for intervals in booked.values():
+            intervals.sort()
+            assert all(a[1] <= b[0] for a, b in zip(intervals, intervals[1:]))
+
+        successes = sum(r["success"] for r in results)
+        assert successes == len(tool.store.bookings) == len({r["booking_id"] for r in results if r["success"]})
+        assert 0 < successes < len(attempts)
+        print(f"\n{len(attempts)} confirmations, {successes} booked, {len(attempts) / elapsed:,.0f} confirmations/s")
+
+
+    @pytest.mark.asyncio
+    async def test_idempotency_key_replays_booking(self, tool, patient, make_slot):
+        slot = make_slot("dr_0", minute=9 * 60)
+        first, second = await asyncio.gather(tool.book_appointment(patient, slot, idempotency_key="k"),
+                                             tool.book_appointment(patient, slot, idempotency_key="k"))
+        assert first == second and first["success"]
+        assert len(tool.store.bookings) == 1
+
+        await tool.cancel_appointment(first["booking_id"])
+        again = await tool.book_appointment(patient, slot, idempotency_key="k")
+        assert again["success"] and again["booking_id"] != first["booking_id"]
+
+    @pytest.mark.asyncio
+    async def test_failed_claim_is_retried_once_slot_frees_up(self, tool, patient, make_slot):
+        slot = make_slot("dr_0", minute=9 * 60)
+        other = await tool.book_appointment({"email": "other@email.com"}, slot)
+        taken = await tool.book_appointment(patient, slot, idempotency_key="victim")
+        assert not taken["success"]
+        taken["error"] = "mutated by caller"
+
+        await tool.cancel_appointment(other["booking_id"])
+        retry = await tool.book_appointment(patient, slot, idempotency_key="victim")
+        assert retry["success"]
+        assert (await tool.book_appointment(patient, slot))["error"] == "Slot is no longer available"
+
+
+class TestWorkersSharingStore:
+
+    @pytest.mark.asyncio
+    async def test_each_worker_sees_the_others_writes(self, tmp_path, patient, monday, make_slot, make_tool):
+        path = str(tmp_path / "b.db")
+        a, b = (make_tool(horizon_days=14, store=SQLiteBookingStore(path)) for _ in range(2))
+        slot = make_slot("dr_0", minute=9 * 60)
+
+        booked = await a.book_appointment(patient, slot)
+        assert b.availability.is_free(slot)
+        assert await b.sync() == 1
+        assert not b.availability.is_free(slot)
+        listed = await b.availability.get_available_slots(start_date=monday, days_ahead=1, doctor_id="dr_0")
+        assert slot["time"] not in [s["time"] for s in listed]
+
+        # Cancelled on b, then booked again through a, whose engine still had it reserved.
+        await b.cancel_appointment(booked["booking_id"])
+        again = await a.book_appointment(patient, slot)
+        assert again["success"]
+        assert await b.sync() == 1 and not b.availability.is_free(slot)
+
+        # A claim the store refuses teaches the worker about the other's booking.
+        later = make_slot("dr_0", minute=10 * 60)
+        await a.book_appointment(patient, later)
+        assert not (await b.book_appointment(patient, later))["success"]
+        assert not b.availability.is_free(later)
+        a.store.close()
+        b.store.close()
+
+
+class TestConfirmFlow:
+
+    @pytest.mark.asyncio
+    async def test_full_booking_conversation(self):
+        agent = SchedulingAgent()
+        session = "flow"
+        await agent.process_message("Hello", session)
+        slots = await agent.process_message("I need a general consultation", session)
+        assert "1." in slots["response"]
+
+        chosen = agent.conversation_contexts[session].suggested_slots[0]
+        await agent.process_message(f"{chosen['date']} {chosen['time']}", session)
+        await agent.process_message(
+            "Name: John Doe\nPhone: 555-123-4567\nEmail: john@email.com\nReason: Checkup", session)
+        result = await agent.process_message("yes", session)
+
+        assert result["response"].startswith("Booked! ID: BOOK")
+        context = agent.conversation_contexts[session]
+        assert context.booking_confirmed and context.current_phase == "booked"
+        booking = next(iter(agent.booking_tool.store.bookings.values()))
+        assert booking["slot"]["appointment_type"] == "general_consultation"
+
+        thanks = await agent.process_message("thanks!", session)
+        assert thanks["response"].startswith(f"You're booked (ID: {context.booking_id}).")
+        await agent.process_message("I'd like to book another", session)
+        assert context.current_phase == "understanding" and context.booking_id is None
+        assert booking["status"] == "confirmed"
+
+    @pytest.mark.asyncio
+    async def test_retried_confirmation_books_once(self, tmp_path):
+        agent = SchedulingAgent()
+        # The SQLite store hands the write to a thread, so the retry arrives mid-booking;
+        # it waits for the first turn and gets the same confirmation replayed.
+        agent.booking_tool.store = SQLiteBookingStore(str(tmp_path / "b.db"))
+        session = "retry"
+        await agent.process_message("Hello", session)
+        await agent.process_message("I need a general consultation", session)
+        await agent.process_message("1", session)
+        await agent.process_message(
+            "Name: John Doe\nPhone: 555-123-4567\nEmail: john@email.com\nReason: Checkup", session)
+
+        first, retry = await asyncio.gather(agent.process_message("yes", session),
+                                            agent.process_message("yes", session))
+        assert first == retry and first["response"].startswith("Booked! ID: BOOK")
+        assert len(await agent.booking_tool.store.by_patient("john@email.com")) == 1
+        agent.booking_tool.store.close()
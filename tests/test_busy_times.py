@@ -0,0 +1,127 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from api.busy_times import BusyTimes
+from api.calendly_fake import create_app
+from api.calendly_integration import CalendlyAPI
+
+
+class Upstream:
+    def __init__(self, delay=0.005, fail=False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+        self.on_call = None
+
+    async def __call__(self, start, end):
+        self.calls.append((start, end))
+        if self.on_call:
+            self.on_call()
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return {start: [{"start": f"{start}T09:00:00", "end": f"{start}T09:30:00"}]}
+
+
+class TestBusyTimes:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_for_a_date_share_one_call(self):
+        upstream = Upstream()
+        busy = BusyTimes(upstream)
+        results = await asyncio.gather(*(busy.get("2024-01-15") for _ in range(100)))
+        assert len(upstream.calls) == 1
+        assert all(r == results[0] for r in results) and len(results[0]) == 1
+        assert busy.stats()["coalesced"] == 99
+
+    @pytest.mark.asyncio
+    async def test_dates_are_batched_into_range_calls(self):
+        upstream = Upstream()
+        busy = BusyTimes(upstream, max_span=7)
+        days = ["2024-01-15", "2024-01-17", "2024-01-19", "2024-02-01"]
+        results = await asyncio.gather(*(busy.get(d) for d in days))
+        assert sorted(upstream.calls) == [("2024-01-15", "2024-01-19"), ("2024-02-01", "2024-02-01")]
+        assert results[1] == []  # only the range start is busy in this fake
+
+        # Gap days were fetched along the way.
+        await busy.get("2024-01-16")
+        assert len(upstream.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_cached_until_invalidated(self):
+        upstream = Upstream()
+        busy = BusyTimes(upstream)
+        for _ in range(5):
+            await busy.get("2024-01-15")
+        assert len(upstream.calls) == 1
+
+        busy.invalidate("2024-01-16")
+        await busy.get("2024-01-15")
+        assert len(upstream.calls) == 1
+        busy.invalidate("2024-01-15")
+        await busy.get("2024-01-15")
+        assert len(upstream.calls) == 2
+        busy.invalidate()
+        await busy.get("2024-01-15")
+        assert len(upstream.calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_fetch_racing_a_write_is_not_cached(self):
+        upstream = Upstream()
+        busy = BusyTimes(upstream)
+        upstream.on_call = lambda: busy.invalidate("2024-01-15")
+        await busy.get("2024-01-15")
+        upstream.on_call = None
+        await busy.get("2024-01-15")
+        assert len(upstream.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter_and_are_not_cached(self):
+        upstream = Upstream(fail=True)
+        busy = BusyTimes(upstream)
+        results = await asyncio.gather(*(busy.get("2024-01-15") for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        upstream.fail = False
+        assert len(await busy.get("2024-01-15")) == 1
+
+    @pytest.mark.asyncio
+    async def test_many_sessions_cut_upstream_qps(self):
+        upstream = Upstream(delay=0.001)
+        busy = BusyTimes(upstream)
+        rng = random.Random(3)
+
+        async def session():
+            for _ in range(5):
+                await busy.get(f"2024-01-{15 + rng.randrange(5)}")
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*(session() for _ in range(200)))
+        assert len(upstream.calls) <= 10  # vs. 1000 lookups
+
+
+class TestCalendlyBusyTimes:
+
+    @pytest.fixture
+    def api(self):
+        return CalendlyAPI(base_url="http://fake", token="t", transport=httpx.ASGITransport(app=create_app()))
+
+    @pytest.mark.asyncio
+    async def test_own_writes_invalidate(self, api):
+        assert await api.get_busy_times("2024-01-15") == []
+
+        booked = await api.book_appointment("dr_a_20240115_0930", {}, "follow_up")
+        booking_id = booked["booking_details"]["booking_id"]
+        assert [b["booking_id"] for b in await api.get_busy_times("2024-01-15")] == [booking_id]
+
+        assert await api.get_busy_times("2024-01-16") == []
+        await api.reschedule_appointment(booking_id, "dr_a_20240116_1000")
+        assert await api.get_busy_times("2024-01-15") == []
+        assert len(await api.get_busy_times("2024-01-16")) == 1
+
+        await api.cancel_appointment(booking_id)
+        assert await api.get_busy_times("2024-01-16") == []
+        assert api.busy.stats()["upstream_calls"] == 6
+        await api.close()
@@ -0,0 +1,122 @@
+import asyncio
+
+import httpx
+import pytest
+
+from api.calendly_fake import Faults, create_app
+from api.calendly_integration import CalendlyAPI, CalendlyError
+from conftest import Clock
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def _client(app, **kwargs):
+    kwargs.setdefault("backoff", 0.001)
+    return CalendlyAPI(base_url="http://fake", token="t", transport=httpx.ASGITransport(app=app), **kwargs)
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_then_probes(self):
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        breaker.check()
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+
+        clock.now = 10
+        breaker.check()  # the single half-open probe
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        clock.now = 20
+        breaker.check()
+        breaker.record_success()
+        assert breaker.state == "closed" and breaker.rejected == 2
+
+
+class TestCalendlyAPI:
+
+    @pytest.mark.asyncio
+    async def test_unconfigured_keeps_stub_behaviour(self):
+        api = CalendlyAPI(token="")
+        assert await api.get_busy_times("2024-01-15") == []
+        assert await api.check_slot_availability("x", "follow_up") == {"available": True, "slot": None}
+        assert (await api.book_appointment("x", {}, "follow_up"))["booking_details"]["booking_id"] == "CL-x"
+        assert (await api.cancel_appointment("CL-x"))["success"]
+
+    @pytest.mark.asyncio
+    async def test_booking_round_trip(self):
+        api = _client(create_app())
+        booked = await api.book_appointment("dr_a_20240115_0930", {"name": "Jo"}, "follow_up")
+        booking_id = booked["booking_details"]["booking_id"]
+
+        busy = await api.get_busy_times("2024-01-15")
+        assert busy == [{"start": "2024-01-15T09:30:00", "end": "2024-01-15T10:00:00", "booking_id": booking_id}]
+        assert not (await api.check_slot_availability("dr_a_20240115_0930", "follow_up"))["available"]
+        assert not (await api.book_appointment("dr_a_20240115_0930", {}, "follow_up"))["success"]
+
+        assert (await api.reschedule_appointment(booking_id, "dr_a_20240116_0900"))["success"]
+        assert (await api.get_busy_range("2024-01-15", "2024-01-16")).keys() == {"2024-01-16"}
+        assert (await api.get_appointment_details(booking_id))["details"]["slot_id"] == "dr_a_20240116_0900"
+        assert (await api.cancel_appointment(booking_id))["success"]
+        assert not (await api.cancel_appointment(booking_id))["success"]
+        await api.close()
+
+    @pytest.mark.asyncio
+    async def test_reads_retry_through_transient_errors(self):
+        app = create_app(Faults(error_rate=0.3), seed=1)
+        api = _client(app, retries=5)
+        for _ in range(20):
+            assert await api.get_busy_range("2024-01-15", "2024-01-15") == {}
+        assert api.attempts > 20 and api.failures == 0
+
+    @pytest.mark.asyncio
+    async def test_writes_do_not_retry_server_errors(self):
+        app = create_app(Faults(error_rate=1.0))
+        api = _client(app, retries=3)
+        assert not (await api.book_appointment("dr_a_20240115_0930", {}, "follow_up"))["success"]
+        assert app.state.requests == 1
+
+    @pytest.mark.asyncio
+    async def test_deadline_covers_slow_upstream(self):
+        api = _client(create_app(Faults(latency=0.5)), timeout=0.05)
+        with pytest.raises(CalendlyError, match="timed out"):
+            await api.get_busy_times("2024-01-15")
+
+    @pytest.mark.asyncio
+    async def test_circuit_fails_fast_while_upstream_is_down(self):
+        app = create_app(Faults(error_rate=1.0))
+        api = _client(app, retries=0, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+        for _ in range(10):
+            with pytest.raises(CalendlyError):
+                await api.get_busy_times("2024-01-15")
+        assert app.state.requests == 3
+        assert api.stats()["circuit"] == "open" and api.stats()["circuit_rejected"] == 7
+
+    @pytest.mark.asyncio
+    async def test_client_errors_do_not_trip_the_circuit(self):
+        api = _client(create_app(), breaker=CircuitBreaker(failure_threshold=1))
+        for _ in range(3):
+            assert not (await api.get_appointment_details("missing"))["success"]
+        assert api.breaker.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_in_flight_is_capped(self):
+        app = create_app(Faults(latency=0.02))
+        api = _client(app, max_in_flight=4)
+        peak = 0
+
+        async def watch():
+            nonlocal peak
+            while True:
+                peak = max(peak, api.in_flight)
+                await asyncio.sleep(0.001)
+
+        watcher = asyncio.create_task(watch())
+        await asyncio.gather(*(api.get_busy_range("2024-01-15", "2024-01-15") for _ in range(20)))
+        watcher.cancel()
+        assert peak == 4 and api.in_flight == 0
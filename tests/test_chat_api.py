@@ -0,0 +1,209 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agent.context_backend import StaleContextError
+from api import chat
+from main import app
+from utils.admission import MAX_IN_FLIGHT, AdmissionController, RateLimiter
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def echo_agent(monkeypatch):
+    """Replaces the agent with one that records turn order and peak concurrency."""
+    seen, state = [], {"active": 0, "peak": 0}
+
+    async def process_message(message, session_id, user_id=None):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.001 * (hash(message) % 5))
+        seen.append((session_id, message))
+        state["active"] -= 1
+        if message == "boom":
+            raise RuntimeError("boom")
+        return {"response": message.upper()}
+
+    monkeypatch.setattr(chat.agent, "process_message", process_message)
+    return seen, state
+
+
+def _turns(sessions=20, per_session=5):
+    return [{"session_id": f"s{s}", "message": f"m{t}"} for t in range(per_session) for s in range(sessions)]
+
+
+class TestChatBatch:
+
+    def test_results_in_input_order_and_sessions_ordered(self, client, echo_agent):
+        seen, _ = echo_agent
+        turns = _turns()
+        body = client.post("/chat/batch", json={"requests": turns}).json()
+
+        assert [r["index"] for r in body["results"]] == list(range(len(turns)))
+        assert [r["response"] for r in body["results"]] == [t["message"].upper() for t in turns]
+        for s in range(20):
+            assert [m for sid, m in seen if sid == f"s{s}"] == [f"m{t}" for t in range(5)]
+
+    def test_concurrency_cap(self, client, echo_agent):
+        _, state = echo_agent
+        client.post("/chat/batch", json={"requests": _turns(), "concurrency": 3})
+        assert 1 < state["peak"] <= 3
+
+    def test_turns_are_admitted_against_in_flight_limit(self, client, echo_agent, monkeypatch):
+        _, state = echo_agent
+        monkeypatch.setattr(chat, "admission", AdmissionController(max_in_flight=2, max_queue=1000, queue_timeout=5))
+        results = client.post("/chat/batch", json={"requests": _turns(), "concurrency": MAX_IN_FLIGHT}).json()
+        assert all("response" in r for r in results["results"])
+        assert state["peak"] == 2 and chat.admission.in_flight == 0
+        too_wide = client.post("/chat/batch", json={"requests": _turns(), "concurrency": MAX_IN_FLIGHT + 1})
+        assert too_wide.status_code == 422
+
+    def test_rate_limit_charges_every_turn(self, client, echo_agent, monkeypatch):
+        monkeypatch.setattr(chat, "rate_limiter", RateLimiter(rate=0.1, burst=10, clock=lambda: 0.0))
+        turns = _turns(sessions=2, per_session=3)
+        assert client.post("/chat/batch", json={"requests": turns}).status_code == 200
+        limited = client.post("/chat/batch", json={"requests": turns})
+        assert limited.status_code == 429 and limited.headers["retry-after"] == "20"
+        assert client.post("/chat/batch", json={"requests": _turns(sessions=11, per_session=1)}).status_code == 413
+
+    def test_failed_turn_does_not_stop_session(self, client, echo_agent):
+        turns = [{"session_id": "a", "message": "boom"}, {"session_id": "a", "message": "next"}]
+        results = client.post("/chat/batch", json={"requests": turns}).json()["results"]
+        assert results[0]["error"] == "boom"
+        assert results[1]["response"] == "NEXT"
+
+    def test_ndjson_stream(self, client, echo_agent):
+        turns = _turns(sessions=3, per_session=2)
+        with client.stream("POST", "/chat/batch", json={"requests": turns, "stream": True}) as response:
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            rows = [json.loads(line) for line in response.iter_lines() if line]
+        assert [r["index"] for r in rows] == list(range(len(turns)))
+
+    def test_empty_batch(self, client):
+        assert client.post("/chat/batch", json={"requests": []}).json() == {"results": []}
+
+    def test_real_agent_conversation(self, client):
+        turns = [{"session_id": "real", "message": m} for m in ["Hello", "I need a checkup", "1"]]
+        results = client.post("/chat/batch", json={"requests": turns}).json()["results"]
+        assert results[-1]["response"] == "Please provide name, phone, email, reason."
+
+
+class TestIdempotency:
+
+    def test_header_replays_stored_response(self, client, echo_agent):
+        seen, _ = echo_agent
+        body = {"session_id": "idem", "message": "hi"}
+        first = client.post("/chat/", json=body, headers={"Idempotency-Key": "k1"})
+        retry = client.post("/chat/", json=body, headers={"Idempotency-Key": "k1"})
+        assert first.json() == retry.json() == {"response": "HI"}
+        assert seen == [("idem", "hi")]
+
+        client.post("/chat/", json=body)
+        assert len(seen) == 2
+
+    def test_key_reused_for_other_message_is_rejected(self, client, echo_agent):
+        client.post("/chat/", json={"session_id": "idem2", "message": "a"}, headers={"Idempotency-Key": "k"})
+        res = client.post("/chat/", json={"session_id": "idem2", "message": "b"}, headers={"Idempotency-Key": "k"})
+        assert res.status_code == 422
+
+    def test_batch_keys(self, client, echo_agent):
+        seen, _ = echo_agent
+        turns = [{"session_id": "idem3", "message": "x", "idempotency_key": "k"}] * 3
+        results = client.post("/chat/batch", json={"requests": turns}).json()["results"]
+        assert [r["response"] for r in results] == ["X"] * 3
+        assert seen == [("idem3", "x")]
+
+    def test_turn_lost_to_another_worker_asks_for_retry(self, client, monkeypatch):
+        async def process_message(message, session_id, user_id=None):
+            raise StaleContextError(f"Session {session_id!r} was updated by another worker")
+
+        monkeypatch.setattr(chat.agent, "process_message", process_message)
+        assert client.post("/chat/", json={"session_id": "stale", "message": "yes"}).status_code == 409
+
+    @pytest.fixture
+    def stale_once(self, monkeypatch):
+        """Streams one chunk, then loses the session save to another worker; later turns echo."""
+        calls = []
+
+        async def stream_message(message, session_id, user_id=None):
+            calls.append(message)
+            yield message.upper()
+            if len(calls) == 1:
+                raise StaleContextError(f"Session {session_id!r} was updated by another worker")
+
+        monkeypatch.setattr(chat.agent, "stream_message", stream_message)
+
+    def test_sse_turn_lost_to_another_worker_ends_with_error(self, client, stale_once):
+        events = _sse_events(client.post("/chat/stream", json={"session_id": "stale", "message": "yes"}).text)
+        assert events[0] == ("delta", {"text": "YES"})
+        assert events[-1][0] == "error" and events[-1][1]["status"] == 409
+        assert "done" not in [event for event, _ in events]
+        assert _sse_events(client.post("/chat/stream", json={"session_id": "stale", "message": "yes"}).text)[-1] \
+            == ("done", {"response": "YES"})
+
+    def test_websocket_turn_lost_to_another_worker_keeps_socket(self, client, stale_once):
+        with client.websocket_connect("/chat/ws?session_id=stale") as ws:
+            ws.send_text("yes")
+            assert ws.receive_json() == {"type": "delta", "text": "YES"}
+            error = ws.receive_json()
+            assert error["type"] == "error" and error["status"] == 409 and error["reason"] == "stale_context"
+            ws.send_text("yes")
+            assert ws.receive_json() == {"type": "delta", "text": "YES"}
+            assert ws.receive_json() == {"type": "done", "response": "YES"}
+
+
+def _sse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+class TestChatStreaming:
+
+    def test_sse_streams_each_slot(self, client):
+        client.post("/chat/", json={"session_id": "sse", "message": "Hello"})
+        body = client.post("/chat/stream", json={"session_id": "sse", "message": "I need a checkup"}).text
+        events = _sse_events(body)
+
+        deltas = [data["text"] for event, data in events if event == "delta"]
+        assert deltas[0] == "Here are available slots:"
+        assert len(deltas) == 6 and all(d.startswith(f"\n{i}. ") for i, d in enumerate(deltas[1:], 1))
+        assert events[-1] == ("done", {"response": "".join(deltas)})
+
+    def test_sse_get_matches_post(self, client):
+        body = client.get("/chat/stream", params={"session_id": "sse-get", "message": "Hello"}).text
+        assert _sse_events(body)[-1] == ("done", {"response": "Hello! What type of appointment do you need?"})
+
+    def test_stream_and_plain_reply_agree(self, client):
+        for session, path in [("plain", "/chat/"), ("streamed", "/chat/stream")]:
+            for message in ["Hello", "follow-up please"]:
+                response = client.post(path, json={"session_id": session, "message": message})
+            if path == "/chat/":
+                plain = response.json()["response"]
+            else:
+                streamed = _sse_events(response.text)[-1][1]["response"]
+        assert plain == streamed
+
+    def test_websocket_conversation(self, client):
+        with client.websocket_connect("/chat/ws?session_id=ws") as ws:
+            ws.send_text("Hello")
+            assert ws.receive_json() == {"type": "delta", "text": "Hello! What type of appointment do you need?"}
+            assert ws.receive_json()["type"] == "done"
+
+            ws.send_text(json.dumps({"message": "a physical exam"}))
+            frames = []
+            while not frames or frames[-1]["type"] != "done":
+                frames.append(ws.receive_json())
+            assert len(frames) == 7
+            assert frames[-1]["response"] == "".join(f["text"] for f in frames[:-1])
+
+            ws.send_text("2")
+            assert ws.receive_json()["text"] == "Please provide name, phone, email, reason."
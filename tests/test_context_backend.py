@@ -0,0 +1,118 @@
+import pytest
+
+from agent.context import ConversationContext
+from agent.context_backend import (
+    MemoryContextBackend, SQLiteContextBackend, StaleContextError, decode_context, encode_context,
+    open_context_backend,
+)
+from agent.scheduling_agent import SchedulingAgent
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'sessions.db'}"
+
+
+class TestEncoding:
+
+    def test_round_trip(self):
+        context = ConversationContext(
+            session_id="s1", user_id="u1", current_phase="confirm", appointment_type="follow_up",
+            patient_info={"name": "Jo", "email": "jo@email.com"},
+            suggested_slots=[{"id": "dr_a_20240115_0900", "date": "2024-01-15", "time": "9:00"}],
+            selected_slot={"id": "dr_a_20240115_0900"},
+        )
+        blob = encode_context(context)
+        assert decode_context(blob) == context
+        assert b"session_id" not in blob
+
+
+class TestSQLiteContextBackend:
+
+    @pytest.mark.asyncio
+    async def test_workers_share_state(self, db_url):
+        worker_a, worker_b = open_context_backend(db_url), open_context_backend(db_url)
+
+        context = await worker_a.load("s1", "u1")
+        context.current_phase = "slots"
+        await worker_a.save(context)
+
+        seen_by_b = await worker_b.load("s1")
+        assert seen_by_b.current_phase == "slots" and seen_by_b.user_id == "u1"
+        seen_by_b.current_phase = "patient"
+        await worker_b.save(seen_by_b)
+
+        assert (await worker_a.load("s1")).current_phase == "patient"
+        worker_a.close()
+        worker_b.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_turns_do_not_overwrite_each_other(self, db_url):
+        worker_a, worker_b = open_context_backend(db_url), open_context_backend(db_url)
+        await worker_a.save(await worker_a.load("s1"))
+
+        on_a, on_b = await worker_a.load("s1"), await worker_b.load("s1")
+        on_a.current_phase = "slots"
+        on_b.current_phase = "understanding"
+        await worker_a.save(on_a)
+        with pytest.raises(StaleContextError):
+            await worker_b.save(on_b)
+
+        reloaded = await worker_b.load("s1")
+        assert reloaded.current_phase == "slots"
+        reloaded.current_phase = "patient"
+        await worker_b.save(reloaded)
+        assert (await worker_a.load("s1")).current_phase == "patient"
+
+        # Two workers creating the same new session: the second loses too.
+        first, second = await worker_a.load("s2"), await worker_b.load("s2")
+        first.current_phase = second.current_phase = "understanding"
+        await worker_a.save(first)
+        with pytest.raises(StaleContextError):
+            await worker_b.save(second)
+        worker_a.close()
+        worker_b.close()
+
+    @pytest.mark.asyncio
+    async def test_read_through_cache_skips_decode_and_unchanged_writes(self, db_url):
+        backend = open_context_backend(db_url)
+        context = await backend.load("s1")
+        await backend.save(context)
+        for _ in range(3):
+            assert await backend.load("s1") is context
+            await backend.save(context)
+
+        stats = backend.stats()
+        assert stats["writes"] == 1 and stats["decodes"] == 0
+        backend.close()
+
+    @pytest.mark.asyncio
+    async def test_idle_sessions_are_swept(self, db_url):
+        backend = SQLiteContextBackend(db_url[len("sqlite:///"):], idle_ttl=-1)
+        old = await backend.load("old")
+        await backend.save(old)
+        new = await backend.load("new")
+        await backend.save(new)
+        with backend.pool.connection() as conn:
+            assert [r[0] for r in conn.execute("SELECT id FROM sessions")] == ["new"]
+        backend.close()
+
+    def test_memory_backend_by_default(self):
+        assert isinstance(open_context_backend("memory"), MemoryContextBackend)
+
+
+class TestAgentAcrossWorkers:
+
+    @pytest.mark.asyncio
+    async def test_conversation_alternates_between_workers(self, db_url):
+        workers = [SchedulingAgent(open_context_backend(db_url)) for _ in range(2)]
+        turns = ["Hello", "I need a follow-up"]
+        for i, message in enumerate(turns):
+            await workers[i % 2].process_message(message, "shared")
+
+        context = await workers[0].context_backend.load("shared")
+        assert context.current_phase == "slots"
+        assert context.appointment_type == "follow_up"
+        assert len(context.suggested_slots) > 0
+        for worker in workers:
+            worker.context_backend.close()
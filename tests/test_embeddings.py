@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from rag.embeddings import Embeddings, normalize_text
+
+
+class TestEmbeddings:
+
+    @pytest.fixture
+    def embeddings(self):
+        return Embeddings(dim=256, cache_size=4)
+
+    def test_normalize_text(self):
+        assert normalize_text("  What ARE your   hours?! ") == "what are your hours"
+
+    def test_encode_shape_and_unit_norm(self, embeddings):
+        out = embeddings.encode(["clinic hours", "insurance providers", ""])
+        assert out.shape == (3, 256)
+        assert out.dtype == np.float32
+        np.testing.assert_allclose(np.linalg.norm(out[:2], axis=1), 1.0, rtol=1e-5)
+        assert not out[2].any()
+
+    def test_deterministic_across_instances(self, embeddings):
+        other = Embeddings(dim=256)
+        np.testing.assert_array_equal(embeddings.encode(["opening hours"]), other.encode(["opening hours"]))
+
+    def test_similar_phrasings_score_higher(self, embeddings):
+        q, near, far = embeddings.encode(["what are your opening hours", "clinic opening hours", "insurance"])
+        assert q @ near > q @ far
+
+    def test_batch_matches_single(self, embeddings):
+        texts = ["hours", "parking", "insurance", "hours"]
+        batch = embeddings.encode(texts)
+        for text, row in zip(texts, batch):
+            np.testing.assert_allclose(Embeddings(dim=256).encode([text])[0], row, rtol=1e-6)
+
+    def test_cache_is_keyed_on_normalized_text(self, embeddings):
+        embeddings.encode(["What are your hours?"])
+        embeddings.encode(["what are your HOURS"])
+        stats = embeddings.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+    def test_cache_is_bounded(self, embeddings):
+        embeddings.encode([f"question {i}" for i in range(10)])
+        assert len(embeddings.cache) == 4
+        assert embeddings.stats()["evictions"] == 6
+
+    def test_fit_applies_idf_and_clears_cache(self, embeddings):
+        before = embeddings.encode(["clinic hours"])[0]
+        embeddings.fit(["clinic hours", "clinic location", "clinic insurance"])
+        assert len(embeddings.cache) == 0
+        assert not np.allclose(before, embeddings.encode(["clinic hours"])[0])
+
+    @pytest.mark.asyncio
+    async def test_async_wrappers(self, embeddings):
+        single = await embeddings.create_embedding("hours")
+        batch = await embeddings.create_embeddings(["hours"])
+        np.testing.assert_array_equal(single, batch[0])
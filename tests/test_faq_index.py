@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pytest
+
+from rag.faq_index import build_index, corpus_hash, load_corpus, load_index
+from rag.faq_rag import FALLBACK_ANSWER, FAQRAG
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "clinic_info.json"
+    path.write_text(json.dumps({
+        "name": "Test Clinic",
+        "hours": "9AM - 5PM",
+        "faqs": [
+            {"category": "Clinic Details", "question": "Is there parking?", "answer": "Free parking."},
+            {"category": "Insurance & Billing", "question": "What insurance do you accept?",
+             "answer": "Most major plans, including Blue Cross."},
+        ],
+    }))
+    return path
+
+
+class TestFAQIndex:
+
+    def test_load_corpus_includes_clinic_fields(self, corpus):
+        entries = load_corpus(corpus)
+        assert entries[0] == {"category": "Clinic Details", "question": "clinic hours",
+                              "answer": "We are open 9AM - 5PM."}
+        assert len(entries) == 3
+
+    def test_build_and_load_round_trip(self, corpus, tmp_path):
+        entries = load_corpus(corpus)
+        build_index(entries, tmp_path / "index", corpus_hash(corpus), dim=128)
+
+        meta, matrix, idf, answers = load_index(tmp_path / "index", corpus_hash(corpus))
+        assert meta["count"] == 3 and meta["dim"] == 128
+        assert isinstance(matrix, np.memmap) and not matrix.flags.writeable
+        assert matrix.shape == (3, 128) and idf.shape == (128,)
+        assert [a["q"] for a in answers] == [e["question"] for e in entries]
+        assert answers[-1] == {"q": "What insurance do you accept?",
+                               "a": "Most major plans, including Blue Cross.",
+                               "category": "Insurance & Billing"}
+
+    def test_stale_or_missing_index_is_ignored(self, corpus, tmp_path):
+        assert load_index(tmp_path / "missing") is None
+        build_index(load_corpus(corpus), tmp_path / "index", "old-hash", dim=128)
+        assert load_index(tmp_path / "index", corpus_hash(corpus)) is None
+
+
+class TestFAQRAGStartup:
+
+    @pytest.mark.asyncio
+    async def test_opens_prebuilt_artifact(self, corpus, tmp_path):
+        build_index(load_corpus(corpus), tmp_path / "index", corpus_hash(corpus))
+        rag = FAQRAG(corpus_path=corpus, index_path=tmp_path / "index")
+
+        assert rag.from_artifact
+        assert "Blue Cross" in await rag.get_answer("Do you take Blue Cross insurance?")
+        assert await rag.get_answer("How do I build a rocket?") == FALLBACK_ANSWER
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_in_memory_build(self, corpus, tmp_path):
+        rag = FAQRAG(corpus_path=corpus, index_path=tmp_path / "missing")
+
+        assert not rag.from_artifact
+        assert await rag.get_answer("Is there any parking?") == "Free parking."
+
+    def test_artifact_store_copies_on_write(self, corpus, tmp_path):
+        build_index(load_corpus(corpus), tmp_path / "index", corpus_hash(corpus))
+        rag = FAQRAG(corpus_path=corpus, index_path=tmp_path / "index")
+
+        rag.v.add("phone", "Call us.", rag.e.encode(["phone"])[0])
+        assert len(rag.v) == 4
+        assert load_index(tmp_path / "index")[0]["count"] == 3
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from agent.scheduling_agent import SchedulingAgent
+from rag.faq_index import build_index, corpus_hash, load_corpus
+from rag.faq_rag import FAQRAG
+from tools.availability_tool import AvailabilityTool
+from utils.file_watcher import FileWatcher
+
+def with_hours(doctors, doctor_id, hours):
+    return [{**d, "weekly_hours": hours} if d["id"] == doctor_id else d for d in doctors]
+
+
+@pytest.fixture
+def engine(make_engine):
+    return make_engine(granularity=15)
+
+
+class TestFileWatcher:
+
+    def test_reports_content_changes_only(self, tmp_path):
+        path = tmp_path / "data.json"
+        path.write_text("{}")
+        seen = []
+        watcher = FileWatcher()
+        watcher.watch(path, seen.append)
+
+        assert watcher.poll() == []
+        os.utime(path, ns=(1, 1))
+        assert watcher.poll() == [] and seen == []
+        path.write_text('{"a": 1}')
+        assert watcher.poll() == [path] and seen == [path]
+
+    def test_failed_callback_is_retried(self, tmp_path):
+        path = tmp_path / "data.json"
+        path.write_text("{}")
+        loaded = []
+        watcher = FileWatcher()
+        watcher.watch(path, lambda p: loaded.append(json.loads(p.read_text())))
+
+        path.write_text('{"half": ')
+        assert watcher.poll() == [] and watcher.errors == 1
+        path.write_text('{"half": 1}')
+        assert watcher.poll() == [path] and loaded == [{"half": 1}]
+
+    @pytest.mark.asyncio
+    async def test_background_polling(self, tmp_path):
+        path = tmp_path / "data.json"
+        path.write_text("1")
+        seen = []
+        watcher = FileWatcher(interval=0.005)
+        watcher.watch(path, seen.append)
+        watcher.start()
+        path.write_text("2")
+        for _ in range(100):
+            if seen:
+                break
+            await asyncio.sleep(0.005)
+        await watcher.stop()
+        assert seen == [path]
+
+
+class TestScheduleReload:
+
+    def test_only_changed_doctor_days_are_touched(self, engine, monday, doctors):
+        assert engine.reserve("dr_a", monday, 9 * 60, 30)
+        engine._runs_for([0, 1], 0, 14)
+        touched = engine.update_doctors(with_hours(doctors, "dr_a", {"monday": [["08:00", "12:00"]],
+                                                                    "tuesday": [["09:00", "10:00"]]}))
+        assert touched == [("dr_a", monday), ("dr_a", monday + timedelta(days=7))]
+        assert engine.free[0, 0, 8 * 60:9 * 60].all()
+        assert not engine.free[0, 0, 9 * 60:9 * 60 + 30].any()
+        assert engine.free[0, 0, 9 * 60 + 30:12 * 60].all()
+        assert (0, 1) in engine._runs and (0, 0) not in engine._runs
+        rows, _, starts = engine.find_starts(60, start_date=monday, days=1, doctor_ids=["dr_a"])
+        assert starts.tolist()[:2] == [8 * 60, 9 * 60 + 30]
+
+    def test_reservation_survives_hours_shrinking_and_returning(self, engine, monday, doctors):
+        assert engine.reserve("dr_a", monday, 11 * 60, 30)
+        engine.update_doctors(with_hours(doctors, "dr_a", {"monday": [["09:00", "10:00"]]}))
+        assert not engine.is_free("dr_a", monday, 11 * 60, 30)
+        engine.update_doctors(doctors)
+        assert not engine.is_free("dr_a", monday, 11 * 60, 30)
+        assert engine.is_free("dr_a", monday, 11 * 60 + 30, 30)
+
+        # The same through a roster change, which rebuilds the grids.
+        engine.update_doctors([doctors[1], with_hours(doctors, "dr_a", {})[0]])
+        engine.update_doctors(doctors)
+        assert not engine.is_free("dr_a", monday, 11 * 60, 30)
+        engine.release("dr_a", monday, 11 * 60, 30)
+        assert engine.is_free("dr_a", monday, 11 * 60, 30)
+
+    def test_roster_change_keeps_reservations(self, engine, monday, doctors):
+        assert engine.reserve("dr_b", monday, 10 * 60, 30)
+        doctors = [doctors[1], {"id": "dr_c", "weekly_hours": {"monday": [["13:00", "14:00"]]}}]
+        assert engine.update_doctors(doctors) is None
+        assert engine.index == {"dr_b": 0, "dr_c": 1}
+        assert not engine.is_free("dr_b", monday, 10 * 60, 30)
+        assert engine.is_free("dr_b", monday, 10 * 60 + 30, 30)
+        assert engine.is_free("dr_c", monday, 13 * 60, 60)
+        assert not engine.is_free("dr_a", monday, 9 * 60, 30)
+
+    @pytest.mark.asyncio
+    async def test_tool_drops_only_affected_cache_entries(self, engine, monday, doctors):
+        tool = AvailabilityTool(engine=engine, clock=lambda: datetime(2024, 1, 15, 7, 0))
+        await tool.get_available_slots(days_ahead=1, doctor_id="dr_b")
+        await tool.get_available_slots(days_ahead=1, start_date=monday + timedelta(days=1), doctor_id="dr_a")
+        tool.apply_schedule({"doctors": with_hours(doctors, "dr_b", {"monday": [["10:00", "12:00"]]})})
+        assert len(tool.cache.entries) == 1
+        slots = await tool.get_available_slots(days_ahead=1, doctor_id="dr_b", duration=60)
+        assert [s["time"] for s in slots] == ["10:00", "10:15", "10:30", "10:45", "11:00"]
+
+        tool.apply_schedule({"doctors": [{**doctors[0], "name": "Dr. Renamed"}, doctors[1]]})
+        assert len(tool.cache.entries) == 0
+
+
+class TestCorpusReload:
+
+    @pytest.fixture
+    def corpus(self, tmp_path):
+        path = tmp_path / "clinic_info.json"
+        path.write_text(json.dumps({"faqs": [
+            {"category": "Parking", "question": "Is there parking?", "answer": "Free parking."},
+            {"category": "Billing", "question": "Do you take insurance?", "answer": "Most plans."},
+        ]}))
+        return path
+
+    @pytest.mark.asyncio
+    async def test_incremental_update_over_mapped_index(self, corpus, tmp_path):
+        build_index(load_corpus(corpus), tmp_path / "index", corpus_hash(corpus), dim=128)
+        rag = FAQRAG(corpus_path=corpus, index_path=tmp_path / "index")
+        mapped = rag.v.matrix
+        assert await rag.get_answer("Is there parking?") == "Free parking."
+
+        corpus.write_text(json.dumps({"faqs": [
+            {"category": "Parking", "question": "Is there parking?", "answer": "Paid parking."},
+            {"category": "Visits", "question": "Do you offer telehealth visits?", "answer": "Yes, by video."},
+        ]}))
+        assert rag.apply_corpus(load_corpus(corpus)) == {"added": 1, "removed": 1, "changed": 1}
+        assert await rag.get_answer("Is there parking?") == "Paid parking."
+        assert await rag.get_answer("Do you offer telehealth visits?") == "Yes, by video."
+        assert len(rag.v) == 2
+        # The mapped artifact is copied on write, never modified.
+        assert not mapped.flags.writeable and np.linalg.norm(mapped, axis=1).min() > 0
+
+        assert rag.apply_corpus(load_corpus(corpus)) == {"added": 0, "removed": 0, "changed": 0}
+
+
+class TestAgentReload:
+
+    @pytest.mark.asyncio
+    async def test_watcher_feeds_the_agent(self, tmp_path, doctors):
+        schedule = tmp_path / "doctor_schedule.json"
+        schedule.write_text(json.dumps({"doctors": doctors}))
+        agent = SchedulingAgent()
+        agent.availability_tool = AvailabilityTool(schedule_path=schedule)
+        watcher = FileWatcher()
+        watcher.watch(schedule, agent.reload_schedule)
+
+        schedule.write_text(json.dumps({"doctors": doctors + [{"id": "dr_new", "weekly_hours": {}}]}))
+        assert watcher.poll() == [schedule]
+        assert "dr_new" in agent.availability_tool.engine.index
+
+        assert agent.reload_faq(tmp_path / "unused.json") is False  # not loaded yet: nothing to do
+        assert not agent.loaded()["faq_rag"]
+
+    def test_edit_during_warm_up_is_applied_once_built(self, tmp_path, doctors):
+        schedule = tmp_path / "doctor_schedule.json"
+        schedule.write_text(json.dumps({"doctors": doctors}))
+        agent = SchedulingAgent()
+        watcher = FileWatcher()
+        watcher.watch(schedule, agent.reload_schedule)
+        # Warm-up reads the schedule, then the file is edited before the tool is in place.
+        building = AvailabilityTool(schedule_path=schedule)
+        schedule.write_text(json.dumps({"doctors": doctors + [{"id": "dr_new", "weekly_hours": {}}]}))
+
+        assert watcher.poll() == [] and watcher.errors == 0
+        agent.availability_tool = building
+        assert watcher.poll() == [schedule]
+        assert "dr_new" in agent.availability_tool.engine.index
+        assert watcher.poll() == []
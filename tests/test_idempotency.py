@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from utils.idempotency import IdempotencyCache, IdempotencyConflict
+
+
+class TestIdempotencyCache:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_retries_share_one_call(self):
+        cache, calls = IdempotencyCache(), []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"n": len(calls)}
+
+        results = await asyncio.gather(*(cache.run("k", "body", compute) for _ in range(5)))
+        assert results == [{"n": 1}] * 5 and len(calls) == 1
+        assert await cache.run("k", "body", compute) == {"n": 1}
+        assert cache.stats()["joined"] == 4 and cache.stats()["replays"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_stored(self):
+        cache, calls = IdempotencyCache(), []
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("upstream down")
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            await cache.run("k", "body", flaky)
+        assert await cache.run("k", "body", flaky) == "ok"
+        assert cache.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rejected_results_are_not_stored(self):
+        cache, calls = IdempotencyCache(), []
+
+        async def compute():
+            calls.append(1)
+            return len(calls)
+
+        assert await cache.run("k", "body", compute, keep=lambda n: n > 1) == 1
+        assert await cache.run("k", "body", compute, keep=lambda n: n > 1) == 2
+        assert await cache.run("k", "body", compute, keep=lambda n: n > 1) == 2
+
+    @pytest.mark.asyncio
+    async def test_conflicting_body(self):
+        cache = IdempotencyCache()
+
+        async def compute():
+            return 1
+
+        await cache.run("k", "a", compute)
+        with pytest.raises(IdempotencyConflict):
+            await cache.run("k", "b", compute)
+
+    @pytest.mark.asyncio
+    async def test_bounded_by_size_and_ttl(self):
+        cache, calls = IdempotencyCache(maxsize=2, ttl=0.02), []
+
+        async def compute():
+            calls.append(1)
+            return len(calls)
+
+        for key in "abc":
+            await cache.run(key, "", compute)
+        assert len(cache.results) == 2
+        assert await cache.run("a", "", compute) == 4
+        await asyncio.sleep(0.03)
+        assert await cache.run("a", "", compute) == 5
+
+        cache.forget("a")
+        assert await cache.run("a", "", compute) == 6
@@ -0,0 +1,144 @@
+import pytest
+
+from agent.intent_router import IntentRouter, parse_clock
+from agent.scheduling_agent import SchedulingAgent
+from tools.availability_tool import AvailabilityTool
+
+
+@pytest.fixture
+def doctors():
+    return [{"id": "dr_a", "name": "Dr. A", "weekly_hours": {
+        day: [["09:00", "12:00"], ["13:00", "15:00"]] for day in ["monday", "tuesday", "friday"]}}]
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter.from_file()
+
+
+class TestIntentRouter:
+
+    @pytest.mark.parametrize("message, topic", [
+        ("What are your hours?", "hours"),
+        ("Do you accept Blue Cross insurance?", "insurance"),
+        ("Where are you located?", "location"),
+        ("What should I bring to my appointment?", "preparation"),
+        ("Can I park at your clinic?", "parking"),
+        ("What is your cancellation policy?", "cancellation_policy"),
+        ("Do I need to wear a mask for COVID?", "covid"),
+        ("How much is a consultation?", "cost"),
+        ("Are you open on weekends?", "hours"),
+    ])
+    def test_faq_topics(self, router, message, topic):
+        assert router.classify(message).get("faq") == topic
+
+    @pytest.mark.parametrize("message", [
+        "I want to schedule an appointment", "What times are available?", "Can I reschedule my appointment?",
+        "Hello", "Good morning",
+    ])
+    def test_not_faq(self, router, message):
+        assert not router.classify(message).has("faq")
+
+    @pytest.mark.parametrize("message", [
+        "Do you have something on the weekend?", "Anything open this weekend?", "I can only do weekends",
+        "Any opening on Saturday morning?",
+    ])
+    def test_slot_preferences_are_not_faq(self, router, message):
+        assert not router.classify(message).has("faq")
+
+    @pytest.mark.parametrize("message", [
+        "When are you open?", "Is the clinic open on Saturday?", "What time do you close?",
+    ])
+    def test_hours_questions(self, router, message):
+        assert router.classify(message).get("faq") == "hours"
+
+    @pytest.mark.parametrize("message, expected", [
+        ("I need a general consultation", "general_consultation"),
+        ("I want a checkup", "general_consultation"),
+        ("Book a follow-up appointment", "follow_up"),
+        ("Schedule a physical exam", "physical_exam"),
+        ("Book a specialty consultation", "specialist_consultation"),
+        ("Book an appointment", None),
+    ])
+    def test_appointment_type(self, router, message, expected):
+        assert router.classify(message).get("appointment_type") == expected
+
+    def test_priority_follows_data_order(self, router):
+        assert router.classify("follow up on my general exam").get("appointment_type") == "general_consultation"
+
+    def test_slot_references(self, router):
+        assert router.classify("slot 3 please").slot_number == 3
+        assert router.classify("the second one").slot_number == 2
+        intent = router.classify("2024-01-15 at 2:30 pm")
+        assert intent.dates == ["2024-01-15"] and intent.times == [870] and intent.slot_number is None
+
+    def test_yes_no(self, router):
+        assert router.classify("Yes, please").has("affirm")
+        assert router.classify("no, don't book it").has("negate")
+
+    def test_single_pass_over_every_category(self, router):
+        intent = router.classify("Yes the first one, and do you take insurance for a physical?")
+        assert intent.has("affirm") and intent.slot_number == 1
+        assert intent.get("faq") == "insurance" and intent.get("appointment_type") == "physical_exam"
+
+    @pytest.mark.parametrize("message, category, label", [
+        ("any time tomorrow", "relative_day", "1"),
+        ("the day after tomorrow", "relative_day", "2"),
+        ("friday afternoon works", "weekday", "friday"),
+        ("friday afternoon works", "time_band", "afternoon"),
+        ("I am free in the mornings", "time_band", "morning"),
+    ])
+    def test_preferences(self, router, message, category, label):
+        assert router.classify(message).get(category) == label
+
+    def test_intents_from_data(self):
+        router = IntentRouter({"faq": {"pets": ["service dog", "pets"]}})
+        assert router.max_words == 2
+        assert router.classify("Can I bring my service dog?").get("faq") == "pets"
+        assert router.classify("dog").get("faq") is None
+
+    @pytest.mark.parametrize("text, minute", [
+        ("9:00", 540), ("09:30", 570), ("2pm", 840), ("2:30 p.m.", 870), ("12am", 0), ("25:00", None),
+    ])
+    def test_parse_clock(self, text, minute):
+        assert parse_clock(text) == minute
+
+
+class TestAgentSlotSelection:
+
+    @pytest.mark.asyncio
+    async def test_select_slot_by_number(self):
+        agent = SchedulingAgent()
+        await agent.process_message("Hello", "s")
+        await agent.process_message("I need a follow-up", "s")
+        context = agent.conversation_contexts["s"]
+
+        await agent.process_message("I'll take number 2", "s")
+        assert context.current_phase == "patient"
+        assert context.selected_slot == context.suggested_slots[1]
+
+    @pytest.mark.asyncio
+    async def test_preferences_rank_offered_slots(self, make_engine, clock):
+        agent = SchedulingAgent()
+        agent.availability_tool = AvailabilityTool(engine=make_engine(), clock=clock)
+        await agent.process_message("Hello", "p")
+        await agent.process_message("A checkup tomorrow around 3pm", "p")
+        context = agent.conversation_contexts["p"]
+        assert (context.preferred_date, context.preferred_time) == ("2024-01-16", "15:00")
+        assert [(s["date"], s["time"]) for s in context.suggested_slots[:2]] == [
+            ("2024-01-16", "14:30"), ("2024-01-16", "14:15")]
+
+        result = await agent.process_message("anything on friday morning?", "p")
+        assert result["response"].startswith("Here are the closest slots:")
+        assert (context.preferred_date, context.preferred_time) == ("2024-01-19", "morning")
+        assert {s["date"] for s in context.suggested_slots} == {"2024-01-19"}
+        assert context.suggested_slots[0]["time"] == "9:00"
+
+    @pytest.mark.asyncio
+    async def test_patient_form_mentioning_faq_words_is_not_hijacked(self):
+        agent = SchedulingAgent()
+        for message in ["Hello", "general", "1"]:
+            await agent.process_message(message, "s")
+        result = await agent.process_message(
+            "Name: Jo\nPhone: 555-1234\nEmail: jo@email.com\nReason: insurance paperwork", "s")
+        assert result["response"] == "Confirm booking? (yes/no)"
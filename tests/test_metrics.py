@@ -0,0 +1,81 @@
+
+import pytest
+from fastapi.testclient import TestClient
+
+from utils import metrics
+from utils.metrics import Registry, span, timed
+
+
+@pytest.fixture
+def tracer():
+    spans = []
+    metrics.set_tracer(spans.append)
+    yield spans
+    metrics.set_tracer(None)
+
+
+class TestMetrics:
+
+    def test_histogram_exposition(self):
+        registry = Registry()
+        h = registry.histogram("turn_seconds", "Turn latency", ["phase"], buckets=(0.1, 1.0))
+        h.labels("greeting").observe(0.05)
+        h.labels("greeting").observe(0.1)
+        h.labels("greeting").observe(3)
+        lines = registry.render().splitlines()
+        assert lines[:2] == ["# HELP turn_seconds Turn latency", "# TYPE turn_seconds histogram"]
+        assert lines[2:] == [
+            'turn_seconds_bucket{phase="greeting",le="0.1"} 2',
+            'turn_seconds_bucket{phase="greeting",le="1.0"} 2',
+            'turn_seconds_bucket{phase="greeting",le="+Inf"} 3',
+            'turn_seconds_sum{phase="greeting"} 3.15',
+            'turn_seconds_count{phase="greeting"} 3',
+        ]
+
+    def test_counter_and_callback_gauge(self):
+        registry = Registry()
+        registry.counter("bookings_total", "Bookings").inc(2)
+        registry.gauge("hit_ratio", "Hit ratio", ["cache"], callback=lambda: {"faq": 0.5, ("slots",): 0.25})
+        registry.gauge("broken", "Raises", callback=lambda: 1 / 0)
+        text = registry.render()
+        assert "bookings_total 2.0" in text
+        assert 'hit_ratio{cache="faq"} 0.5' in text and 'hit_ratio{cache="slots"} 0.25' in text
+        assert "# TYPE broken gauge" in text
+
+    @pytest.mark.asyncio
+    async def test_timed_observes_even_on_error(self):
+        h = Registry().histogram("op_seconds", "op")
+
+        @timed(h.labels())
+        async def fail():
+            raise ValueError
+
+        with pytest.raises(ValueError):
+            await fail()
+        assert h.labels().count == 1
+
+    def test_span_reaches_tracer(self, tracer):
+        with span("chat.turn", session_id="s") as attributes:
+            attributes["next_phase"] = "understanding"
+        assert tracer[0]["name"] == "chat.turn"
+        assert tracer[0]["attributes"] == {"session_id": "s", "next_phase": "understanding"}
+        assert tracer[0]["duration"] >= 0
+
+
+class TestMetricsEndpoint:
+
+    def test_metrics_route(self, tracer):
+        from main import app
+
+        client = TestClient(app)
+        client.post("/chat/", json={"session_id": "metrics", "message": "Hello"})
+        client.post("/chat/", json={"session_id": "metrics", "message": "What are your hours?"})
+        response = client.get("/metrics")
+
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'chat_turn_seconds_count{phase="greeting"}' in text
+        assert "faq_answer_seconds_count" in text
+        assert "chat_active_sessions " in text
+        assert 'cache_hit_ratio{cache="embeddings"}' in text
+        assert [s["attributes"]["phase"] for s in tracer] == ["greeting", "understanding"]
@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+
+import pytest
+
+from agent.scheduling_agent import ConversationContext
+from agent.session_store import SessionStore
+
+SOAK_SESSIONS = int(os.getenv("SOAK_SESSIONS", "1000000"))
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def new_context(session_id):
+    return lambda: ConversationContext(session_id=session_id, user_id=None)
+
+
+class TestConversationContext:
+
+    def test_is_slotted(self):
+        context = ConversationContext(session_id="s", user_id=None)
+        assert not hasattr(context, "__dict__")
+        with pytest.raises(AttributeError):
+            context.unexpected = 1
+
+
+class TestSessionStore:
+
+    def test_get_or_create_reuses_context(self):
+        store = SessionStore(max_entries=10, idle_ttl=60)
+        first = store.get_or_create("a", new_context("a"))
+        assert store.get_or_create("a", new_context("a")) is first
+        assert "a" in store and store["a"] is first
+        assert store.stats()["created"] == 1
+
+    def test_lru_eviction(self):
+        store = SessionStore(max_entries=3, idle_ttl=60)
+        for sid in "abc":
+            store.get_or_create(sid, new_context(sid))
+        store.get_or_create("a", new_context("a"))
+        store.get_or_create("d", new_context("d"))
+
+        assert "b" not in store
+        assert all(sid in store for sid in "acd")
+        assert store.stats()["evictions"] == 1
+
+    def test_idle_ttl_eviction(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(time, "monotonic", lambda: now[0])
+        store = SessionStore(max_entries=100, idle_ttl=30)
+        store.get_or_create("old", new_context("old"))
+        now[0] += 20
+        store.get_or_create("recent", new_context("recent"))
+        now[0] += 15
+        store.get_or_create("new", new_context("new"))
+
+        assert "old" not in store
+        assert "recent" in store and "new" in store
+        assert store.stats()["expirations"] == 1
+
+    def test_missing_session_raises_key_error(self):
+        with pytest.raises(KeyError):
+            SessionStore()["missing"]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads RSS from /proc")
+def test_soak_rss_stays_flat():
+    cap = 10_000
+    store = SessionStore(max_entries=cap, idle_ttl=3600)
+    for i in range(5 * cap):
+        store.get_or_create(f"warm-{i}", new_context(f"warm-{i}"))
+    baseline = rss_bytes()
+
+    start = time.perf_counter()
+    for i in range(SOAK_SESSIONS):
+        sid = f"session-{i}"
+        context = store.get_or_create(sid, new_context(sid))
+        context.current_phase = "understanding"
+    elapsed = time.perf_counter() - start
+    growth = rss_bytes() - baseline
+
+    assert len(store) == cap
+    assert store.stats()["evictions"] == 5 * cap + SOAK_SESSIONS - cap
+    assert growth < 8 * 1024 * 1024, f"RSS grew by {growth / 1e6:.1f} MB"
+    print(f"\n{SOAK_SESSIONS:,} sessions in {elapsed:.1f}s, RSS growth {growth / 1e6:.2f} MB")
@@ -0,0 +1,65 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from agent.scheduling_agent import SchedulingAgent
+
+BACKEND = Path(__file__).resolve().parents[1] / "backend"
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+
+def _run(code, *flags):
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=BACKEND, capture_output=True, text=True,
+                          check=True)
+
+
+class TestImportTime:
+
+    def test_import_builds_no_subsystem(self):
+        out = _run("import main; print(main.agent.loaded())").stdout
+        assert out.strip() == str({name: False for name in SchedulingAgent.SUBSYSTEMS})
+
+    def test_import_time_budget(self):
+        err = _run("import main", "-X", "importtime").stderr
+        total_us = int(re.search(r"\|\s*(\d+) \| main$", err, re.M).group(1))
+        assert total_us / 1000 < IMPORT_BUDGET_MS
+
+
+class TestLifespan:
+
+    @pytest.fixture
+    def agent(self, monkeypatch):
+        agent = SchedulingAgent()
+        monkeypatch.setattr(main, "agent", agent)
+        return agent
+
+    def test_ready_flips_after_background_warm_up(self, agent, monkeypatch):
+        monkeypatch.setattr(main, "STARTUP_WARM_UP", "background")
+        assert TestClient(main.app).get("/ready").status_code == 503
+        with TestClient(main.app) as client:
+            deadline = time.monotonic() + 10
+            while (res := client.get("/ready")).status_code != 200 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert res.json() == {"status": "ready", "subsystems": {name: True for name in agent.SUBSYSTEMS}}
+
+    def test_block_mode_is_ready_on_startup(self, agent, monkeypatch):
+        monkeypatch.setattr(main, "STARTUP_WARM_UP", "block")
+        with TestClient(main.app) as client:
+            assert client.get("/ready").status_code == 200
+
+    def test_off_mode_builds_lazily(self, agent, monkeypatch):
+        monkeypatch.setattr(main, "STARTUP_WARM_UP", "off")
+        with TestClient(main.app) as client:
+            assert client.get("/ready").status_code == 200
+            assert not any(agent.loaded().values())
+            assert client.get("/metrics").status_code == 200
+            assert not any(agent.loaded().values())
+        agent.faq_rag
+        assert agent.loaded()["faq_rag"]
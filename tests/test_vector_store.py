@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from rag.vector_store import VectorStore
+
+
+class TestVectorStore:
+
+    @pytest.fixture
+    def store(self):
+        store = VectorStore()
+        store.add("clinic hours", "We are open 8AM - 6PM.", [1.0, 0.0, 0.0])
+        store.add("location", "Main Street Hospital.", [0.0, 2.0, 0.0])
+        store.add("insurance", "Major providers.", [0.0, 0.0, 3.0])
+        return store
+
+    def test_rows_are_normalized_float32(self, store):
+        assert store.matrix.dtype == np.float32
+        assert store.matrix.flags["C_CONTIGUOUS"]
+        np.testing.assert_allclose(np.linalg.norm(store.matrix, axis=1), 1.0, rtol=1e-6)
+
+    def test_search_returns_nearest_first(self, store):
+        hits = store.search([0.1, 0.9, 0.2], k=2)
+        assert [h["question"] for h in hits] == ["location", "insurance"]
+        assert hits[0]["score"] > hits[1]["score"]
+
+    def test_min_score_filters(self, store):
+        hits = store.search([0.0, 1.0, 0.0], k=3, min_score=0.5)
+        assert [h["question"] for h in hits] == ["location"]
+
+    def test_search_batch_matches_single_search(self, store):
+        queries = np.array([[1, 0.1, 0], [0, 0, 1], [0.2, 1, 0.3]], dtype=np.float32)
+        batched = store.search_batch(queries, k=2)
+        assert batched == [store.search(q, k=2) for q in queries]
+
+    def test_delete_and_slot_reuse(self, store):
+        store.delete(1)
+        assert len(store) == 2
+        assert all(h["question"] != "location" for h in store.search([0, 1, 0], k=3))
+
+        idx = store.add("parking", "Free parking on site.", [0.0, 1.0, 0.0])
+        assert idx == 1
+        assert store.search([0, 1, 0], k=1)[0]["question"] == "parking"
+
+    def test_deleted_rows_never_returned(self, store):
+        store.delete(1)
+        hits = store.search([0, 1, 0], k=3, min_score=-np.inf)
+        assert [h["id"] for h in hits] == [0, 2]
+        assert store.search_batch([[0, 1, 0]], k=3, min_score=-np.inf) == [hits]
+
+    def test_non_positive_k(self, store):
+        assert store.search([1, 0, 0], k=0) == []
+        assert store.search([1, 0, 0], k=-1, min_score=-np.inf) == []
+
+    def test_update_in_place(self, store):
+        store.update(0, answer="We are open 7AM - 7PM.", embedding=[0.0, 1.0, 0.0])
+        hit = store.search([0, 1, 0], k=1)[0]
+        assert hit["id"] in (0, 1)
+        assert store.data[0]["a"] == "We are open 7AM - 7PM."
+
+    def test_growth_keeps_existing_rows(self):
+        store = VectorStore(capacity=2)
+        rng = np.random.default_rng(0)
+        vecs = rng.normal(size=(50, 8))
+        for i, v in enumerate(vecs):
+            store.add(f"q{i}", f"a{i}", v)
+        for i in (0, 17, 49):
+            assert store.search(vecs[i], k=1)[0]["question"] == f"q{i}"
+
+    def test_dim_mismatch_raises(self, store):
+        with pytest.raises(ValueError):
+            store.add("bad", "bad", [1.0, 2.0])
+
+    def test_empty_store(self):
+        assert VectorStore().search([1.0, 0.0]) == []
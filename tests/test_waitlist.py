@@ -0,0 +1,225 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agent.scheduling_agent import SchedulingAgent
+from api import chat
+from main import app
+from tools.waitlist import Waitlist, band_of
+
+OTHER = {"name": "Carl Cancel", "phone": "555-444-5555", "email": "carl@email.com", "reason": "Checkup"}
+
+
+@pytest.fixture
+def doctors():
+    return [
+        {"id": "dr_a", "name": "Dr. A", "weekly_hours": {"monday": [["09:00", "09:30"]]}},
+        {"id": "dr_b", "name": "Dr. B", "weekly_hours": {"monday": [["08:00", "18:00"]]}},
+    ]
+
+
+def freed(doctor_id, day, time, duration):
+    return {"doctor_id": doctor_id, "date": day.isoformat(), "time": time, "duration": duration}
+
+
+class TestWaitlist:
+
+    def test_priority_then_first_come(self, monday, patient):
+        waitlist = Waitlist()
+        first = waitlist.add(patient, 30, monday, monday)
+        waitlist.add(patient, 30, monday, monday)
+        urgent = waitlist.add(patient, 30, monday, monday, priority=-1)
+        slot = freed("dr_a", monday, "9:00", 30)
+        assert waitlist.match(slot) is urgent
+        waitlist.remove(urgent["waitlist_id"])
+        assert waitlist.match(slot) is first
+        assert len(waitlist) == 2
+
+    def test_constraints(self, monday, patient):
+        waitlist = Waitlist()
+        long = waitlist.add(patient, 60, monday, monday)
+        evening = waitlist.add(patient, 15, monday, monday, band="evening")
+        dr_b = waitlist.add(patient, 15, monday, monday, doctor_id="dr_b")
+        later = waitlist.add(patient, 15, monday + timedelta(days=2), monday + timedelta(days=3))
+
+        assert waitlist.match(freed("dr_a", monday, "9:00", 30)) is None
+        assert waitlist.match(freed("dr_a", monday, "18:00", 30)) is evening
+        assert waitlist.match(freed("dr_b", monday, "9:00", 30)) is dr_b
+        assert waitlist.match(freed("dr_a", monday, "9:00", 60)) is long
+        assert waitlist.match(freed("dr_a", monday + timedelta(days=3), "9:00", 15)) is later
+        with pytest.raises(ValueError):
+            waitlist.add(patient, 15, monday, monday + timedelta(days=60))
+
+    def test_matches_brute_force_on_large_list(self, monday, patient):
+        rng = random.Random(11)
+        waitlist = Waitlist()
+        for _ in range(20000):
+            first = monday + timedelta(days=rng.randrange(30))
+            waitlist.add(patient, rng.choice([15, 30, 45, 60]), first, first + timedelta(days=rng.randrange(5)),
+                         band=rng.choice([None, "morning", "afternoon", "evening"]),
+                         doctor_id=rng.choice([None, "dr_a", "dr_b", "dr_c"]), priority=rng.randrange(3))
+        for _ in range(200):
+            slot = freed(rng.choice(["dr_a", "dr_b", "dr_c"]), monday + timedelta(days=rng.randrange(30)),
+                         f"{rng.randrange(8, 20)}:{rng.choice(['00', '30'])}", rng.choice([15, 30, 45, 60]))
+            hhmm = [int(p) for p in slot["time"].split(":")]
+            fits = [e for e in waitlist.entries.values() if e["status"] == "waiting"
+                    and e["date_from"] <= slot["date"] <= e["date_to"] and e["duration"] <= slot["duration"]
+                    and e["band"] in (None, band_of(hhmm[0] * 60 + hhmm[1]))
+                    and e["doctor_id"] in (None, slot["doctor_id"])]
+            expected = min(fits, key=lambda e: (e["priority"], int(e["waitlist_id"][4:])), default=None)
+            assert waitlist.match(slot) is expected
+            if expected:
+                waitlist.fulfil(expected["waitlist_id"], "BOOK0")
+
+    def test_prune_drops_past_windows(self, monday, patient):
+        waitlist = Waitlist()
+        waitlist.add(patient, 30, monday, monday)
+        kept = waitlist.add(patient, 30, monday, monday + timedelta(days=1))
+        assert waitlist.prune(monday + timedelta(days=1)) == 1
+        assert list(waitlist.entries) == [kept["waitlist_id"]] and len(waitlist) == 1
+
+
+class TestBackfill:
+
+    @pytest.mark.asyncio
+    async def test_cancellation_books_best_waiting_patient(self, monday, patient, make_tool):
+        tool = make_tool()
+        slot = {**freed("dr_a", monday, "9:00", 30), "appointment_type": "general_consultation"}
+        booked = await tool.book_appointment(OTHER, slot)
+        entry = tool.join_waitlist(patient, "follow_up", 15, monday, monday, doctor_id="dr_a")
+
+        result = await tool.cancel_appointment(booked["booking_id"])
+        backfill = result["backfill"]
+        assert backfill["waitlist_id"] == entry["waitlist_id"]
+        assert entry["status"] == "booked" and entry["booking_id"] == backfill["booking_id"]
+        booking = await tool.store.get(backfill["booking_id"])
+        assert booking["patient"] == patient and booking["appointment_type"] == "follow_up"
+        assert not tool.availability.is_free(backfill["slot"])
+        assert tool.availability.is_free(freed("dr_a", monday, "9:15", 15))
+
+    @pytest.mark.asyncio
+    async def test_reschedule_frees_old_slot_for_waitlist(self, monday, patient, make_tool):
+        tool = make_tool()
+        booked = await tool.book_appointment(OTHER, freed("dr_a", monday, "9:00", 30))
+        tool.join_waitlist(patient, "general_consultation", 30, monday, monday, band="morning")
+        result = await tool.reschedule_appointment(booked["booking_id"], freed("dr_b", monday, "10:00", 30))
+        assert (await tool.store.get(result["backfill"]["booking_id"]))["slot"]["doctor_id"] == "dr_a"
+
+    @pytest.mark.asyncio
+    async def test_no_backfill_for_past_or_unmatched_slots(self, monday, patient, make_tool, clock):
+        tool = make_tool()
+        booked = await tool.book_appointment(OTHER, freed("dr_b", monday, "9:00", 30))
+        later = await tool.book_appointment(OTHER, freed("dr_b", monday, "11:00", 30))
+        clock.now = datetime(2024, 1, 15, 9, 30)
+        tool.join_waitlist(patient, "general_consultation", 30, monday, monday, band="afternoon")
+        assert (await tool.cancel_appointment(booked["booking_id"]))["backfill"] is None
+        assert (await tool.cancel_appointment(later["booking_id"]))["backfill"] is None
+        assert len(tool.waitlist) == 1
+
+
+class TestWaitlistFlow:
+
+    @pytest.mark.asyncio
+    async def test_patient_with_no_slots_joins_and_gets_cancellation(self, monday, doctors, make_tool):
+        agent = SchedulingAgent()
+        agent.booking_tool = tool = make_tool(doctors[:1])
+        agent.availability_tool = tool.availability
+        taken = await tool.book_appointment(OTHER, freed("dr_a", monday, "9:00", 30))
+
+        session = "wait"
+        await agent.process_message("Hello", session)
+        offer = await agent.process_message("I need a general consultation", session)
+        assert "waitlist" in offer["response"]
+        await agent.process_message("Put me on the waitlist", session)
+        joined = await agent.process_message(
+            "Name: Wendy Wait\nPhone: 555-222-3333\nEmail: wendy@email.com\nReason: Checkup", session)
+        waitlist_id = agent.conversation_contexts[session].waitlist_id
+        assert waitlist_id in joined["response"]
+
+        result = await tool.cancel_appointment(taken["booking_id"])
+        assert result["backfill"]["waitlist_id"] == waitlist_id
+
+        booking_id = result["backfill"]["booking_id"]
+        status = await agent.process_message("Any news?", session)
+        assert status["response"] == f"A slot opened up: you're booked for {monday} 9:00 (ID: {booking_id})."
+        assert agent.conversation_contexts[session].current_phase == "booked"
+
+        cancelled = await agent.process_message("Please cancel it", session)
+        assert cancelled["response"].startswith(f"Cancelled booking {booking_id}.")
+        assert (await tool.store.get(booking_id))["status"] == "cancelled"
+        assert agent.conversation_contexts[session].current_phase == "understanding"
+
+    @pytest.mark.asyncio
+    async def test_waiting_patient_can_check_leave_and_start_over(self, monday, doctors, make_tool):
+        agent = SchedulingAgent()
+        agent.booking_tool = tool = make_tool(doctors[:1])
+        agent.availability_tool = tool.availability
+        await tool.book_appointment(OTHER, freed("dr_a", monday, "9:00", 30))
+
+        session = "leave"
+        for message in ["Hello", "general", "waitlist",
+                        "Name: Wendy Wait\nPhone: 555-222-3333\nEmail: wendy@email.com\nReason: Checkup"]:
+            await agent.process_message(message, session)
+        context = agent.conversation_contexts[session]
+        waitlist_id = context.waitlist_id
+
+        status = await agent.process_message("Am I still on the list?", session)
+        assert status["response"].startswith(f"You're on the waitlist (ID: {waitlist_id}) for {monday}")
+        left = await agent.process_message("Take me off", session)
+        assert left["response"] == f"You've left the waitlist ({waitlist_id}). What type of appointment do you need?"
+        assert tool.waitlist.get(waitlist_id)["status"] == "removed" and context.waitlist_id is None
+
+        await agent.process_message("general", session)
+        await agent.process_message("waitlist", session)
+        await agent.process_message(
+            "Name: Wendy Wait\nPhone: 555-222-3333\nEmail: wendy@email.com\nReason: Checkup", session)
+        again = await agent.process_message("I also need a follow-up", session)
+        assert again["response"].startswith("Here are available slots:")
+        assert context.appointment_type == "follow_up" and context.current_phase == "slots"
+        assert len(tool.waitlist) == 1
+
+
+class TestWaitlistEndpoint:
+
+    def test_join_get_leave(self, monkeypatch, monday, patient, make_tool):
+        monkeypatch.setattr(chat.agent, "booking_tool", make_tool())
+        client = TestClient(app)
+        body = {"patient": patient, "appointment_type": "follow_up", "date_from": monday.isoformat(),
+                "date_to": (monday + timedelta(days=6)).isoformat(), "band": "morning"}
+        entry = client.post("/waitlist", json=body).json()
+        assert entry["duration"] == 15 and entry["status"] == "waiting"
+        assert client.get(f"/waitlist/{entry['waitlist_id']}").json() == entry
+        assert client.delete(f"/waitlist/{entry['waitlist_id']}").json()["status"] == "removed"
+        assert client.delete(f"/waitlist/{entry['waitlist_id']}").status_code == 404
+        assert client.post("/waitlist", json={**body, "appointment_type": "massage"}).status_code == 422
+        assert client.post("/waitlist", json={**body, "date_to": "2023-01-01"}).status_code == 422
+
+    def test_cancel_and_reschedule_routes_backfill(self, monkeypatch, monday, patient, make_tool):
+        tool = make_tool()
+        monkeypatch.setattr(chat.agent, "booking_tool", tool)
+        client = TestClient(app)
+        body = {"patient": patient, "appointment_type": "general_consultation", "date_from": monday.isoformat(),
+                "date_to": monday.isoformat(), "doctor_id": "dr_a"}
+        entry = client.post("/waitlist", json=body).json()
+        booked = client.post("/bookings/series", json={"patient": OTHER, "doctor_id": "dr_a", "time": "9:00",
+                                                       "start_date": monday.isoformat(), "occurrences": 1}).json()
+        booking_id = booked["booking_ids"][0]
+
+        cancelled = client.delete(f"/bookings/{booking_id}")
+        assert cancelled.status_code == 200 and cancelled.json()["backfill"]["waitlist_id"] == entry["waitlist_id"]
+        assert client.delete(f"/bookings/{booking_id}").status_code == 404
+        assert client.get(f"/waitlist/{entry['waitlist_id']}").json()["status"] == "booked"
+
+        moved_id = cancelled.json()["backfill"]["booking_id"]
+        second = client.post("/waitlist", json={**body, "doctor_id": None}).json()
+        moved = client.post(f"/bookings/{moved_id}/reschedule",
+                            json={"doctor_id": "dr_b", "date": monday.isoformat(), "time": "14:00"})
+        assert moved.status_code == 200 and moved.json()["backfill"]["waitlist_id"] == second["waitlist_id"]
+        assert tool.store.bookings[moved_id]["slot"]["duration"] == 30
+        taken = client.post(f"/bookings/{moved_id}/reschedule",
+                            json={"doctor_id": "dr_a", "date": monday.isoformat(), "time": "9:00"})
+        assert taken.status_code == 409
+        assert client.post("/bookings/BOOK999/reschedule",
+                           json={"doctor_id": "dr_b", "date": monday.isoformat(), "time": "15:00"}).status_code == 404